@@ -0,0 +1,39 @@
+"""
+Async Session Support for the Medical Chatbot Engines
+Per-session serialization and executor offloading for asyncio front ends
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
+
+
+class SessionLockRegistry:
+    """Hands out one asyncio.Lock per session id.
+
+    Turns for the same session run one at a time so the session dict is
+    never mutated by two coroutines at once, while different sessions
+    proceed concurrently. Locks are held weakly and disappear once no
+    coroutine is waiting on them, so idle sessions cost nothing here.
+    """
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def get(self, session_id: str) -> asyncio.Lock:
+        """Get (or create) the lock for a session"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+async def run_blocking(executor: Optional[Executor], func: Callable, *args) -> Any:
+    """Run a blocking call (SQLite, NLP) in an executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, func, *args)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+End-to-End Conversation Benchmark
+Replays scripted booking, FAQ and emergency conversations and reports throughput and latency
+
+    python benchmark_conversations.py --concurrency 8 --conversations 400 --output bench.json
+    python benchmark_conversations.py --compare bench_main.json --max-regression 10
+
+Each scripted conversation runs on its own session; ``--concurrency``
+conversations are in flight at once (one thread each), sharing one chatbot,
+database and NLP pipeline the way a front end does. Every target runs in a
+fresh process, so its peak RSS is its own and not inherited from the target
+measured before it. Results are written as JSON so a run can be compared
+against the one from the previous deploy.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from medical_chatbot import HospitalDatabase, MedicalChatbot, MedicalNLPPipeline
+from conversation_flows import MedicalConversationEngine
+from memory_accounting import current_rss_mb, peak_rss_mb
+
+# Scripted conversations: the same turns a patient sends through the UI
+CONVERSATION_SCRIPTS = {
+    'booking': [
+        "Hello",
+        "I want to book an appointment",
+        "Cardiology",
+        "Dr. Garcia",
+        "John Smith",
+        "+1-555-123-4567",
+        "10:00"
+    ],
+    'booking_from_symptoms': [
+        "I have chest pain and need to see someone",
+        "Dr. Garcia",
+        "Sarah Johnson",
+        "+1-555-999-8888",
+        "2:00 PM"
+    ],
+    'faq': [
+        "What are your clinic hours?",
+        "Where are you located?",
+        "Do you accept my insurance?",
+        "Is there parking available?",
+        "How do I get my test results?"
+    ],
+    'emergency': [
+        "I'm having a heart attack, emergency!",
+        "Severe chest pain and I can't breathe",
+        "It's an emergency, please help"
+    ]
+}
+
+TARGETS = ('chatbot', 'engine')
+
+# Latency percentiles reported per target and per script
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    """Per-turn latency statistics in milliseconds"""
+    ordered = sorted(latencies)
+    summary = {f"p{pct}_ms": round(percentile(ordered, pct) * 1000, 3) for pct in PERCENTILES}
+    summary['mean_ms'] = round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0
+    summary['max_ms'] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+    return summary
+
+
+def build_target(target: str):
+    """A fresh bot of the given kind over an in-memory database"""
+    database = HospitalDatabase(':memory:')
+    nlp_pipeline = MedicalNLPPipeline()
+    if target == 'chatbot':
+        return MedicalChatbot(database, nlp_pipeline)
+    if target == 'engine':
+        return MedicalConversationEngine(database, nlp_pipeline)
+    raise ValueError(f"Unknown benchmark target: {target!r}")
+
+
+def run_conversation(bot, script: List[str], session_id: str) -> List[float]:
+    """Send every turn of one script on its own session; returns per-turn seconds"""
+    latencies = []
+    for message in script:
+        started = time.perf_counter()
+        bot.process_message(message, session_id)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def benchmark_target(target: str, scripts: Dict[str, List[str]], conversations: int,
+                     concurrency: int, warmup: int = 20) -> Dict:
+    """Run ``conversations`` scripted conversations (round-robin over scripts) at a given concurrency"""
+    bot = build_target(target)
+    names = sorted(scripts)
+
+    # Warm caches (doctor roster, FAQ index, regexes) outside the timed run
+    for i in range(warmup):
+        name = names[i % len(names)]
+        run_conversation(bot, scripts[name], f"warmup-{target}-{i}")
+
+    jobs = [(names[i % len(names)], f"bench-{target}-{i}") for i in range(conversations)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(lambda job: (job[0], run_conversation(bot, scripts[job[0]], job[1])), jobs))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = []
+    per_script = {}
+    for name, latencies in results:
+        all_latencies.extend(latencies)
+        per_script.setdefault(name, []).extend(latencies)
+
+    report = {
+        'conversations': conversations,
+        'turns': len(all_latencies),
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 4),
+        'turns_per_sec': round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency': latency_summary(all_latencies),
+        'scripts': {name: latency_summary(latencies) for name, latencies in sorted(per_script.items())},
+        'peak_rss_mb': peak_rss_mb()
+    }
+    return report
+
+
+def git_revision() -> Optional[str]:
+    """Commit the benchmark ran against, when run from a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(targets: List[str], conversations: int, concurrency: int, warmup: int = 20) -> Dict:
+    """Benchmark each target in its own spawned process and wrap the results with run metadata"""
+    results = {}
+    for target in targets:
+        print(f"⏱️ Benchmarking {target}: {conversations} conversations at concurrency {concurrency}...")
+        # ru_maxrss never goes down, so a target sharing the process would report its predecessor's peak
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results[target] = executor.submit(
+                benchmark_target, target, CONVERSATION_SCRIPTS, conversations, concurrency, warmup
+            ).result()
+        report = results[target]
+        print(f"  {report['turns_per_sec']} turns/sec | p50 {report['latency']['p50_ms']} ms | "
+              f"p95 {report['latency']['p95_ms']} ms | p99 {report['latency']['p99_ms']} ms | "
+              f"peak RSS {report['peak_rss_mb']} MB")
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+
+def compare_runs(baseline: Dict, current: Dict, max_regression: float) -> List[str]:
+    """Regressions beyond ``max_regression`` percent in throughput or p95/p99 latency"""
+    regressions = []
+    for target, report in current['results'].items():
+        before = baseline.get('results', {}).get(target)
+        if before is None:
+            continue
+        checks = [
+            ('turns/sec', before['turns_per_sec'], report['turns_per_sec'], False),
+            ('p95', before['latency']['p95_ms'], report['latency']['p95_ms'], True),
+            ('p99', before['latency']['p99_ms'], report['latency']['p99_ms'], True)
+        ]
+        for label, old, new, higher_is_worse in checks:
+            if not old:
+                continue
+            change = (new - old) / old * 100
+            worse = change if higher_is_worse else -change
+            marker = "❌" if worse > max_regression else "✅"
+            print(f"  {marker} {target} {label}: {old} -> {new} ({change:+.1f}%)")
+            if worse > max_regression:
+                regressions.append(f"{target} {label} {change:+.1f}%")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scripted conversations against the chatbot engines")
+    parser.add_argument('--target', choices=TARGETS + ('all',), default='all')
+    parser.add_argument('--conversations', type=int, default=200, help='Conversations per target')
+    parser.add_argument('--concurrency', type=int, default=4, help='Conversations in flight at once')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed conversations run first')
+    parser.add_argument('--output', help='Write the results JSON here')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='Fail when throughput or p95/p99 latency is this many percent worse')
+    args = parser.parse_args()
+
+    targets = list(TARGETS) if args.target == 'all' else [args.target]
+    run = run_benchmarks(targets, args.conversations, args.concurrency, args.warmup)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Comparing against {args.compare} ({baseline.get('git_revision') or 'unknown revision'})")
+        regressions = compare_runs(baseline, run, args.max_regression)
+        if regressions:
+            print(f"❌ Performance regression: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regression beyond the threshold")
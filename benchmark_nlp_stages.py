@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+NLP Stage Micro-Benchmarks
+Times each per-message NLP stage on short, long and adversarial utterances and flags regressions
+
+    python benchmark_nlp_stages.py --output nlp_baseline.json
+    python benchmark_nlp_stages.py --compare nlp_baseline.json --threshold 10
+
+Inputs come from medical_training_data.json. Every stage is warmed up,
+then timed with a loop count calibrated so one repeat lasts at least
+``--min-time``; the per-call times of all repeats are kept. A stage counts
+as slower only when its median moved more than ``--threshold`` percent AND a
+Mann-Whitney U test says the two sets of repeats really differ, so timer
+noise alone does not fail a run.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from medical_chatbot import MedicalNLPPipeline
+from conversation_flows import MedicalConversationEngine
+
+TRAINING_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medical_training_data.json')
+
+# Two-sided significance level for calling a difference real
+SIGNIFICANCE = 0.01
+
+# Fewest repeats per run for the U test to reach SIGNIFICANCE: 6 against 6
+# only gets there when every repeat of one run beats every repeat of the
+# other, 8 still does with a couple of overlapping repeats
+MIN_REPEATS = 8
+
+# Inputs the chatbot has to survive (see MedicalTestRunner._test_error_handling)
+ADVERSARIAL_FIXED = [
+    "",
+    "asdfghjkl qwerty",
+    "🤖🚀💫",
+    "a" * 1000,
+    "Book appointment " * 50,
+    "DR. DR. DR. doctor doctor dr " * 20,
+    "!!!???...,,,;;;" * 30
+]
+
+
+def load_utterances(path: str = TRAINING_DATA_FILE, seed: int = 7) -> Dict[str, List[str]]:
+    """Short, long and adversarial input sets built deterministically from the training data"""
+    with open(path, 'r', encoding='utf-8') as f:
+        training_data = json.load(f)
+    texts = sorted({sample['text'] for intent in training_data['intents'] for sample in intent['samples']})
+    rng = random.Random(seed)
+
+    short = [text for text in texts if len(text.split()) <= 6]
+    # Long messages: several requests run together, as pasted or dictated text
+    long = [' and '.join(rng.sample(texts, 6)) for _ in range(40)]
+    adversarial = list(ADVERSARIAL_FIXED)
+    for text in rng.sample(texts, min(40, len(texts))):
+        words = text.split()
+        index = rng.randrange(len(words))
+        word = words[index]
+        if len(word) > 3:
+            # Adjacent transposition, the most common typing slip
+            position = rng.randrange(len(word) - 1)
+            words[index] = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+        adversarial.append(' '.join(words).upper() if rng.random() < 0.3 else ' '.join(words))
+
+    return {
+        'short': rng.sample(short, min(60, len(short))),
+        'long': long,
+        'adversarial': adversarial
+    }
+
+
+def build_stages(nlp: MedicalNLPPipeline, engine: MedicalConversationEngine) -> Dict[str, Tuple[Callable, Callable]]:
+    """stage name -> (prepare(text) -> argument, run(argument))
+
+    ``prepare`` runs outside the timed loop, so stages that take an NLP
+    result are timed on their own work only.
+    """
+    def identity(text):
+        return text
+
+    def with_nlp_result(text):
+        return nlp.process_query(text)
+
+    def with_entities(text):
+        return text, nlp.extract_medical_entities(text)
+
+    return {
+        'extract_medical_entities': (identity, nlp.extract_medical_entities),
+        'classify_intent': (identity, nlp.classify_intent),
+        'process_query': (identity, nlp.process_query),
+        '_is_emergency': (with_nlp_result, engine._is_emergency),
+        '_detect_specialty_from_context': (with_entities, lambda arg: engine._detect_specialty_from_context(*arg))
+    }
+
+
+def add_bert_stages(stages: Dict) -> bool:
+    """Add classify_medical_intent from the BioClinicalBERT pipeline when torch/transformers and the model are available"""
+    try:
+        from medical_nlp_pipeline import MedicalNLPPipeline as BertNLPPipeline
+        bert = BertNLPPipeline()
+    except Exception as e:
+        # Missing packages, and also model downloads/loads that fail (offline, no disk, bad cache)
+        print(f"⚠️ Skipping classify_medical_intent: {type(e).__name__}: {e}")
+        return False
+    stages['classify_medical_intent'] = (lambda text: text, bert.classify_medical_intent)
+    return True
+
+
+def calibrate(run: Callable, arguments: List, min_time: float) -> int:
+    """Smallest loop count (1, 2, 5, 10, 20, ...) for which one pass over the inputs takes min_time"""
+    loops = 1
+    while True:
+        for factor in (1, 2, 5):
+            number = loops * factor
+            started = time.perf_counter()
+            for _ in range(number):
+                for argument in arguments:
+                    run(argument)
+            if time.perf_counter() - started >= min_time:
+                return number
+        loops *= 10
+
+
+def time_stage(run: Callable, arguments: List, repeats: int, min_time: float, warmup: int) -> Dict:
+    """Per-call microseconds for each repeat (garbage collection off while timing, like timeit)"""
+    for _ in range(warmup):
+        for argument in arguments:
+            run(argument)
+    loops = calibrate(run, arguments, min_time)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(loops):
+                for argument in arguments:
+                    run(argument)
+            elapsed = time.perf_counter() - started
+            samples.append(elapsed / (loops * len(arguments)) * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    ordered = sorted(samples)
+    return {
+        'loops': loops,
+        'inputs': len(arguments),
+        'median_us': round(_quantile(ordered, 0.5), 4),
+        'iqr_us': round(_quantile(ordered, 0.75) - _quantile(ordered, 0.25), 4),
+        'min_us': round(ordered[0], 4),
+        'samples_us': [round(sample, 4) for sample in samples]
+    }
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated quantile of a sorted list"""
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def mann_whitney_p(first: List[float], second: List[float]) -> float:
+    """Two-sided p-value of the Mann-Whitney U test (normal approximation with tie correction)"""
+    n1, n2 = len(first), len(second)
+    if not n1 or not n2:
+        return 1.0
+    combined = sorted([(value, 0) for value in first] + [(value, 1) for value in second])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return math.erfc(max(z, 0.0) / math.sqrt(2))
+
+
+def best_possible_p(first_count: int, second_count: int) -> float:
+    """p-value of two runs whose repeats do not overlap at all: the smallest one these counts allow"""
+    return mann_whitney_p([float(i) for i in range(first_count)],
+                          [float(first_count + i) for i in range(second_count)])
+
+
+def run_benchmarks(repeats: int, min_time: float, warmup: int, selected: Optional[List[str]] = None,
+                   include_bert: bool = False) -> Dict:
+    """Time every stage on every input set"""
+    nlp = MedicalNLPPipeline()
+    engine = MedicalConversationEngine(None, nlp)
+    stages = build_stages(nlp, engine)
+    if include_bert:
+        add_bert_stages(stages)
+    if selected:
+        stages = {name: stage for name, stage in stages.items() if name in selected}
+    utterances = load_utterances()
+
+    results = {}
+    for name, (prepare, run) in stages.items():
+        results[name] = {}
+        for input_set, texts in utterances.items():
+            arguments = [prepare(text) for text in texts]
+            report = time_stage(run, arguments, repeats, min_time, warmup)
+            results[name][input_set] = report
+            print(f"⏱️ {name:<32} {input_set:<12} median {report['median_us']:>9.2f} µs "
+                  f"(IQR {report['iqr_us']:.2f}, {report['loops']} loops x {report['inputs']} inputs)")
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeats': repeats,
+        'stages': results
+    }
+
+
+def compare_runs(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Stages whose median got more than ``threshold`` percent slower with a significant difference"""
+    regressions = []
+    for name, input_sets in current['stages'].items():
+        for input_set, report in input_sets.items():
+            before = baseline.get('stages', {}).get(name, {}).get(input_set)
+            if before is None:
+                print(f"  ➕ {name} {input_set}: no baseline")
+                continue
+            change = (report['median_us'] - before['median_us']) / before['median_us'] * 100
+            if best_possible_p(len(before['samples_us']), len(report['samples_us'])) >= SIGNIFICANCE:
+                print(f"  ⚠️ {name} {input_set}: {len(before['samples_us'])} vs {len(report['samples_us'])} repeats "
+                      f"can never reach p<{SIGNIFICANCE}; rerun both with --repeats {MIN_REPEATS} or more")
+            p_value = mann_whitney_p(before['samples_us'], report['samples_us'])
+            significant = p_value < SIGNIFICANCE
+            regressed = change > threshold and significant
+            marker = "❌" if regressed else ("⚡" if change < -threshold and significant else "✅")
+            print(f"  {marker} {name} {input_set}: {before['median_us']:.2f} -> {report['median_us']:.2f} µs "
+                  f"({change:+.1f}%, p={p_value:.4f})")
+            if regressed:
+                regressions.append(f"{name}/{input_set} {change:+.1f}%")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark the per-message NLP stages")
+    parser.add_argument('--stage', action='append', help='Only these stages (repeatable)')
+    parser.add_argument('--repeats', type=int, default=15,
+                        help=f'Timed repeats per stage and input set (at least {MIN_REPEATS})')
+    parser.add_argument('--min-time', type=float, default=0.05, help='Seconds one calibrated repeat must last')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed passes over the inputs first')
+    parser.add_argument('--bert', action='store_true', help='Also time the BioClinicalBERT classify_medical_intent')
+    parser.add_argument('--output', help='Write the results JSON here (use it as the next baseline)')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Fail when a stage is this many percent slower')
+    args = parser.parse_args()
+    if args.repeats < MIN_REPEATS:
+        parser.error(f"--repeats must be at least {MIN_REPEATS}: with fewer the significance test "
+                     f"cannot reach p<{SIGNIFICANCE}, so no regression could ever be flagged")
+
+    run = run_benchmarks(args.repeats, args.min_time, args.warmup, args.stage, args.bert)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Comparing against {args.compare} ({baseline.get('timestamp')})")
+        regressions = compare_runs(baseline, run, args.threshold)
+        if regressions:
+            print(f"❌ NLP stage regression: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No stage slower than the threshold")
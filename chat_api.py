@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Baptist Health Hospital Doral - Headless Chat API
+ASGI service exposing the medical chatbot over HTTP and WebSocket
+
+Endpoints:
+    POST /sessions/{session_id}/messages   body: {"message": "..."}
+    POST /sessions/{session_id}/messages/stream   same body, server-sent events
+    WS   /sessions/{session_id}/ws          send text or {"message": "..."}
+    GET  /health
+    GET  /metrics                           Prometheus counters, gauges and span histograms
+    POST /admin/profile?seconds=10&format=speedscope|collapsed   sample live turns, return the profile
+    GET  /admin/memory?sessions=10          bytes per component and per session (see memory_accounting.py)
+    POST /admin/memory/baseline             start tracemalloc; later /admin/memory reports the growth
+
+Run with:  python chat_api.py   (or: uvicorn chat_api:app)
+
+Optional environment:
+    CONVERSATION_LOG   append anonymized turns here for retraining
+    TURN_CAPTURE       binary turn log for replaying traffic against new builds (see turn_replay.py)
+    INTENT_MODEL       intent_classifier model file, hot-reloaded when it changes
+    SEMANTIC_INDEX     semantic_index.py index prefix (<prefix>.json + <prefix>.npy), hot-reloaded
+    MEDICAL_VOCABULARY vocabulary/config file (default medical_vocabulary.json), hot-reloaded with its doctor roster
+    CHATBOT_SESSION_TIMEOUT   seconds of inactivity before a session is dropped (default 1800)
+    CHATBOT_TRACING, OTEL_EXPORTER_OTLP_ENDPOINT   per-turn spans (see instrumentation.py)
+    ADMIN_TOKEN        enables /admin/* for requests sending "Authorization: Bearer <token>"
+    CHATBOT_PROFILER_SIGNAL=1   SIGUSR2 starts/stops the sampling profiler (see sampling_profiler.py)
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import re
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from medical_chatbot import HospitalDatabase, MedicalNLPPipeline, MedicalChatbot
+from conversation_log import ConversationLogStore
+from hot_reload import HotReloader
+from instrumentation import configure_from_env
+from intent_classifier import IncrementalIntentClassifier
+from metrics import PROMETHEUS_CONTENT_TYPE, metrics, metrics_text
+from medical_vocabulary import VOCABULARY_FILE, watch_vocabulary
+from sampling_profiler import configure_profiler_from_env, profiler
+from memory_accounting import leak_tracker, memory_report
+from turn_replay import TurnCaptureLog
+
+SESSION_ROUTE = re.compile(r'^/sessions/(?P<session_id>[A-Za-z0-9_.\-]{1,64})/(?P<action>messages|messages/stream|ws)$')
+MAX_BODY_BYTES = 16 * 1024
+MAX_MESSAGE_CHARS = 2000
+
+# Keep-alive: idle HTTP/1.1 connections and websocket pings (seconds)
+KEEP_ALIVE_SECONDS = 75
+WS_PING_INTERVAL = 20
+
+# Longest profile one admin request may take (seconds)
+MAX_PROFILE_SECONDS = 120
+
+
+class ChatAPI:
+    def __init__(self, chatbot: Optional[MedicalChatbot] = None):
+        """Initialize the ASGI app around a (shared) MedicalChatbot"""
+        self._chatbot = chatbot
+        metrics.gauge('chatbot_active_sessions', 'Conversations currently held in memory',
+                      lambda: len(self._chatbot.conversation_state) if self._chatbot is not None else 0)
+
+    @property
+    def chatbot(self) -> MedicalChatbot:
+        """Chatbot instance, created on first use when none was injected"""
+        if self._chatbot is None:
+            configure_from_env()
+            configure_profiler_from_env()
+            vocabulary = watch_vocabulary(os.environ.get('MEDICAL_VOCABULARY', VOCABULARY_FILE))
+            db = HospitalDatabase(os.environ.get('CHATBOT_DB', 'hospital_appointments.db'), vocabulary)
+            intent_model = None
+            if os.environ.get('INTENT_MODEL'):
+                intent_model = HotReloader(os.environ['INTENT_MODEL'], IncrementalIntentClassifier.load).start()
+            semantic_index = None
+            if os.environ.get('SEMANTIC_INDEX'):
+                # numpy (and torch for the query encoder) are only needed with an index
+                from semantic_index import SemanticIndex
+                semantic_index = HotReloader(os.environ['SEMANTIC_INDEX'] + '.json', SemanticIndex.load).start()
+            turn_log = None
+            if os.environ.get('CONVERSATION_LOG'):
+                turn_log = ConversationLogStore(os.environ['CONVERSATION_LOG'])
+            turn_capture = None
+            if os.environ.get('TURN_CAPTURE'):
+                turn_capture = TurnCaptureLog(os.environ['TURN_CAPTURE'])
+            self._chatbot = MedicalChatbot(db, MedicalNLPPipeline(vocabulary), semantic_index=semantic_index,
+                                           turn_log=turn_log, intent_model=intent_model, turn_capture=turn_capture)
+        return self._chatbot
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._handle_http(scope, receive, send)
+        elif scope['type'] == 'websocket':
+            await self._handle_websocket(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._handle_lifespan(receive, send)
+
+    async def _handle_lifespan(self, receive, send):
+        """Build the chatbot at startup so the first request doesn't pay for it"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.chatbot
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _handle_http(self, scope, receive, send):
+        """Route HTTP requests"""
+        path = scope['path']
+        method = scope['method']
+
+        if path == '/health':
+            await self._send_json(send, 200, {'status': 'ok'})
+            return
+
+        if path == '/metrics' and method == 'GET':
+            body = metrics_text().encode('utf-8')
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', PROMETHEUS_CONTENT_TYPE.encode()),
+                (b'content-length', str(len(body)).encode()),
+            ]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        if path == '/admin/profile':
+            await self._handle_profile(scope, send)
+            return
+
+        if path in ('/admin/memory', '/admin/memory/baseline'):
+            await self._handle_memory(scope, send)
+            return
+
+        match = SESSION_ROUTE.match(path)
+        if not match or match.group('action') == 'ws':
+            await self._send_json(send, 404, {'error': 'Not found'})
+            return
+        if method != 'POST':
+            await self._send_json(send, 405, {'error': 'Method not allowed'}, [(b'allow', b'POST')])
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send_json(send, 413, {'error': f'Request body exceeds {MAX_BODY_BYTES} bytes'})
+            return
+
+        user_input = self._parse_message(body)
+        if user_input is None:
+            await self._send_json(send, 400, {'error': 'Expected JSON body {"message": "<text>"}'})
+            return
+
+        session_id = match.group('session_id')
+        if match.group('action') == 'messages/stream':
+            await self._stream_sse(send, session_id, user_input)
+            return
+
+        start = time.perf_counter()
+        response = await self.chatbot.aprocess_message(user_input, session_id)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        await self._send_json(send, 200, self._build_payload(session_id, response), [
+            (b'server-timing', f'chat;dur={elapsed_ms:.2f}'.encode()),
+            (b'x-response-time-ms', f'{elapsed_ms:.2f}'.encode()),
+        ])
+
+    async def _handle_profile(self, scope, send):
+        """Run the sampling profiler over live traffic for a while and return the profile"""
+        if not self._is_admin(scope):
+            await self._send_json(send, 404, {'error': 'Not found'})
+            return
+        if scope['method'] != 'POST':
+            await self._send_json(send, 405, {'error': 'Method not allowed'}, [(b'allow', b'POST')])
+            return
+
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        fmt = query.get('format', ['speedscope'])[0]
+        try:
+            seconds = float(query.get('seconds', ['10'])[0])
+        except ValueError:
+            seconds = -1
+        if not 0 < seconds <= MAX_PROFILE_SECONDS or fmt not in ('speedscope', 'collapsed'):
+            await self._send_json(send, 400, {
+                'error': f'Expected seconds in (0, {MAX_PROFILE_SECONDS}] and format speedscope or collapsed'
+            })
+            return
+        if profiler.running:
+            await self._send_json(send, 409, {'error': 'A profile is already being recorded'})
+            return
+
+        profiler.reset()
+        profiler.start(duration=seconds)
+        while profiler.running:
+            await asyncio.sleep(0.1)
+
+        body = profiler.render(fmt).encode('utf-8')
+        content_type = b'application/json' if fmt == 'speedscope' else b'text/plain; charset=utf-8'
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+            (b'x-profile-samples', str(profiler.total_samples()).encode()),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _handle_memory(self, scope, send):
+        """Memory report, or (POST .../baseline) a tracemalloc baseline for later growth reports"""
+        if not self._is_admin(scope):
+            await self._send_json(send, 404, {'error': 'Not found'})
+            return
+        loop = asyncio.get_running_loop()
+        if scope['path'] == '/admin/memory/baseline':
+            if scope['method'] != 'POST':
+                await self._send_json(send, 405, {'error': 'Method not allowed'}, [(b'allow', b'POST')])
+                return
+            await loop.run_in_executor(None, leak_tracker.start)
+            await self._send_json(send, 200, {'status': 'baseline taken', 'frames': leak_tracker.frames})
+            return
+        if scope['method'] != 'GET':
+            await self._send_json(send, 405, {'error': 'Method not allowed'}, [(b'allow', b'GET')])
+            return
+
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            top_sessions = min(max(int(query.get('sessions', ['10'])[0]), 0), 1000)
+        except ValueError:
+            top_sessions = 10
+        # Walking every session takes a while with many of them; keep it off the event loop
+        report = await loop.run_in_executor(None, memory_report, self.chatbot, None, top_sessions)
+        await self._send_json(send, 200, report)
+
+    def _is_admin(self, scope) -> bool:
+        """Bearer token check; admin routes do not exist unless ADMIN_TOKEN is set"""
+        token = os.environ.get('ADMIN_TOKEN')
+        if not token:
+            return False
+        headers = dict(scope.get('headers') or [])
+        supplied = headers.get(b'authorization', b'').decode('latin-1')
+        return hmac.compare_digest(supplied, f'Bearer {token}')
+
+    async def _stream_sse(self, send, session_id: str, user_input: str):
+        """Stream one turn as server-sent events: "chunk" events, then a "done" event with the full payload"""
+        start = time.perf_counter()
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+
+        async for item in self.chatbot.astream_message(user_input, session_id):
+            if isinstance(item, str):
+                event = self._sse_event('chunk', {'text': item.replace('\\n', '\n')})
+            else:
+                payload = self._build_payload(session_id, item)
+                payload['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                event = self._sse_event('done', payload)
+            await send({'type': 'http.response.body', 'body': event, 'more_body': True})
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def _sse_event(self, event: str, data: Dict) -> bytes:
+        """Encode one server-sent event"""
+        return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'.encode('utf-8')
+
+    async def _handle_websocket(self, scope, receive, send):
+        """Stream a conversation over a websocket, one JSON frame per turn"""
+        match = SESSION_ROUTE.match(scope['path'])
+        if not match or match.group('action') != 'ws':
+            await receive()  # websocket.connect
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+
+        session_id = match.group('session_id')
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.connect':
+                await send({'type': 'websocket.accept'})
+            elif message['type'] == 'websocket.disconnect':
+                return
+            elif message['type'] == 'websocket.receive':
+                raw = message.get('text')
+                if raw is None and message.get('bytes') is not None:
+                    raw = message['bytes'].decode('utf-8', errors='replace')
+                user_input = self._parse_message(raw or '', allow_plain_text=True)
+
+                if self._is_ping(raw):
+                    payload = {'type': 'pong'}
+                elif user_input is None:
+                    payload = {'type': 'error', 'error': 'Expected text or {"message": "<text>"}'}
+                else:
+                    start = time.perf_counter()
+                    response = await self.chatbot.aprocess_message(user_input, session_id)
+                    payload = self._build_payload(session_id, response)
+                    payload['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+                await send({'type': 'websocket.send', 'text': json.dumps(payload, ensure_ascii=False)})
+
+    async def _read_body(self, receive) -> Optional[bytes]:
+        """Read the full request body, or None if it is too large"""
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    def _parse_message(self, raw, allow_plain_text: bool = False) -> Optional[str]:
+        """Extract the user message from a request body / websocket frame"""
+        try:
+            data = json.loads(raw)
+        except (ValueError, UnicodeDecodeError):
+            data = None
+
+        if isinstance(data, dict):
+            message = data.get('message')
+        elif allow_plain_text and isinstance(raw, str):
+            message = raw
+        else:
+            message = None
+
+        if not isinstance(message, str) or not message.strip():
+            return None
+        return message[:MAX_MESSAGE_CHARS]
+
+    def _is_ping(self, raw) -> bool:
+        """Application-level keep-alive frame: {"type": "ping"}"""
+        try:
+            data = json.loads(raw or '')
+        except ValueError:
+            return False
+        return isinstance(data, dict) and data.get('type') == 'ping'
+
+    def _build_payload(self, session_id: str, response: Dict) -> Dict:
+        """Shape a chatbot response for API clients"""
+        payload = dict(response)
+        payload['session_id'] = session_id
+        payload.setdefault('suggestions', [])
+        # Streamlit renders literal "\n" markers; API clients get real newlines
+        payload['response'] = response['response'].replace('\\n', '\n')
+        return payload
+
+    async def _send_json(self, send, status: int, payload: Dict, extra_headers=None):
+        """Send a complete JSON response"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(body)).encode()),
+        ]
+        headers.extend(extra_headers or [])
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = ChatAPI()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.environ.get('CHAT_API_HOST', '0.0.0.0'),
+        port=int(os.environ.get('CHAT_API_PORT', '8000')),
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        ws_ping_interval=WS_PING_INTERVAL,
+    )
@@ -6,9 +6,16 @@ Context-aware dialogue management with medical intelligence
 from typing import Dict, List, Optional, Tuple
 import json
 import re
+import time
 from datetime import datetime, timedelta
 from enum import Enum
 
+from async_sessions import SessionLockRegistry, run_blocking
+from conversation_log import ConversationLogStore
+from instrumentation import tracer
+from metrics import metrics
+from medical_vocabulary import current_vocabulary
+
 class ConversationState(Enum):
     """Conversation states for medical chatbot"""
     IDLE = "idle"
@@ -23,12 +30,29 @@ class ConversationState(Enum):
     CHECKING_APPOINTMENTS = "checking_appointments"
 
 class MedicalConversationEngine:
-    def __init__(self, database, nlp_pipeline):
-        """Initialize advanced conversation engine"""
+    def __init__(self, database, nlp_pipeline, turn_log: Optional[ConversationLogStore] = None, vocabulary=None,
+                 turn_capture=None):
+        """Initialize advanced conversation engine
+        
+        ``turn_log`` (optional) keeps an anonymized copy of each user turn and
+        its intent for incremental retraining (see intent_classifier.py).
+        ``vocabulary`` (optional) is a medical_vocabulary.watch_vocabulary()
+        watcher; specialty routing follows its live edits. ``turn_capture``
+        (optional, a turn_replay.TurnCaptureLog) records every turn with its
+        latency for replay against later builds.
+        """
         self.db = database
         self.nlp = nlp_pipeline
+        self.turn_log = turn_log
+        self.turn_capture = turn_capture
+        self.vocabulary = vocabulary
         self.sessions = {}
         
+        # Async front ends: per-session turn locks and the executor that runs
+        # blocking NLP/database work (None = the event loop's default pool)
+        self.session_locks = SessionLockRegistry()
+        self.executor = None
+        
         # Medical conversation templates
         self.response_templates = {
             'greeting': [
@@ -91,52 +115,13 @@ class MedicalConversationEngine:
             ]
         }
         
-        # Medical specialties with intelligent routing
-        self.specialty_routing = {
-            'cardiology': {
-                'keywords': ['heart', 'chest pain', 'cardiac', 'palpitations', 'blood pressure'],
-                'emergency_keywords': ['heart attack', 'chest pain severe', 'cardiac arrest'],
-                'description': 'Heart and cardiovascular system'
-            },
-            'dermatology': {
-                'keywords': ['skin', 'rash', 'acne', 'mole', 'eczema', 'dermatitis'],
-                'emergency_keywords': ['severe burn', 'severe allergic reaction'],
-                'description': 'Skin, hair, and nail conditions'
-            },
-            'pediatrics': {
-                'keywords': ['child', 'baby', 'kid', 'infant', 'vaccination', 'fever in child'],
-                'emergency_keywords': ['child emergency', 'baby not breathing', 'high fever child'],
-                'description': 'Medical care for children and adolescents'
-            },
-            'neurology': {
-                'keywords': ['headache', 'migraine', 'seizure', 'memory', 'dizziness', 'brain'],
-                'emergency_keywords': ['stroke', 'severe head injury', 'loss of consciousness'],
-                'description': 'Brain and nervous system disorders'
-            },
-            'orthopedics': {
-                'keywords': ['bone', 'joint', 'fracture', 'back pain', 'arthritis', 'sports injury'],
-                'emergency_keywords': ['severe fracture', 'compound fracture', 'spinal injury'],
-                'description': 'Bones, joints, muscles, and ligaments'
-            },
-            'gynecology': {
-                'keywords': ['pregnancy', 'menstrual', 'pap smear', 'women health', 'gynecological'],
-                'emergency_keywords': ['pregnancy emergency', 'severe bleeding'],
-                'description': 'Women\'s reproductive health'
-            },
-            'psychiatry': {
-                'keywords': ['depression', 'anxiety', 'mental health', 'therapy', 'stress', 'mood'],
-                'emergency_keywords': ['suicidal thoughts', 'severe depression', 'psychiatric emergency'],
-                'description': 'Mental health and behavioral disorders'
-            },
-            'internal_medicine': {
-                'keywords': ['general', 'checkup', 'physical', 'diabetes', 'hypertension', 'wellness'],
-                'emergency_keywords': ['severe illness', 'multiple symptoms'],
-                'description': 'General adult medical care and prevention'
-            }
-        }
-        
         print("🧠 Advanced Medical Conversation Engine initialized!")
     
+    @property
+    def specialty_routing(self) -> Dict:
+        """Specialty keywords, emergency keywords and descriptions from the medical vocabulary"""
+        return current_vocabulary(self.vocabulary).specialty_routing
+    
     def process_message(self, user_input: str, session_id: str = "default") -> Dict:
         """Process user message with advanced medical intelligence"""
         # Initialize or get session
@@ -149,19 +134,48 @@ class MedicalConversationEngine:
             'user_type': 'user'
         })
         
-        # Process with NLP
-        nlp_result = self.nlp.process_query(user_input)
-        
-        # Update session context
-        session['last_nlp_result'] = nlp_result
-        session['context'].update(nlp_result['medical_context'])
-        
-        # Check for emergency first
-        if self._is_emergency(nlp_result):
-            return self._handle_emergency(session)
-        
-        # Route based on current state and intent
-        response = self._route_conversation(session, nlp_result, user_input)
+        state_before = session['state']
+        started = time.perf_counter()
+        response = self._run_turn(session, user_input)
+        if self.turn_capture is not None:
+            self.turn_capture.record(session_id, user_input, time.perf_counter() - started, response,
+                                     private=state_before == ConversationState.COLLECTING_PATIENT_INFO,
+                                     nlp=self.nlp)
+        return response
+    
+    def _run_turn(self, session: Dict, user_input: str) -> Dict:
+        """NLP, emergency check, routing and turn logging for one message"""
+        with tracer.span('turn') as turn_span:
+            # Process with NLP
+            with tracer.span('nlp'):
+                nlp_result = self.nlp.process_query(user_input)
+            
+            # Update session context
+            session['last_nlp_result'] = nlp_result
+            session['context'].update(nlp_result['medical_context'])
+            
+            state_before = session['state']
+            turn_span.set_attribute('intent', nlp_result['intent'])
+            
+            # Check for emergency first
+            with tracer.span('emergency_check'):
+                is_emergency = self._is_emergency(nlp_result)
+            if is_emergency:
+                turn_span.set_attribute('response_type', 'emergency_response')
+                metrics.inc('chatbot_turns_total', intent=nlp_result['intent'], source='rules')
+                metrics.inc('chatbot_responses_total', type='emergency_response')
+                response = self._handle_emergency(session)
+                self._log_turn(user_input, nlp_result, state_before, response)
+                return response
+            
+            # Route based on current state and intent
+            with tracer.span('routing', state=state_before.value):
+                response = self._route_conversation(session, nlp_result, user_input)
+            turn_span.set_attribute('response_type', response['type'])
+            metrics.inc('chatbot_turns_total', intent=nlp_result['intent'], source='rules')
+            metrics.inc('chatbot_responses_total', type=response['type'])
+            
+            self._log_turn(user_input, nlp_result, state_before, response)
         
         # Log response
         session['conversation_history'].append({
@@ -173,6 +187,23 @@ class MedicalConversationEngine:
         
         return response
     
+    async def aprocess_message(self, user_input: str, session_id: str = "default") -> Dict:
+        """Process user message without blocking the event loop
+        
+        Turns for the same session are serialized; NLP and database work run
+        in ``self.executor`` so one loop can serve many conversations.
+        """
+        async with self.session_locks.get(session_id):
+            return await run_blocking(self.executor, self.process_message, user_input, session_id)
+    
+    def _log_turn(self, user_input: str, nlp_result: Dict, state_before: ConversationState, response: Dict) -> None:
+        """Append the turn to the turn log, if there is one"""
+        # Replies to the name/phone prompts are personal data and stay out of the turn log
+        if self.turn_log is not None and state_before != ConversationState.COLLECTING_PATIENT_INFO:
+            with tracer.span('turn_log'):
+                self.turn_log.append(user_input, nlp_result['intent'], nlp_result.get('confidence', 0.0),
+                                     source='rules', state=state_before.value, response_type=response['type'])
+    
     def _get_or_create_session(self, session_id: str) -> Dict:
         """Get or create conversation session"""
         if session_id not in self.sessions:
@@ -193,16 +224,8 @@ class MedicalConversationEngine:
         """Detect medical emergencies"""
         user_input = nlp_result['user_input'].lower()
         
-        # Emergency keywords
-        emergency_indicators = [
-            'emergency', 'urgent', 'can\\'t breathe', 'chest pain severe',
-            'heart attack', 'stroke', 'unconscious', 'severe bleeding',
-            'suicidal', 'overdose', 'poisoning', 'severe pain',
-            'call 911', 'ambulance'
-        ]
-        
-        # Check for emergency indicators
-        for indicator in emergency_indicators:
+        # Check for emergency indicators (medical vocabulary)
+        for indicator in current_vocabulary(self.vocabulary).emergency_indicators:
             if indicator in user_input:
                 return True
         
@@ -218,7 +241,7 @@ class MedicalConversationEngine:
         """Handle emergency situations"""
         session['state'] = ConversationState.HANDLING_EMERGENCY
         
-        response_text = \"\\n\".join(self.response_templates['emergency_detected'])
+        response_text = "\n".join(self.response_templates['emergency_detected'])
         
         return {
             'response': response_text,
@@ -251,4 +274,293 @@ class MedicalConversationEngine:
             ConversationState.COLLECTING_DOCTOR,
             ConversationState.COLLECTING_PATIENT_INFO,
             ConversationState.COLLECTING_DATE_TIME
-        ]:\n            return self._handle_booking_flow(session, nlp_result, user_input)\n        \n        # Handle cancellation\n        if intent == 'cancel_appointment':\n            return self._handle_cancel_appointment(session)\n        \n        # Default fallback\n        return self._handle_fallback(session, user_input)\n    \n    def _handle_greeting(self, session: Dict) -> Dict:\n        \"\"\"Handle greeting and welcome\"\"\"\n        session['state'] = ConversationState.GREETING\n        \n        response_text = \"\\n\".join(self.response_templates['greeting'])\n        \n        return {\n            'response': response_text,\n            'type': 'greeting',\n            'suggestions': ['Book appointment', 'Check appointments', 'Clinic hours', 'Location']\n        }\n    \n    def _handle_booking_flow(self, session: Dict, nlp_result: Dict, user_input: str) -> Dict:\n        \"\"\"Handle complex appointment booking flow\"\"\"\n        entities = nlp_result['entities']\n        current_state = session['state']\n        appointment_data = session['appointment_data']\n        \n        # Extract entities and update appointment data\n        if entities['specialties']:\n            appointment_data['specialty'] = entities['specialties'][0]\n        if entities['doctors']:\n            appointment_data['doctor'] = entities['doctors'][0] \n        if entities['symptoms']:\n            appointment_data['symptoms'] = ', '.join(entities['symptoms'])\n        \n        # Intelligent specialty detection\n        if 'specialty' not in appointment_data:\n            detected_specialty = self._detect_specialty_from_context(user_input, entities)\n            if detected_specialty:\n                appointment_data['specialty'] = detected_specialty\n        \n        # State machine for booking flow\n        if 'specialty' not in appointment_data:\n            return self._request_specialty(session)\n        elif 'doctor' not in appointment_data:\n            return self._request_doctor(session)\n        elif 'patient_name' not in appointment_data:\n            return self._request_patient_name(session)\n        elif 'patient_phone' not in appointment_data:\n            return self._request_phone(session, user_input)\n        elif 'time' not in appointment_data:\n            return self._request_time(session, user_input)\n        else:\n            return self._confirm_appointment(session)\n    \n    def _detect_specialty_from_context(self, user_input: str, entities: Dict) -> Optional[str]:\n        \"\"\"Intelligently detect specialty from context\"\"\"\n        user_lower = user_input.lower()\n        \n        # Check symptoms against specialties\n        for specialty, info in self.specialty_routing.items():\n            for keyword in info['keywords']:\n                if keyword.lower() in user_lower:\n                    return specialty\n        \n        # Check entities for clues\n        if entities['symptoms']:\n            symptom_text = ' '.join(entities['symptoms']).lower()\n            for specialty, info in self.specialty_routing.items():\n                for keyword in info['keywords']:\n                    if keyword.lower() in symptom_text:\n                        return specialty\n        \n        return None\n    \n    def _request_specialty(self, session: Dict) -> Dict:\n        \"\"\"Request specialty selection with intelligent suggestions\"\"\"\n        session['state'] = ConversationState.COLLECTING_SPECIALTY\n        \n        # Create specialty list with descriptions\n        specialty_list = []\n        for specialty, info in self.specialty_routing.items():\n            specialty_list.append(f\"• **{specialty.title()}**: {info['description']}\")\n        \n        response_text = \"\\n\".join(self.response_templates['specialty_request']) + \"\\n\\n\" + \"\\n\".join(specialty_list[:5])\n        \n        return {\n            'response': response_text,\n            'type': 'specialty_selection',\n            'suggestions': list(self.specialty_routing.keys())[:5]\n        }\n    \n    def _request_doctor(self, session: Dict) -> Dict:\n        \"\"\"Request doctor selection\"\"\"\n        session['state'] = ConversationState.COLLECTING_DOCTOR\n        specialty = session['appointment_data']['specialty']\n        \n        # Get available doctors\n        doctors = self.db.get_available_doctors(specialty)\n        if not doctors:\n            return {\n                'response': f\"Sorry, we don't have doctors available for {specialty} right now. Please try another specialty.\",\n                'type': 'error'\n            }\n        \n        # Format doctor list\n        doctor_list = []\n        for doc in doctors[:3]:\n            days = ', '.join(doc['available_days'][:3])\n            doctor_list.append(f\"• **{doc['name']}** - Available: {days}\")\n        \n        response_text = self.response_templates['doctor_selection'][0].format(specialty=specialty) + \"\\n\\n\" + \"\\n\".join(doctor_list) + \"\\n\\n\" + self.response_templates['doctor_selection'][-1]\n        \n        return {\n            'response': response_text,\n            'type': 'doctor_selection',\n            'suggestions': [doc['name'] for doc in doctors[:3]]\n        }\n    \n    def _request_patient_name(self, session: Dict) -> Dict:\n        \"\"\"Request patient name\"\"\"\n        session['state'] = ConversationState.COLLECTING_PATIENT_INFO\n        \n        response_text = \"\\n\".join(self.response_templates['patient_info_request'])\n        \n        return {\n            'response': response_text,\n            'type': 'patient_info_collection',\n            'collecting': 'name'\n        }\n    \n    def _request_phone(self, session: Dict, user_input: str) -> Dict:\n        \"\"\"Request phone number\"\"\"\n        # Store the name\n        session['appointment_data']['patient_name'] = user_input.strip()\n        \n        response_text = \"\\n\".join(self.response_templates['phone_request'])\n        \n        return {\n            'response': response_text,\n            'type': 'patient_info_collection',\n            'collecting': 'phone'\n        }\n    \n    def _request_time(self, session: Dict, user_input: str) -> Dict:\n        \"\"\"Request appointment time\"\"\"\n        session['state'] = ConversationState.COLLECTING_DATE_TIME\n        \n        # Store phone number\n        session['appointment_data']['patient_phone'] = user_input.strip()\n        \n        # Get doctor's available times\n        appointment_data = session['appointment_data']\n        doctors = self.db.get_available_doctors(appointment_data['specialty'])\n        selected_doctor = next((d for d in doctors if d['name'] == appointment_data.get('doctor')), doctors[0] if doctors else None)\n        \n        if not selected_doctor:\n            return {\n                'response': \"Sorry, there was an error finding available times. Please try again.\",\n                'type': 'error'\n            }\n        \n        # Format time slots\n        time_slots = [f\"• {time}\" for time in selected_doctor['available_times'][:4]]\n        \n        response_text = self.response_templates['time_selection'][0].format(doctor=selected_doctor['name']) + \"\\n\\n\" + \"\\n\".join(time_slots) + \"\\n\\n\" + self.response_templates['time_selection'][-1]\n        \n        return {\n            'response': response_text,\n            'type': 'time_selection',\n            'suggestions': selected_doctor['available_times'][:4]\n        }\n    \n    def _confirm_appointment(self, session: Dict) -> Dict:\n        \"\"\"Confirm and book appointment\"\"\"\n        session['state'] = ConversationState.CONFIRMING_APPOINTMENT\n        appointment_data = session['appointment_data']\n        \n        # Book the appointment\n        booking_result = self.db.book_appointment({\n            'name': appointment_data.get('patient_name'),\n            'phone': appointment_data.get('patient_phone'),\n            'doctor': appointment_data.get('doctor'),\n            'specialty': appointment_data.get('specialty'),\n            'date': '2024-02-15',  # Mock date for demo\n            'time': appointment_data.get('time'),\n            'symptoms': appointment_data.get('symptoms', ''),\n            'urgency': 'normal'\n        })\n        \n        if booking_result['success']:\n            # Reset session\n            session['state'] = ConversationState.IDLE\n            session['appointment_data'] = {}\n            \n            # Format confirmation\n            response_text = \"\\n\".join(self.response_templates['appointment_confirmed']).format(\n                patient_name=appointment_data.get('patient_name'),\n                doctor_name=appointment_data.get('doctor'),\n                specialty=appointment_data.get('specialty'),\n                date='February 15, 2024',\n                time=appointment_data.get('time'),\n                appointment_id=booking_result['appointment_id']\n            )\n            \n            return {\n                'response': response_text,\n                'type': 'booking_confirmation',\n                'appointment_id': booking_result['appointment_id'],\n                'suggestions': ['Book another appointment', 'Check appointments', 'Clinic info']\n            }\n        else:\n            return {\n                'response': f\"❌ Sorry, there was an error booking your appointment: {booking_result.get('error')}. Please try again.\",\n                'type': 'booking_error'\n            }\n    \n    def _handle_info_request(self, session: Dict, user_input: str) -> Dict:\n        \"\"\"Handle information requests\"\"\"\n        session['state'] = ConversationState.PROVIDING_INFO\n        user_lower = user_input.lower()\n        \n        if any(word in user_lower for word in ['hours', 'time', 'open', 'close']):\n            return {\n                'response': \"🕒 **Clinic Hours:**\\n\\n• Monday - Friday: 8:00 AM - 6:00 PM\\n• Saturday: 9:00 AM - 4:00 PM\\n• Sunday: Closed\\n\\n📞 For emergencies outside hours, call 911\",\n                'type': 'hours_info'\n            }\n        elif any(word in user_lower for word in ['location', 'address', 'where']):\n            return {\n                'response': \"📍 **Clinic Location:**\\n\\n🏥 Medical Center Plaza\\n123 Healthcare Drive\\nWellness City, WC 12345\\n\\n🚗 Free parking available\\n🚌 Bus routes: 15, 22, 45\\n🚇 Metro: Health Station (Blue Line)\",\n                'type': 'location_info'\n            }\n        elif any(word in user_lower for word in ['phone', 'contact', 'call']):\n            return {\n                'response': \"📞 **Contact Information:**\\n\\n• Main Line: (555) 123-4567\\n• Appointments: (555) 123-APPT (2778)\\n• Emergency: 911\\n• After Hours: (555) 123-URGENT\\n\\n✉️ Email: appointments@medicalcenter.com\\n🌐 Website: www.medicalcenter.com\",\n                'type': 'contact_info'\n            }\n        else:\n            return {\n                'response': \"ℹ️ **Medical Center Information:**\\n\\n🏥 **Our Services:**\\n• 8 Medical Specialties\\n• 10+ Experienced Doctors\\n• Modern Diagnostic Equipment\\n• Same-day Appointments Available\\n\\n💳 **Insurance:** Most major plans accepted\\n🌟 **Rating:** 4.8/5 stars (1,200+ reviews)\\n\\nWhat specific information would you like?\",\n                'type': 'general_info',\n                'suggestions': ['Hours', 'Location', 'Phone', 'Specialties', 'Insurance']\n            }\n    \n    def _handle_check_appointment(self, session: Dict) -> Dict:\n        \"\"\"Handle appointment checking\"\"\"\n        session['state'] = ConversationState.CHECKING_APPOINTMENTS\n        \n        return {\n            'response': \"I can help you check your appointments! 📅\\n\\nTo look up your appointments, I'll need:\\n• Your full name\\n• Phone number used for booking\\n\\nWhat's your full name?\",\n            'type': 'appointment_lookup_start'\n        }\n    \n    def _handle_cancel_appointment(self, session: Dict) -> Dict:\n        \"\"\"Handle appointment cancellation\"\"\"\n        return {\n            'response': \"I can help you cancel or reschedule your appointment. 📅\\n\\nPlease provide:\\n• Your full name\\n• Phone number\\n• Appointment date (if known)\\n\\nNote: Cancellations must be made at least 24 hours in advance.\",\n            'type': 'cancellation_start'\n        }\n    \n    def _handle_fallback(self, session: Dict, user_input: str) -> Dict:\n        \"\"\"Handle unrecognized inputs\"\"\"\n        return {\n            'response': \"I'm not sure how to help with that request. 🤔\\n\\nI can assist you with:\\n• 📅 **Booking appointments** - Schedule with our medical specialists\\n• 🔍 **Checking appointments** - View your existing bookings\\n• ℹ️ **Clinic information** - Hours, location, contact details\\n• ❌ **Canceling/rescheduling** - Modify existing appointments\\n\\nWhat would you like to do?\",\n            'type': 'fallback',\n            'suggestions': ['Book appointment', 'Check appointments', 'Clinic hours', 'Location']\n        }\n    \n    def get_session_summary(self, session_id: str) -> Dict:\n        \"\"\"Get conversation session summary\"\"\"\n        if session_id not in self.sessions:\n            return {'error': 'Session not found'}\n        \n        session = self.sessions[session_id]\n        return {\n            'session_id': session_id,\n            'state': session['state'].value,\n            'conversation_length': len(session['conversation_history']),\n            'appointment_data': session['appointment_data'],\n            'created_at': session['created_at'],\n            'last_activity': session['last_activity']\n        }\n\nif __name__ == \"__main__\":\n    print(\"🧠 Medical Conversation Engine - Advanced Flow Management\")\n    print(\"Features: Emergency detection, intelligent routing, context awareness\")
\ No newline at end of file
+        ]:
+            return self._handle_booking_flow(session, nlp_result, user_input)
+        
+        # Handle cancellation
+        if intent == 'cancel_appointment':
+            return self._handle_cancel_appointment(session)
+        
+        # Default fallback
+        return self._handle_fallback(session, user_input)
+    
+    def _handle_greeting(self, session: Dict) -> Dict:
+        """Handle greeting and welcome"""
+        session['state'] = ConversationState.GREETING
+        
+        response_text = "\n".join(self.response_templates['greeting'])
+        
+        return {
+            'response': response_text,
+            'type': 'greeting',
+            'suggestions': ['Book appointment', 'Check appointments', 'Clinic hours', 'Location']
+        }
+    
+    def _handle_booking_flow(self, session: Dict, nlp_result: Dict, user_input: str) -> Dict:
+        """Handle complex appointment booking flow"""
+        entities = nlp_result['entities']
+        current_state = session['state']
+        appointment_data = session['appointment_data']
+        
+        # Extract entities and update appointment data
+        if entities['specialties']:
+            appointment_data['specialty'] = entities['specialties'][0]
+        if entities['doctors']:
+            appointment_data['doctor'] = entities['doctors'][0] 
+        if entities['symptoms']:
+            appointment_data['symptoms'] = ', '.join(entities['symptoms'])
+        
+        # Intelligent specialty detection
+        if 'specialty' not in appointment_data:
+            detected_specialty = self._detect_specialty_from_context(user_input, entities)
+            if detected_specialty:
+                appointment_data['specialty'] = detected_specialty
+        
+        # State machine for booking flow
+        if 'specialty' not in appointment_data:
+            return self._request_specialty(session)
+        elif 'doctor' not in appointment_data:
+            return self._request_doctor(session)
+        elif 'patient_name' not in appointment_data:
+            return self._request_patient_name(session)
+        elif 'patient_phone' not in appointment_data:
+            return self._request_phone(session, user_input)
+        elif 'time' not in appointment_data:
+            return self._request_time(session, user_input)
+        else:
+            return self._confirm_appointment(session)
+    
+    def _detect_specialty_from_context(self, user_input: str, entities: Dict) -> Optional[str]:
+        """Intelligently detect specialty from context"""
+        vocabulary = current_vocabulary(self.vocabulary)
+        user_lower = vocabulary.spelling.correct_text(user_input)
+        
+        # Check symptoms against specialties
+        for specialty, info in vocabulary.specialty_routing.items():
+            for keyword in info['keywords']:
+                if keyword.lower() in user_lower:
+                    return specialty
+        
+        # Check entities for clues
+        if entities['symptoms']:
+            symptom_text = ' '.join(entities['symptoms']).lower()
+            for specialty, info in vocabulary.specialty_routing.items():
+                for keyword in info['keywords']:
+                    if keyword.lower() in symptom_text:
+                        return specialty
+        
+        return None
+    
+    def _request_specialty(self, session: Dict) -> Dict:
+        """Request specialty selection with intelligent suggestions"""
+        session['state'] = ConversationState.COLLECTING_SPECIALTY
+        
+        # Create specialty list with descriptions
+        specialty_list = []
+        for specialty, info in self.specialty_routing.items():
+            specialty_list.append(f"• **{specialty.title()}**: {info['description']}")
+        
+        response_text = "\n".join(self.response_templates['specialty_request']) + "\n\n" + "\n".join(specialty_list[:5])
+        
+        return {
+            'response': response_text,
+            'type': 'specialty_selection',
+            'suggestions': list(self.specialty_routing.keys())[:5]
+        }
+    
+    def _request_doctor(self, session: Dict) -> Dict:
+        """Request doctor selection"""
+        session['state'] = ConversationState.COLLECTING_DOCTOR
+        specialty = session['appointment_data']['specialty']
+        
+        # Get available doctors
+        doctors = self.db.get_available_doctors(specialty)
+        if not doctors:
+            return {
+                'response': f"Sorry, we don't have doctors available for {specialty} right now. Please try another specialty.",
+                'type': 'error'
+            }
+        
+        # Format doctor list
+        doctor_list = []
+        for doc in doctors[:3]:
+            days = ', '.join(doc['available_days'][:3])
+            doctor_list.append(f"• **{doc['name']}** - Available: {days}")
+        
+        response_text = self.response_templates['doctor_selection'][0].format(specialty=specialty) + "\n\n" + "\n".join(doctor_list) + "\n\n" + self.response_templates['doctor_selection'][-1]
+        
+        return {
+            'response': response_text,
+            'type': 'doctor_selection',
+            'suggestions': [doc['name'] for doc in doctors[:3]]
+        }
+    
+    def _request_patient_name(self, session: Dict) -> Dict:
+        """Request patient name"""
+        session['state'] = ConversationState.COLLECTING_PATIENT_INFO
+        
+        response_text = "\n".join(self.response_templates['patient_info_request'])
+        
+        return {
+            'response': response_text,
+            'type': 'patient_info_collection',
+            'collecting': 'name'
+        }
+    
+    def _request_phone(self, session: Dict, user_input: str) -> Dict:
+        """Request phone number"""
+        # Store the name
+        session['appointment_data']['patient_name'] = user_input.strip()
+        
+        response_text = "\n".join(self.response_templates['phone_request'])
+        
+        return {
+            'response': response_text,
+            'type': 'patient_info_collection',
+            'collecting': 'phone'
+        }
+    
+    def _request_time(self, session: Dict, user_input: str) -> Dict:
+        """Request appointment time"""
+        session['state'] = ConversationState.COLLECTING_DATE_TIME
+        
+        # Store phone number
+        session['appointment_data']['patient_phone'] = user_input.strip()
+        
+        # Get doctor's available times
+        appointment_data = session['appointment_data']
+        doctors = self.db.get_available_doctors(appointment_data['specialty'])
+        selected_doctor = next((d for d in doctors if d['name'] == appointment_data.get('doctor')), doctors[0] if doctors else None)
+        
+        if not selected_doctor:
+            return {
+                'response': "Sorry, there was an error finding available times. Please try again.",
+                'type': 'error'
+            }
+        
+        # Format time slots
+        time_slots = [f"• {time}" for time in selected_doctor['available_times'][:4]]
+        
+        response_text = self.response_templates['time_selection'][0].format(doctor=selected_doctor['name']) + "\n\n" + "\n".join(time_slots) + "\n\n" + self.response_templates['time_selection'][-1]
+        
+        return {
+            'response': response_text,
+            'type': 'time_selection',
+            'suggestions': selected_doctor['available_times'][:4]
+        }
+    
+    def _confirm_appointment(self, session: Dict) -> Dict:
+        """Confirm and book appointment"""
+        session['state'] = ConversationState.CONFIRMING_APPOINTMENT
+        appointment_data = session['appointment_data']
+        
+        # Book the appointment
+        booking_result = self.db.book_appointment({
+            'name': appointment_data.get('patient_name'),
+            'phone': appointment_data.get('patient_phone'),
+            'doctor': appointment_data.get('doctor'),
+            'specialty': appointment_data.get('specialty'),
+            'date': '2024-02-15',  # Mock date for demo
+            'time': appointment_data.get('time'),
+            'symptoms': appointment_data.get('symptoms', ''),
+            'urgency': 'normal'
+        })
+        
+        if booking_result['success']:
+            # Reset session
+            session['state'] = ConversationState.IDLE
+            session['appointment_data'] = {}
+            
+            # Format confirmation
+            response_text = "\n".join(self.response_templates['appointment_confirmed']).format(
+                patient_name=appointment_data.get('patient_name'),
+                doctor_name=appointment_data.get('doctor'),
+                specialty=appointment_data.get('specialty'),
+                date='February 15, 2024',
+                time=appointment_data.get('time'),
+                appointment_id=booking_result['appointment_id']
+            )
+            
+            return {
+                'response': response_text,
+                'type': 'booking_confirmation',
+                'appointment_id': booking_result['appointment_id'],
+                'suggestions': ['Book another appointment', 'Check appointments', 'Clinic info']
+            }
+        else:
+            return {
+                'response': f"❌ Sorry, there was an error booking your appointment: {booking_result.get('error')}. Please try again.",
+                'type': 'booking_error'
+            }
+    
+    def _handle_info_request(self, session: Dict, user_input: str) -> Dict:
+        """Handle information requests"""
+        session['state'] = ConversationState.PROVIDING_INFO
+        user_lower = user_input.lower()
+        vocabulary = current_vocabulary(self.vocabulary)
+        clinic = vocabulary.clinic_constants
+        
+        if any(word in user_lower for word in ['hours', 'time', 'open', 'close']):
+            return {
+                'response': f"🕒 **{clinic['CLINIC_NAME']} Hours:**\n\n• Emergency Department: 24/7\n• Outpatient Services: Monday - Friday 8:00 AM - 6:00 PM\n• Visitor Hours: 7:00 AM - 9:00 PM daily\n\n📞 For emergencies, call 911",
+                'type': 'hours_info'
+            }
+        elif any(word in user_lower for word in ['location', 'address', 'where']):
+            return {
+                'response': f"📍 **{clinic['CLINIC_NAME']} Location:**\n\n🏥 {clinic['CLINIC_ADDRESS']}\n\n🚗 Free parking available for patients",
+                'type': 'location_info'
+            }
+        elif any(word in user_lower for word in ['phone', 'contact', 'call']):
+            return {
+                'response': f"📞 **Contact {clinic['CLINIC_NAME']}:**\n\n• Main Line: {clinic['CLINIC_PHONE']}\n• Appointments: {clinic['CLINIC_PHONE']}\n• Billing: {clinic['BILLING_PHONE']}\n• Insurance: {clinic['INSURANCE_PHONE']}\n• Emergency: 911",
+                'type': 'contact_info'
+            }
+        else:
+            return {
+                'response': f"ℹ️ **{clinic['CLINIC_NAME']} Information:**\n\n🏥 **Our Services:**\n• {len(vocabulary.specialties)} Medical Specialties\n• {len(vocabulary.doctors)} Experienced Doctors\n• 24/7 Emergency Care\n\n📍 {clinic['CLINIC_ADDRESS']}\n📞 {clinic['CLINIC_PHONE']}\n💳 **Insurance:** Most plans accepted\n\nWhat specific information would you like?",
+                'type': 'general_info',
+                'suggestions': ['Hours', 'Location', 'Phone', 'Specialties', 'Insurance']
+            }
+    
+    def _handle_check_appointment(self, session: Dict) -> Dict:
+        """Handle appointment checking"""
+        session['state'] = ConversationState.CHECKING_APPOINTMENTS
+        
+        return {
+            'response': "I can help you check your appointments! 📅\n\nTo look up your appointments, I'll need:\n• Your full name\n• Phone number used for booking\n\nWhat's your full name?",
+            'type': 'appointment_lookup_start'
+        }
+    
+    def _handle_cancel_appointment(self, session: Dict) -> Dict:
+        """Handle appointment cancellation"""
+        return {
+            'response': "I can help you cancel or reschedule your appointment. 📅\n\nPlease provide:\n• Your full name\n• Phone number\n• Appointment date (if known)\n\nNote: Cancellations must be made at least 24 hours in advance.",
+            'type': 'cancellation_start'
+        }
+    
+    def _handle_fallback(self, session: Dict, user_input: str) -> Dict:
+        """Handle unrecognized inputs"""
+        return {
+            'response': "I'm not sure how to help with that request. 🤔\n\nI can assist you with:\n• 📅 **Booking appointments** - Schedule with our medical specialists\n• 🔍 **Checking appointments** - View your existing bookings\n• ℹ️ **Clinic information** - Hours, location, contact details\n• ❌ **Canceling/rescheduling** - Modify existing appointments\n\nWhat would you like to do?",
+            'type': 'fallback',
+            'suggestions': ['Book appointment', 'Check appointments', 'Clinic hours', 'Location']
+        }
+    
+    def get_session_summary(self, session_id: str) -> Dict:
+        """Get conversation session summary"""
+        if session_id not in self.sessions:
+            return {'error': 'Session not found'}
+        
+        session = self.sessions[session_id]
+        return {
+            'session_id': session_id,
+            'state': session['state'].value,
+            'conversation_length': len(session['conversation_history']),
+            'appointment_data': session['appointment_data'],
+            'created_at': session['created_at'],
+            'last_activity': session['last_activity']
+        }
+
+if __name__ == "__main__":
+    print("🧠 Medical Conversation Engine - Advanced Flow Management")
+    print("Features: Emergency detection, intelligent routing, context awareness")
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Conversation Turn Log
+Append-only, anonymized store of user utterances and the intents they resolved to
+
+One JSON object per line. Readers resume from a byte offset, so a trainer
+only ever reads the turns appended since its last run; they keep the log's
+inode alongside (``stat``) to notice when it was rotated or truncated.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+# Personal data never reaches the log: these are replaced by placeholders
+EMAIL_PATTERN = re.compile(r'\b[\w.+-]+@[\w-]+\.[\w.-]+\b')
+PHONE_PATTERN = re.compile(r'(?:\+?\d[\d\s().-]{6,}\d)')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def anonymize(text: str) -> str:
+    """Redact emails, phone numbers and any remaining digits (ids, dates of birth)"""
+    text = EMAIL_PATTERN.sub('<email>', text)
+    text = PHONE_PATTERN.sub('<phone>', text)
+    return NUMBER_PATTERN.sub('<num>', text).strip()
+
+
+class ConversationLogStore:
+    def __init__(self, path: str):
+        """Open (or create) an append-only turn log"""
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, text: str, intent: str, confidence: float = 0.0, **fields) -> None:
+        """Append one anonymized user turn"""
+        record = {
+            'ts': round(time.time(), 3),
+            'text': anonymize(text),
+            'intent': intent,
+            'confidence': round(confidence, 4)
+        }
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        # One write per record in append mode: concurrent writers (threads or
+        # worker processes) never interleave within a line
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def read_from(self, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+        """Yield (record, offset after record) for complete lines from a byte offset on
+
+        An offset past the end of the file is stale (the log was truncated or
+        replaced by a smaller one), so reading starts over from the beginning.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            if offset > os.fstat(f.fileno()).st_size:
+                offset = 0
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # a record still being written; picked up next time
+                offset += len(line)
+                try:
+                    yield json.loads(line), offset
+                except ValueError:
+                    continue
+
+    def stat(self) -> Tuple[Optional[int], int]:
+        """(inode, size) of the log, (None, 0) when it does not exist yet"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None, 0
+        return st.st_ino, st.st_size
+
+    def size(self) -> int:
+        """Bytes in the log (the offset a fully caught-up reader would hold)"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,198 @@
+"""
+Training Corpus Deduplication
+Streaming exact + MinHash/LSH near-duplicate filter for synthetic training samples
+
+    python corpus_dedup.py training_samples.jsonl deduped.jsonl --threshold 0.7
+
+Samples are compared within their own intent. LSH bands only propose
+candidates; a sample is dropped when its MinHash estimate of Jaccard
+similarity with a candidate reaches the threshold. Memory grows with the
+number of samples *kept* (a 64-bit digest, one 64-bit key per LSH band and
+the packed MinHash signature), never with the text itself, and is capped:
+past ``max_entries`` kept samples per intent the oldest are forgotten, so a
+duplicate of a sample seen that long ago can slip through but memory stays
+bounded however long the stream is.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Mersenne prime for the universal hash family used by MinHash
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Entities that make a sample distinct even when the surrounding words match.
+# Each contributes several shingles so "see a heart doctor" and "see a skin
+# doctor" stay apart, while time/urgency decorations still count as noise.
+KEY_ENTITY_LABELS = ('specialty', 'doctor', 'condition')
+ENTITY_SHINGLE_COPIES = 4
+
+
+def _hash64(text: str) -> int:
+    """Process-independent 64-bit hash (str hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def normalize_text(text: str) -> str:
+    """Case/spacing/punctuation-insensitive form used for exact matching"""
+    return ' '.join(TOKEN_PATTERN.findall(text.lower()))
+
+
+def shingles(sample: Dict) -> List[int]:
+    """Hashed word unigrams and bigrams, plus weighted key-entity features"""
+    tokens = TOKEN_PATTERN.findall(sample['text'].lower())
+    features = set(tokens)
+    features.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    for entity in sample.get('entities', []):
+        if entity.get('entity') in KEY_ENTITY_LABELS:
+            features.update(
+                f"#{entity['entity']}={entity.get('value')}#{copy}" for copy in range(ENTITY_SHINGLE_COPIES)
+            )
+    return [_hash64(feature) for feature in features]
+
+
+def choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) with bands*rows <= num_perm whose LSH S-curve midpoint is closest to threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        error = abs(midpoint - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class CorpusDeduplicator:
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, seed: int = 1,
+                 max_entries: Optional[int] = 1000000):
+        """Exact and near-duplicate filter
+
+        ``threshold`` is the estimated Jaccard similarity (over shingles) at
+        which two samples of the same intent count as near duplicates. It
+        sets the LSH band layout, and every kept sample sharing a band with a
+        new one is compared with it by signature against the threshold.
+        ``max_entries`` caps the kept samples remembered per intent (None:
+        unbounded); the oldest are evicted first.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(self.bands * self.rows)
+        ]
+        self._exact = {}    # intent -> text digest -> (band keys, signature), oldest first
+        self._buckets = {}  # intent -> (band, band digest) -> digests of kept samples in that bucket
+        self.stats = {}     # intent -> counters
+
+    def signature(self, shingle_hashes: List[int]) -> List[int]:
+        """MinHash signature: the minimum of each permuted hash over the shingles"""
+        if not shingle_hashes:
+            return [0] * len(self._permutations)
+        return [
+            min((a * value + b) % MERSENNE_PRIME for value in shingle_hashes)
+            for a, b in self._permutations
+        ]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, int]]:
+        """One key per LSH band"""
+        rows = self.rows
+        return [
+            (band, _hash64(','.join(map(str, signature[band * rows:(band + 1) * rows]))))
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def estimate_jaccard(first: array, second: array) -> float:
+        """Share of equal MinHash values: an unbiased estimate of the shingle Jaccard similarity"""
+        return sum(a == b for a, b in zip(first, second)) / len(first) if first else 1.0
+
+    def check(self, sample: Dict) -> Optional[str]:
+        """Classify a sample as 'exact', 'near' or None (new); new samples are remembered"""
+        intent = sample.get('intent')
+        stats = self.stats.setdefault(intent, {'seen': 0, 'kept': 0, 'exact_duplicates': 0, 'near_duplicates': 0})
+        stats['seen'] += 1
+
+        digest = _hash64(normalize_text(sample['text']))
+        exact = self._exact.setdefault(intent, OrderedDict())
+        if digest in exact:
+            stats['exact_duplicates'] += 1
+            return 'exact'
+
+        buckets = self._buckets.setdefault(intent, {})
+        signature = array('Q', self.signature(shingles(sample)))
+        band_keys = self._band_keys(signature)
+        candidates = set()
+        for key in band_keys:
+            candidates.update(buckets.get(key, ()))
+        for candidate in candidates:
+            if self.estimate_jaccard(signature, exact[candidate][1]) >= self.threshold:
+                stats['near_duplicates'] += 1
+                return 'near'
+
+        exact[digest] = (band_keys, signature)
+        for key in band_keys:
+            buckets.setdefault(key, set()).add(digest)
+        if self.max_entries is not None and len(exact) > self.max_entries:
+            old_digest, (old_keys, _) = exact.popitem(last=False)
+            for key in old_keys:
+                bucket = buckets[key]
+                bucket.discard(old_digest)
+                if not bucket:
+                    del buckets[key]
+        stats['kept'] += 1
+        return None
+
+    def filter(self, samples: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield only the samples that are neither exact nor near duplicates"""
+        for sample in samples:
+            if self.check(sample) is None:
+                yield sample
+
+    def summary(self) -> Dict:
+        """Per-intent counters plus the share of each intent that was dropped"""
+        report = {}
+        for intent, stats in self.stats.items():
+            dropped = stats['seen'] - stats['kept']
+            report[intent] = dict(stats, dropped_pct=round(100 * dropped / stats['seen'], 2) if stats['seen'] else 0.0)
+        return report
+
+
+def dedup_jsonl(input_path: str, output_path: str, threshold: float = 0.7, num_perm: int = 64,
+                max_entries: Optional[int] = 1000000) -> Dict:
+    """Stream a JSON Lines corpus through the deduplicator; returns the per-intent summary"""
+    deduplicator = CorpusDeduplicator(threshold=threshold, num_perm=num_perm, max_entries=max_entries)
+    with open(input_path, 'r', encoding='utf-8') as source, open(output_path, 'w', encoding='utf-8') as out:
+        samples = (json.loads(line) for line in source if line.strip())
+        for sample in deduplicator.filter(samples):
+            out.write(json.dumps(sample, ensure_ascii=False))
+            out.write('\n')
+    return deduplicator.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drop exact and near-duplicate training samples")
+    parser.add_argument('input', help='JSON Lines samples (text, intent, entities)')
+    parser.add_argument('output')
+    parser.add_argument('--threshold', type=float, default=0.7, help='Jaccard similarity treated as duplicate')
+    parser.add_argument('--num-perm', type=int, default=64, help='MinHash permutations')
+    parser.add_argument('--max-entries', type=int, default=1000000,
+                        help='Kept samples remembered per intent (oldest forgotten first)')
+    args = parser.parse_args()
+
+    summary = dedup_jsonl(args.input, args.output, args.threshold, args.num_perm, args.max_entries)
+    print(f"🧹 Deduplicated {args.input} -> {args.output}")
+    for intent, stats in summary.items():
+        print(f"  {intent}: kept {stats['kept']}/{stats['seen']} "
+              f"(exact {stats['exact_duplicates']}, near {stats['near_duplicates']}, dropped {stats['dropped_pct']}%)")
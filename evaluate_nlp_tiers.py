@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+NLP Tier Evaluation
+Scores each NLP tier on accuracy, latency and memory and prints the Pareto frontier
+
+    python evaluate_nlp_tiers.py
+    python evaluate_nlp_tiers.py --log conversation_turns.jsonl --intent-model intent_model.json --bert
+    python evaluate_nlp_tiers.py --semantic-index medical_semantic_index --output tiers.json
+
+Tiers:
+    rules            keyword MedicalNLPPipeline (medical_chatbot.py), what every front end runs
+    rules+learned    rules, then the retrained naive Bayes intent model (--intent-model)
+    rules+semantic   rules, then embedding nearest neighbours (--semantic-index; numpy/torch)
+    bert             BioClinicalBERT MedicalNLPPipeline (medical_nlp_pipeline.py; --bert)
+
+Quality is measured on medical_training_data.json (intent accuracy, entity
+F1 over the annotated specialties/doctors/conditions), on held-out
+conversation-log turns (intent accuracy, --log) and on the emergency cases of
+MedicalTestRunner (emergency recall). Each tier is built and timed in its own
+process, so the memory it adds to a worker is measured without the others.
+Load time and memory run from an interpreter with no chatbot code imported
+to the tier's first answer, so they include the tier's imports, lazily
+loaded encoders and the index pages its first query reads.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from memory_accounting import current_rss_mb, peak_rss_mb
+
+TRAINING_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medical_training_data.json')
+
+TIERS = ('rules', 'rules+learned', 'rules+semantic', 'bert')
+
+# Training-data entity label -> key of the NLP entities dict
+ENTITY_KEYS = {'specialty': 'specialties', 'doctor': 'doctors', 'condition': 'symptoms'}
+
+# (metric, higher is better) compared when deciding Pareto dominance
+PARETO_OBJECTIVES = (
+    ('intent_accuracy', True),
+    ('entity_f1', True),
+    ('emergency_recall', True),
+    ('ms_per_utterance', False),
+    ('tier_rss_mb', False)
+)
+
+
+def load_training_samples(path: str = TRAINING_DATA_FILE) -> List[Dict]:
+    """(text, intent, entities) samples with entities as {(label, normalized value)}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        training_data = json.load(f)
+    samples = []
+    for intent in training_data['intents']:
+        for sample in intent['samples']:
+            samples.append({
+                'text': sample['text'],
+                'intent': sample.get('intent', intent.get('intent')),
+                'entities': sorted({(entity['entity'], _normalize_entity(entity['value']))
+                                    for entity in sample['entities'] if entity['entity'] in ENTITY_KEYS})
+            })
+    return samples
+
+
+def load_log_samples(path: str, limit: int = 5000) -> List[Dict]:
+    """Held-out conversation-log turns, filtered the way the intent trainer filters them"""
+    from conversation_log import ConversationLogStore
+    from intent_classifier import IntentModelTrainer
+
+    samples = []
+    for record, _ in ConversationLogStore(path).read_from(0):
+        if record.get('intent') in (None, 'unknown') or record.get('source') == 'learned':
+            continue
+        if record.get('confidence', 0.0) < IntentModelTrainer.MIN_LABEL_CONFIDENCE:
+            continue
+        samples.append({'text': record['text'], 'intent': record['intent']})
+        if len(samples) >= limit:
+            break
+    return samples
+
+
+def _normalize_entity(value: str) -> str:
+    value = value.lower().strip()
+    return value[3:].strip() if value.startswith('dr.') else value
+
+
+class NLPTier:
+    def __init__(self, name: str, intent_model_path: Optional[str] = None, semantic_index_prefix: Optional[str] = None):
+        """One deployable NLP configuration behind a common predict()
+
+        The fallback order and confidence thresholds are MedicalChatbot's, so
+        a tier scores what a chatbot configured that way would resolve.
+        """
+        from medical_chatbot import MedicalChatbot, MedicalNLPPipeline
+        from conversation_flows import MedicalConversationEngine
+
+        self.name = name
+        self.learned = self.semantic = self.bert = None
+        if name == 'bert':
+            from medical_nlp_pipeline import MedicalNLPPipeline as BertNLPPipeline
+            self.bert = BertNLPPipeline()
+            return
+
+        self.nlp = MedicalNLPPipeline()
+        self.engine = MedicalConversationEngine(None, self.nlp)
+        thresholds = MedicalChatbot(None, self.nlp)
+        self.min_learned_confidence = thresholds.MIN_LEARNED_INTENT_CONFIDENCE
+        self.min_semantic_confidence = thresholds.MIN_SEMANTIC_INTENT_CONFIDENCE
+        if name == 'rules+learned':
+            from intent_classifier import IncrementalIntentClassifier
+            self.learned = IncrementalIntentClassifier.load(intent_model_path)
+        elif name == 'rules+semantic':
+            from semantic_index import SemanticIndex
+            self.semantic = SemanticIndex(semantic_index_prefix)
+
+    def predict(self, text: str) -> Tuple[str, Dict, bool]:
+        """(intent, entities, is_emergency) for one utterance"""
+        if self.bert is not None:
+            result = self.bert.process_medical_query(text)
+            intent = next(iter(result['intent']))
+            return intent, result['entities'], intent == 'emergency' or result['medical_context']['is_emergency']
+
+        result = self.nlp.process_query(text)
+        intent = result['intent']
+        if intent == 'unknown' and self.learned is not None:
+            prediction = self.learned.predict(text)
+            if prediction['confidence'] >= self.min_learned_confidence:
+                intent = prediction['intent']
+        if intent == 'unknown' and self.semantic is not None:
+            prediction = self.semantic.classify_intent(text)
+            if prediction['confidence'] >= self.min_semantic_confidence:
+                intent = prediction['intent']
+        return intent, result['entities'], self.engine._is_emergency(result)
+
+
+def _predicted_entities(entities: Dict) -> set:
+    return {(label, _normalize_entity(value)) for label, key in ENTITY_KEYS.items() for value in entities.get(key, [])}
+
+
+def score_tier(tier: NLPTier, training: List[Dict], logs: List[Dict], emergencies: List[Tuple[str, bool]]) -> Dict:
+    """Intent accuracy, micro-averaged entity F1 and emergency recall"""
+    correct = true_positives = predicted_total = gold_total = 0
+    for sample in training:
+        intent, entities, _ = tier.predict(sample['text'])
+        correct += intent == sample['intent']
+        predicted = _predicted_entities(entities)
+        gold = set(sample['entities'])
+        true_positives += len(predicted & gold)
+        predicted_total += len(predicted)
+        gold_total += len(gold)
+    precision = true_positives / predicted_total if predicted_total else 0.0
+    recall = true_positives / gold_total if gold_total else 0.0
+
+    log_correct = sum(tier.predict(sample['text'])[0] == sample['intent'] for sample in logs)
+
+    detected = false_alarms = 0
+    for text, is_emergency in emergencies:
+        flagged = tier.predict(text)[2]
+        if is_emergency:
+            detected += flagged
+        else:
+            false_alarms += flagged
+    emergency_total = sum(1 for _, is_emergency in emergencies if is_emergency)
+
+    return {
+        'intent_accuracy': round(correct / len(training) * 100, 2) if training else 0.0,
+        'log_intent_accuracy': round(log_correct / len(logs) * 100, 2) if logs else None,
+        'entity_precision': round(precision * 100, 2),
+        'entity_recall': round(recall * 100, 2),
+        'entity_f1': round(2 * precision * recall / (precision + recall) * 100, 2) if precision + recall else 0.0,
+        'emergency_recall': round(detected / emergency_total * 100, 2) if emergency_total else 0.0,
+        'emergency_false_alarms': false_alarms
+    }
+
+
+def time_tier(tier: NLPTier, texts: List[str], min_time: float) -> Dict:
+    """Utterances per second over repeated passes lasting at least ``min_time``"""
+    for text in texts:
+        tier.predict(text)  # warm caches
+    passes = 0
+    started = time.perf_counter()
+    while True:
+        for text in texts:
+            tier.predict(text)
+        passes += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+    utterances = passes * len(texts)
+    return {
+        'utterances_per_sec': round(utterances / elapsed, 1),
+        'ms_per_utterance': round(elapsed / utterances * 1000, 4)
+    }
+
+
+def evaluate_tier(name: str, options: Dict, training: List[Dict], logs: List[Dict],
+                  emergencies: List[Tuple[str, bool]], min_time: float) -> Dict:
+    """Build one tier and score it (runs in a fresh worker process)"""
+    import contextlib
+    import io
+
+    rss_before = current_rss_mb()
+    # The pipelines print on every construction and query
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        tier = NLPTier(name, options.get('intent_model'), options.get('semantic_index'))
+        # Encoders load and mmapped vectors page in on the first query
+        tier.predict(training[0]['text'])
+        load_s = time.perf_counter() - started
+        rss_loaded = current_rss_mb()
+        report = score_tier(tier, training, logs, emergencies)
+        texts = [sample['text'] for sample in training] + [sample['text'] for sample in logs[:500]]
+        report.update(time_tier(tier, texts, min_time))
+    report.update({
+        'tier': name,
+        'load_s': round(load_s, 3),
+        'tier_rss_mb': round(max(rss_loaded - rss_before, 0.0), 2),
+        'worker_rss_mb': rss_loaded,
+        'peak_rss_mb': peak_rss_mb(),
+        'tier_peak_rss_mb': round(max(peak_rss_mb() - rss_before, 0.0), 2)
+    })
+    return report
+
+
+def available_tiers(options: Dict) -> List[str]:
+    """Tiers whose inputs were given (and, for bert, whose libraries import)"""
+    tiers = ['rules']
+    if options.get('intent_model'):
+        tiers.append('rules+learned')
+    if options.get('semantic_index'):
+        tiers.append('rules+semantic')
+    if options.get('bert'):
+        try:
+            import torch  # noqa: F401
+            import transformers  # noqa: F401
+            tiers.append('bert')
+        except ImportError as e:
+            print(f"⚠️ Skipping bert tier: {e}")
+    return tiers
+
+
+def run_evaluation(tiers: List[str], options: Dict, log_path: Optional[str] = None, min_time: float = 0.5) -> Dict:
+    """Evaluate every tier, each in its own spawned process"""
+    from medical_test_scenarios import MedicalTestRunner
+
+    training = load_training_samples()
+    logs = load_log_samples(log_path) if log_path else []
+    emergencies = list(MedicalTestRunner.EMERGENCY_CASES)
+    print(f"📚 {len(training)} training utterances, {len(logs)} held-out log turns, "
+          f"{len(emergencies)} emergency cases")
+
+    results = []
+    for name in tiers:
+        print(f"⏱️ Evaluating {name}...")
+        # A fresh interpreter per tier: its RSS growth is the tier's own
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            try:
+                results.append(executor.submit(evaluate_tier, name, options, training, logs,
+                                               emergencies, min_time).result())
+            except Exception as e:
+                print(f"❌ {name} failed: {type(e).__name__}: {e}")
+
+    frontier = pareto_frontier(results)
+    for report in results:
+        report['pareto'] = report['tier'] in frontier
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'training_utterances': len(training),
+        'log_turns': len(logs),
+        'emergency_cases': len(emergencies),
+        'tiers': results
+    }
+
+
+def _dominates(first: Dict, second: Dict) -> bool:
+    better_somewhere = False
+    for metric, higher_is_better in PARETO_OBJECTIVES:
+        a, b = first[metric], second[metric]
+        if a == b:
+            continue
+        if (a > b) != higher_is_better:
+            return False
+        better_somewhere = True
+    return better_somewhere
+
+
+def pareto_frontier(results: List[Dict]) -> List[str]:
+    """Tiers no other tier beats on every objective at once"""
+    return [report['tier'] for report in results
+            if not any(_dominates(other, report) for other in results if other is not report)]
+
+
+def print_pareto_table(results: List[Dict]) -> None:
+    print(f"\n{'':2}{'tier':<16}{'intent %':>9}{'log %':>8}{'entity F1':>10}{'emerg. recall':>14}"
+          f"{'ms/utt':>9}{'utt/s':>10}{'RSS +MB':>9}{'load s':>8}")
+    for report in sorted(results, key=lambda report: report['ms_per_utterance']):
+        marker = "★ " if report['pareto'] else "  "
+        log_accuracy = '-' if report['log_intent_accuracy'] is None else f"{report['log_intent_accuracy']:.1f}"
+        print(f"{marker}{report['tier']:<16}{report['intent_accuracy']:>9.1f}{log_accuracy:>8}"
+              f"{report['entity_f1']:>10.1f}{report['emergency_recall']:>14.1f}{report['ms_per_utterance']:>9.3f}"
+              f"{report['utterances_per_sec']:>10.0f}{report['tier_rss_mb']:>9.1f}{report['load_s']:>8.2f}")
+    print("★ = Pareto-optimal (no other tier is at least as good on every column and better on one)")
+
+
+def recommend_tiers(results: List[Dict], budgets_mb: List[float]) -> Dict[float, Optional[str]]:
+    """Most accurate Pareto tier whose added memory fits each per-worker budget"""
+    recommendations = {}
+    for budget in budgets_mb:
+        fitting = [report for report in results if report['pareto'] and report['tier_rss_mb'] <= budget]
+        best = max(fitting, key=lambda report: (report['intent_accuracy'], report['entity_f1'],
+                                                report['emergency_recall'], -report['ms_per_utterance']),
+                   default=None)
+        recommendations[budget] = best['tier'] if best else None
+    return recommendations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare NLP tiers on accuracy, latency and memory")
+    parser.add_argument('--tier', action='append', choices=TIERS, help='Only these tiers (repeatable)')
+    parser.add_argument('--log', help='Conversation log (JSONL) whose turns serve as held-out data')
+    parser.add_argument('--intent-model', help='Retrained intent model JSON for the rules+learned tier')
+    parser.add_argument('--semantic-index', help='Semantic index prefix for the rules+semantic tier')
+    parser.add_argument('--bert', action='store_true', help='Include the BioClinicalBERT pipeline')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds of timed passes per tier')
+    parser.add_argument('--budget-mb', type=float, action='append',
+                        help='Per-worker memory budgets to recommend a tier for (repeatable)')
+    parser.add_argument('--output', help='Write the results JSON here')
+    args = parser.parse_args()
+
+    options = {'intent_model': args.intent_model, 'semantic_index': args.semantic_index, 'bert': args.bert}
+    tiers = available_tiers(options)
+    if args.tier:
+        missing = [name for name in args.tier if name not in tiers]
+        if missing:
+            print(f"❌ Not available with these options: {', '.join(missing)}")
+            sys.exit(2)
+        tiers = args.tier
+
+    run = run_evaluation(tiers, options, args.log, args.min_time)
+    print_pareto_table(run['tiers'])
+
+    print("\n🎯 Tier per worker memory budget:")
+    for budget, tier in recommend_tiers(run['tiers'], args.budget_mb or [64, 512, 2048]).items():
+        print(f"• {budget:>6.0f} MB: {tier or 'none fits'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
@@ -0,0 +1,137 @@
+"""
+FAQ Retrieval Index for the Medical Chatbot
+BM25-scored inverted index over the hospital FAQ knowledge base
+"""
+
+import json
+import math
+import os
+import re
+import heapq
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+FAQ_KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hospital_faqs.json')
+
+# Function words that carry no retrieval signal. Question words such as
+# "where", "when" and "how" are kept: they separate location/hours/cost FAQs.
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'am', 'be', 'do', 'does', 'did', 'i', 'you', 'your',
+    'my', 'me', 'we', 'our', 'it', 'its', 'to', 'of', 'for', 'and', 'or', 'in', 'on',
+    'at', 'by', 'with', 'can', 'could', 'would', 'should', 'please', 'this', 'that',
+    'there', 'any', 'about', 'have', 'has', 'what', 'which', 'will'
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with stopwords removed and a light plural fold"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Okapi BM25 over an inverted index
+
+        Each posting stores its fully weighted term score (idf x saturated
+        tf), computed once at build time, so a query only sums the postings
+        of its own terms.
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> list of (doc_id, weight)
+        self.doc_count = 0
+
+    def build(self, documents: List[List[str]]) -> None:
+        """Index tokenized documents; doc ids are list positions"""
+        self.doc_count = len(documents)
+        if not documents:
+            self.postings = {}
+            return
+
+        avg_length = sum(len(doc) for doc in documents) / self.doc_count
+        term_docs = {}
+        for doc_id, tokens in enumerate(documents):
+            length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / avg_length)
+            for term, tf in Counter(tokens).items():
+                term_docs.setdefault(term, []).append((doc_id, tf * (self.k1 + 1) / (tf + length_norm)))
+
+        self.postings = {}
+        for term, docs in term_docs.items():
+            idf = math.log(1 + (self.doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[term] = [(doc_id, idf * tf_weight) for doc_id, tf_weight in docs]
+
+    def search(self, query_tokens: List[str], top_k: int = 3) -> List[Tuple[int, float]]:
+        """Return the top_k (doc_id, score) pairs for a tokenized query"""
+        scores = {}
+        for term in set(query_tokens):
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+class FAQIndex:
+    # Keywords are curated search terms, so they count double against free text
+    KEYWORD_WEIGHT = 2
+
+    def __init__(self, faqs: List[Dict], constants: Optional[Dict] = None):
+        """Build the FAQ index; ``constants`` fill {PLACEHOLDERS} in answers"""
+        constants = constants or {}
+        self.faqs = []
+        documents = []
+        for faq in faqs:
+            text = faq['answer'].format_map(constants)
+            # Answers use the chatbot's literal "\n" line-break markers
+            answer = text.replace('\n', '\\n')
+            entry = {
+                'id': faq['id'],
+                'category': faq.get('category', faq['id']),
+                'question': faq['question'],
+                'answer': answer,
+                'keywords': faq.get('keywords', [])
+            }
+            self.faqs.append(entry)
+
+            keyword_tokens = tokenize(' '.join(entry['keywords']))
+            documents.append(
+                tokenize(entry['question']) + keyword_tokens * self.KEYWORD_WEIGHT + tokenize(text)
+            )
+
+        self.bm25 = BM25Index()
+        self.bm25.build(documents)
+
+    @classmethod
+    def from_file(cls, path: str = FAQ_KNOWLEDGE_BASE, constants: Optional[Dict] = None) -> 'FAQIndex':
+        """Load and index a FAQ knowledge base file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['faqs'], constants)
+
+    def search(self, query: str, top_k: int = 3, min_score: float = 0.0) -> List[Dict]:
+        """Return up to top_k FAQ matches (best first), each with its BM25 score"""
+        matches = []
+        for doc_id, score in self.bm25.search(tokenize(query), top_k):
+            if score < min_score:
+                break
+            match = dict(self.faqs[doc_id])
+            match['score'] = round(score, 4)
+            matches.append(match)
+        return matches
+
+    def get(self, faq_id: str) -> Optional[Dict]:
+        """Look up a FAQ entry by id"""
+        for faq in self.faqs:
+            if faq['id'] == faq_id:
+                return faq
+        return None
+
+    def __len__(self) -> int:
+        return len(self.faqs)
@@ -0,0 +1,354 @@
+"""
+Per-Turn Instrumentation
+Monotonic-clock spans aggregated into latency histograms, exported as Prometheus text or OTLP spans
+
+Optional environment (read by configure_from_env):
+    CHATBOT_TRACING=1                       record span histograms
+    OTEL_EXPORTER_OTLP_ENDPOINT             also send every span to an OpenTelemetry collector
+                                            (e.g. http://localhost:4318; OTLP/HTTP JSON)
+    OTEL_SERVICE_NAME                       service.name on exported spans (default medical-chatbot)
+
+Tracing is off by default. While off, ``span()`` hands back one shared no-op
+object and ``traced`` functions call straight through, so instrumented code
+pays a single attribute check per call site.
+"""
+
+import collections
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels); the
+# last, implicit bucket is +Inf
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram') -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if it is the overflow bucket)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'start_ns', 'start_unix_ns', 'error', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = self.span_id = self.parent_id = None
+        self.error = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if self.tracer.exporter is not None:
+            # Ids are only needed for exported spans
+            self.trace_id = parent.trace_id if parent is not None and parent.trace_id else os.urandom(16).hex()
+            self.parent_id = parent.span_id if parent is not None else None
+            self.span_id = os.urandom(8).hex()
+        self._token = _current_span.set(self)
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self, duration_ns)
+        return False
+
+    def to_otlp(self, duration_ns: int) -> Dict:
+        """OTLP/JSON span (timestamps are wall-clock start plus the monotonic duration)"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_unix_ns),
+            'endTimeUnixNano': str(self.start_unix_ns + duration_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        """Span recorder; histograms are kept per thread and merged when read
+
+        Recording a span touches only the calling thread's histograms, so
+        worker threads never contend on a lock; the lock guards registering
+        a new thread and nothing else. Histograms of threads that have
+        exited are folded into one retired set.
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self.exporter = None
+        self._local = threading.local()
+        self._thread_histograms = []  # (thread, its histograms) for every thread that recorded
+        self._retired = {}            # span name -> histogram of threads that have exited
+        self._register_lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        """Context manager timing one operation (nested spans become children)"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def traced(self, name: str):
+        """Decorator wrapping every call of a function in a span"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _histograms(self) -> Dict[str, Histogram]:
+        histograms = getattr(self._local, 'histograms', None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+            with self._register_lock:
+                self._retire_dead_threads()
+                self._thread_histograms.append((threading.current_thread(), histograms))
+        return histograms
+
+    def _retire_dead_threads(self) -> None:
+        """Fold the histograms of exited threads into the retired set (caller holds the lock)"""
+        live = []
+        for thread, histograms in self._thread_histograms:
+            if thread.is_alive():
+                live.append((thread, histograms))
+                continue
+            for name, histogram in histograms.items():
+                self._retired.setdefault(name, Histogram(self.buckets)).merge(histogram)
+        self._thread_histograms = live
+
+    def _finish(self, span: Span, duration_ns: int) -> None:
+        histograms = self._histograms()
+        histogram = histograms.get(span.name)
+        if histogram is None:
+            histogram = histograms[span.name] = Histogram(self.buckets)
+        histogram.observe(duration_ns / 1e9)
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.submit(span.to_otlp(duration_ns))
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        """Histograms of all threads merged per span name"""
+        with self._register_lock:
+            self._retire_dead_threads()
+            per_thread = [histograms for _, histograms in self._thread_histograms]
+            merged = {}
+            for name, histogram in self._retired.items():
+                merged.setdefault(name, Histogram(self.buckets)).merge(histogram)
+        for histograms in per_thread:
+            for name, histogram in list(histograms.items()):
+                merged.setdefault(name, Histogram(self.buckets)).merge(histogram)
+        return merged
+
+    def reset(self) -> None:
+        """Forget everything recorded so far"""
+        with self._register_lock:
+            self._retired.clear()
+            for _, histograms in self._thread_histograms:
+                histograms.clear()
+
+    def summary(self) -> List[Dict]:
+        """Per-span count, mean and bucketed p50/p99, slowest p99 first"""
+        rows = []
+        for name, histogram in self.snapshot().items():
+            rows.append({
+                'span': name,
+                'count': histogram.count,
+                'mean_ms': round(histogram.total / histogram.count * 1000, 3) if histogram.count else 0.0,
+                'p50_le_ms': histogram.quantile(0.5) * 1000,
+                'p99_le_ms': histogram.quantile(0.99) * 1000
+            })
+        return sorted(rows, key=lambda row: (row['p99_le_ms'], row['mean_ms']), reverse=True)
+
+    def prometheus_text(self, metric: str = 'chatbot_span_duration_seconds') -> str:
+        """Span histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {metric} Time spent in each instrumented stage of a chatbot turn",
+            f"# TYPE {metric} histogram"
+        ]
+        for name, histogram in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {histogram.total:.9f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+class OTLPSpanExporter:
+    def __init__(self, endpoint: str, service_name: str = 'medical-chatbot', max_queue: int = 4096,
+                 batch_size: int = 256, interval: float = 5.0, timeout: float = 2.0):
+        """Ship finished spans to an OpenTelemetry collector (OTLP/HTTP, JSON encoding)
+
+        Spans are queued and posted in batches from a daemon thread; when the
+        collector is slow or down the oldest queued spans are dropped rather
+        than holding up chatbot turns.
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.exported = 0
+        self.failed = 0
+        self._queue = collections.deque(maxlen=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, span: Dict) -> None:
+        self._queue.append(span)
+
+    def flush(self) -> int:
+        """Post everything queued now; returns how many spans were sent"""
+        sent = 0
+        while self._queue:
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            if self._post(batch):
+                sent += len(batch)
+        return sent
+
+    def _post(self, spans: List[Dict]) -> bool:
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{'scope': {'name': 'medical_chatbot'}, 'spans': spans}]
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except OSError as e:
+            if not self.failed:
+                print(f"⚠️ Span export to {self.endpoint} failed: {e}")
+            self.failed += len(spans)
+            return False
+        self.exported += len(spans)
+        return True
+
+    def start(self) -> 'OTLPSpanExporter':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='otlp-span-exporter', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread after a final flush"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+# Process-wide tracer used by the chatbot modules
+tracer = Tracer()
+traced = tracer.traced
+
+
+def configure_from_env(environ=None) -> Tracer:
+    """Enable tracing and span export as the environment asks (see the module docstring)"""
+    environ = os.environ if environ is None else environ
+    if environ.get('CHATBOT_TRACING', '').lower() in ('1', 'true', 'yes'):
+        tracer.enabled = True
+    endpoint = environ.get('OTEL_EXPORTER_OTLP_TRACES_ENDPOINT')
+    if not endpoint and environ.get('OTEL_EXPORTER_OTLP_ENDPOINT'):
+        endpoint = environ['OTEL_EXPORTER_OTLP_ENDPOINT'].rstrip('/') + '/v1/traces'
+    if endpoint and tracer.exporter is None:
+        tracer.enabled = True
+        tracer.exporter = OTLPSpanExporter(endpoint, environ.get('OTEL_SERVICE_NAME', 'medical-chatbot')).start()
+    return tracer
@@ -0,0 +1,287 @@
+"""
+Incremental Intent Classifier
+Multinomial naive Bayes over word n-grams, updated in place from logged conversations
+
+The model is a table of counts, so new turns are folded in with
+``partial_fit`` (warm start) instead of retraining on the full corpus. The
+same counts give a per-intent keyword index (``keywords``).
+
+    python intent_classifier.py train --log conversation_turns.jsonl --model intent_model.json
+    python intent_classifier.py train --log conversation_turns.jsonl --model intent_model.json --watch 300
+    python intent_classifier.py predict --model intent_model.json "can I see a heart doctor"
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from conversation_log import ConversationLogStore
+from faq_index import tokenize
+
+MODEL_FORMAT_VERSION = 1
+
+# Features kept per model; the rarest are evicted past this, so a model fed
+# from an endless conversation log stays the same size
+DEFAULT_MAX_FEATURES = 100000
+
+
+def intent_features(text: str) -> List[str]:
+    """Unigrams plus bigrams of the stopword-filtered tokens"""
+    tokens = tokenize(text)
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+class IncrementalIntentClassifier:
+    # Pruning evicts down to this share of max_features, so it runs once per
+    # many updates rather than on every new feature
+    PRUNE_TO = 0.9
+
+    def __init__(self, alpha: float = 0.5, max_features: Optional[int] = DEFAULT_MAX_FEATURES):
+        """Empty model; ``alpha`` is the additive (Lidstone) smoothing
+
+        ``max_features`` bounds the vocabulary (None: unbounded); when it is
+        exceeded the features with the lowest total counts are evicted.
+        """
+        self.alpha = alpha
+        self.max_features = max_features
+        self.intent_counts = Counter()   # intent -> samples
+        self.feature_counts = {}         # intent -> Counter(feature -> count)
+        self.feature_totals = Counter()  # intent -> total feature count
+        self.vocabulary = set()
+        self.version = 0
+        self.log_offset = 0              # conversation log bytes already folded in
+        self.log_inode = None            # ... of the log file with this inode
+
+    def partial_fit(self, samples: Iterable[Tuple[str, str]]) -> int:
+        """Fold (text, intent) pairs into the counts; returns how many were used"""
+        used = 0
+        for text, intent in samples:
+            features = intent_features(text)
+            if not features:
+                continue
+            counts = self.feature_counts.setdefault(intent, Counter())
+            counts.update(features)
+            self.feature_totals[intent] += len(features)
+            self.intent_counts[intent] += 1
+            self.vocabulary.update(features)
+            used += 1
+            if self.max_features is not None and len(self.vocabulary) > self.max_features:
+                self.prune(int(self.max_features * self.PRUNE_TO))
+        return used
+
+    def prune(self, keep: int) -> int:
+        """Evict all but the ``keep`` most frequent features; returns how many were evicted"""
+        totals = Counter()
+        for counts in self.feature_counts.values():
+            totals.update(counts)
+        if len(totals) <= keep:
+            return 0
+        evicted = [feature for feature, _ in totals.most_common()[keep:]]
+        for intent, counts in self.feature_counts.items():
+            for feature in evicted:
+                count = counts.pop(feature, 0)
+                self.feature_totals[intent] -= count
+        self.vocabulary.difference_update(evicted)
+        return len(evicted)
+
+    def predict(self, text: str) -> Dict:
+        """Most likely intent with its posterior probability as confidence"""
+        features = intent_features(text)
+        if not features or not self.intent_counts:
+            return {'intent': 'unknown', 'confidence': 0.0}
+
+        total_samples = sum(self.intent_counts.values())
+        vocabulary_size = len(self.vocabulary)
+        log_scores = {}
+        for intent, sample_count in self.intent_counts.items():
+            counts = self.feature_counts[intent]
+            denominator = self.feature_totals[intent] + self.alpha * vocabulary_size
+            score = math.log(sample_count / total_samples)
+            for feature in features:
+                score += math.log((counts.get(feature, 0) + self.alpha) / denominator)
+            log_scores[intent] = score
+
+        best_intent = max(log_scores, key=log_scores.get)
+        best = log_scores[best_intent]
+        normalizer = sum(math.exp(score - best) for score in log_scores.values())
+        return {'intent': best_intent, 'confidence': round(1 / normalizer, 4)}
+
+    def keywords(self, intent: str, top_n: int = 10) -> List[str]:
+        """Features most indicative of an intent (smoothed log-odds against the other intents)"""
+        counts = self.feature_counts.get(intent)
+        if not counts:
+            return []
+        other_total = sum(total for name, total in self.feature_totals.items() if name != intent)
+        vocabulary_size = len(self.vocabulary)
+
+        def log_odds(feature):
+            inside = (counts[feature] + self.alpha) / (self.feature_totals[intent] + self.alpha * vocabulary_size)
+            outside_count = sum(other.get(feature, 0) for name, other in self.feature_counts.items() if name != intent)
+            outside = (outside_count + self.alpha) / (other_total + self.alpha * vocabulary_size)
+            return math.log(inside / outside)
+
+        return sorted(counts, key=log_odds, reverse=True)[:top_n]
+
+    def to_dict(self) -> Dict:
+        return {
+            'format': MODEL_FORMAT_VERSION,
+            'alpha': self.alpha,
+            'max_features': self.max_features,
+            'version': self.version,
+            'log_offset': self.log_offset,
+            'log_inode': self.log_inode,
+            'intent_counts': dict(self.intent_counts),
+            'feature_counts': {intent: dict(counts) for intent, counts in self.feature_counts.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'IncrementalIntentClassifier':
+        if data.get('format') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported intent model format: {data.get('format')!r}")
+        model = cls(alpha=data['alpha'], max_features=data.get('max_features', DEFAULT_MAX_FEATURES))
+        model.version = data['version']
+        model.log_offset = data['log_offset']
+        model.log_inode = data.get('log_inode')
+        model.intent_counts = Counter(data['intent_counts'])
+        for intent, counts in data['feature_counts'].items():
+            model.feature_counts[intent] = Counter(counts)
+            model.feature_totals[intent] = sum(counts.values())
+            model.vocabulary.update(counts)
+        return model
+
+    def save(self, path: str) -> None:
+        """Write the model atomically: readers see the old file or the new one, never a partial write"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.intent_model_', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'IncrementalIntentClassifier':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class IntentModelTrainer:
+    # Logged turns below this intent confidence are too noisy to learn from
+    MIN_LABEL_CONFIDENCE = 0.3
+
+    def __init__(self, log_store: ConversationLogStore, model_path: str,
+                 seed_training_path: Optional[str] = None, interval: float = 300.0):
+        """Background job folding new conversation-log turns into the on-disk model
+
+        Starts from the existing model file when there is one; otherwise from
+        ``seed_training_path`` (a generate_training_data() JSON file) or empty.
+        """
+        self.log_store = log_store
+        self.model_path = model_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+        if os.path.exists(model_path):
+            self.model = IncrementalIntentClassifier.load(model_path)
+        else:
+            self.model = IncrementalIntentClassifier()
+            if seed_training_path:
+                with open(seed_training_path, 'r', encoding='utf-8') as f:
+                    training_data = json.load(f)
+                self.model.partial_fit(
+                    (sample['text'], intent['name'])
+                    for intent in training_data['intents']
+                    for sample in intent['samples']
+                )
+
+    def _labelled_turns(self, records: Iterable[Tuple[Dict, int]]):
+        """Usable (text, intent) pairs, tracking the log offset as records are consumed"""
+        for record, offset in records:
+            self.model.log_offset = offset
+            if record.get('intent') in (None, 'unknown'):
+                continue
+            # Labels this model produced itself would only reinforce its mistakes
+            if record.get('source') == 'learned':
+                continue
+            if record.get('confidence', 0.0) < self.MIN_LABEL_CONFIDENCE:
+                continue
+            yield record['text'], record['intent']
+
+    def run_once(self) -> int:
+        """Fold in turns logged since the last run and publish a new model version"""
+        inode, size = self.log_store.stat()
+        rotated = self.model.log_inode is not None and inode is not None and inode != self.model.log_inode
+        if rotated or size < self.model.log_offset:
+            # A rotated or truncated log holds only turns this model has not seen
+            self.model.log_offset = 0
+        if inode is not None:
+            self.model.log_inode = inode
+        if size <= self.model.log_offset and os.path.exists(self.model_path):
+            return 0
+        added = self.model.partial_fit(self._labelled_turns(self.log_store.read_from(self.model.log_offset)))
+        self.model.version += 1
+        self.model.save(self.model_path)
+        return added
+
+    def start(self) -> 'IntentModelTrainer':
+        """Run ``run_once`` every ``interval`` seconds on a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='intent-model-trainer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while True:
+            try:
+                added = self.run_once()
+                if added:
+                    print(f"🧠 Intent model v{self.model.version}: +{added} turns")
+            except Exception as e:
+                print(f"⚠️ Intent model update failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally train or query the intent model")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train', help='Fold new logged turns into the model')
+    train_parser.add_argument('--log', default='conversation_turns.jsonl')
+    train_parser.add_argument('--model', default='intent_model.json')
+    train_parser.add_argument('--seed', help='Training data JSON used when no model exists yet')
+    train_parser.add_argument('--watch', type=float, help='Keep running, updating every N seconds')
+
+    predict_parser = subparsers.add_parser('predict', help='Classify one utterance')
+    predict_parser.add_argument('--model', default='intent_model.json')
+    predict_parser.add_argument('text')
+
+    args = parser.parse_args()
+    if args.command == 'train':
+        trainer = IntentModelTrainer(ConversationLogStore(args.log), args.model, args.seed, args.watch or 300.0)
+        if args.watch:
+            trainer.start()
+            try:
+                trainer._thread.join()
+            except KeyboardInterrupt:
+                trainer.stop()
+        else:
+            added = trainer.run_once()
+            print(f"✅ Intent model v{trainer.model.version} saved to {args.model} (+{added} turns)")
+    else:
+        model = IncrementalIntentClassifier.load(args.model)
+        print(model.predict(args.text))
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Patient Traffic Load Generator
+Simulated patients drive a running chat API with Markov-model conversations, think time and ramp-up stages
+
+    python chat_api.py &
+    python load_generator.py --url http://127.0.0.1:8000 --stage 60:200 --stage 300:2000 --stage 60:0
+    python load_generator.py --transport ws --stage 30:50 --output load_report.json
+
+Each stage is DURATION:PATIENTS; the number of concurrent patients moves
+linearly to PATIENTS over DURATION seconds. A patient opens one keep-alive
+connection, walks the conversation model from ``start`` to ``end`` with a
+log-normal pause between messages, and is replaced by a new patient while
+the schedule still calls for one.
+
+Utterances come from the intents and entities in medical_training_data.json.
+Transitions default to TRANSITIONS below; step sequences listed in its
+``conversation_patterns`` (e.g. {"steps": ["greeting", "get_info"]}) replace
+the default rows for the steps they cover. An https:// URL is driven over
+TLS, with the certificate verified against the system trust store.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import ssl
+import struct
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from benchmark_conversations import latency_summary
+
+TRAINING_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medical_training_data.json')
+
+# Patient step -> next step probabilities ('start' and 'end' are not sent)
+TRANSITIONS = {
+    'start': {'greeting': 0.35, 'book_appointment': 0.30, 'get_info': 0.20,
+              'check_appointment': 0.07, 'cancel_appointment': 0.05, 'emergency': 0.03},
+    'greeting': {'book_appointment': 0.55, 'get_info': 0.30, 'check_appointment': 0.10, 'end': 0.05},
+    'book_appointment': {'specialty': 0.90, 'get_info': 0.05, 'end': 0.05},
+    'specialty': {'doctor': 0.85, 'specialty': 0.10, 'end': 0.05},
+    'doctor': {'patient_name': 0.90, 'doctor': 0.05, 'end': 0.05},
+    'patient_name': {'phone': 0.95, 'end': 0.05},
+    'phone': {'time': 0.95, 'end': 0.05},
+    'time': {'end': 0.60, 'get_info': 0.25, 'book_appointment': 0.15},
+    'get_info': {'get_info': 0.35, 'book_appointment': 0.25, 'end': 0.40},
+    'check_appointment': {'lookup_name': 0.80, 'end': 0.20},
+    'cancel_appointment': {'lookup_name': 0.70, 'end': 0.30},
+    'lookup_name': {'end': 0.70, 'book_appointment': 0.30},
+    'emergency': {'end': 0.80, 'emergency': 0.20}
+}
+
+GREETINGS = ["Hello", "Hi", "Good morning", "Hi, I need some help", "Hey there"]
+EMERGENCIES = [
+    "I'm having a heart attack, emergency!",
+    "Severe chest pain and I can't breathe",
+    "My father collapsed, it's an emergency",
+    "Severe bleeding that won't stop, urgent"
+]
+FIRST_NAMES = ["Maria", "John", "Ana", "Luis", "Sarah", "David", "Carmen", "James", "Sofia", "Miguel"]
+LAST_NAMES = ["Smith", "Garcia", "Johnson", "Hernandez", "Brown", "Perez", "Davis", "Diaz", "Wilson", "Reyes"]
+CLOCK_TIMES = ["9:00 AM", "10:00", "10:30 AM", "2:00 PM", "3:30 PM", "16:00"]
+
+# Hard cap so an unlucky walk through retry loops still ends
+MAX_TURNS = 30
+
+
+class ConversationModel:
+    def __init__(self, transitions: Dict[str, Dict[str, float]], utterances: Dict[str, List[str]]):
+        """Markov chain over patient steps plus the phrases each step can send"""
+        self.transitions = {
+            step: (list(row), list(row.values())) for step, row in transitions.items()
+        }
+        self.utterances = utterances
+
+    @classmethod
+    def from_training_data(cls, path: str = TRAINING_DATA_FILE) -> 'ConversationModel':
+        with open(path, 'r', encoding='utf-8') as f:
+            training_data = json.load(f)
+
+        utterances = {
+            intent['name']: [sample['text'] for sample in intent['samples']]
+            for intent in training_data['intents']
+        }
+        entities = training_data.get('entities', {})
+        specialties = entities.get('specialties', {})
+        utterances['specialty'] = [
+            synonym for synonyms in specialties.get('synonyms', {}).values() for synonym in synonyms
+        ] or list(specialties.get('values', []))
+        utterances['doctor'] = list(entities.get('doctors', {}).get('values', [])) or ["Dr. Garcia"]
+        utterances['time'] = CLOCK_TIMES + list(entities.get('time_expressions', {}).get('values', []))
+        utterances['greeting'] = GREETINGS
+        utterances['emergency'] = EMERGENCIES
+
+        transitions = {step: dict(row) for step, row in TRANSITIONS.items()}
+        transitions.update(cls._pattern_transitions(training_data.get('conversation_patterns') or []))
+        return cls(transitions, utterances)
+
+    @staticmethod
+    def _pattern_transitions(patterns: List) -> Dict[str, Dict[str, float]]:
+        """Maximum-likelihood transition rows from observed step sequences"""
+        counts = {}
+        for pattern in patterns:
+            steps = pattern.get('steps', []) if isinstance(pattern, dict) else pattern
+            path = ['start'] + list(steps) + ['end']
+            for current, following in zip(path, path[1:]):
+                counts.setdefault(current, Counter())[following] += 1
+        return {
+            step: {following: count / sum(row.values()) for following, count in row.items()}
+            for step, row in counts.items()
+        }
+
+    def message(self, step: str, rng: random.Random) -> str:
+        if step in ('patient_name', 'lookup_name'):
+            return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if step == 'phone':
+            return f"+1-{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+        return rng.choice(self.utterances.get(step) or GREETINGS)
+
+    def conversation(self, rng: random.Random) -> Iterator[Tuple[str, str]]:
+        """Yield (step, message) pairs for one simulated patient"""
+        step = 'start'
+        for _ in range(MAX_TURNS):
+            choices, weights = self.transitions.get(step, (['end'], [1.0]))
+            step = rng.choices(choices, weights)[0]
+            if step == 'end':
+                return
+            yield step, self.message(step, rng)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class HTTPChatClient:
+    def __init__(self, host: str, port: int, ssl_context: Optional[ssl.SSLContext] = None):
+        """One keep-alive HTTP/1.1 connection to the chat API (TLS when ``ssl_context`` is set)"""
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self._reader = None
+        self._writer = None
+
+    async def send(self, session_id: str, message: str) -> Tuple[int, Optional[float]]:
+        """POST one message; returns (status, server-side ms)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port,
+                                                                       ssl=self.ssl_context)
+        body = json.dumps({'message': message}).encode('utf-8')
+        head = (
+            f"POST /sessions/{session_id}/messages HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode('ascii')
+        self._writer.write(head + body)
+        await self._writer.drain()
+
+        raw_head = await self._reader.readuntil(b'\r\n\r\n')
+        lines = raw_head.decode('latin-1').split('\r\n')
+        try:
+            status = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            raise ProtocolError(f"bad status line {lines[0]!r}")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        await self._reader.readexactly(int(headers.get('content-length', '0')))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        server_ms = headers.get('x-response-time-ms')
+        return status, float(server_ms) if server_ms else None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+
+class WebSocketChatClient:
+    def __init__(self, host: str, port: int, ssl_context: Optional[ssl.SSLContext] = None):
+        """One websocket per patient (the chat API's /sessions/{id}/ws route)"""
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self, session_id: str):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port,
+                                                                   ssl=self.ssl_context)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        self._writer.write((
+            f"GET /sessions/{session_id}/ws HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode('ascii'))
+        await self._writer.drain()
+        status_line = (await self._reader.readuntil(b'\r\n\r\n')).split(b'\r\n', 1)[0]
+        if b' 101 ' not in status_line:
+            raise ProtocolError(f"websocket upgrade refused: {status_line!r}")
+
+    def _frame(self, opcode: int, payload: bytes) -> bytes:
+        """Client frames are always masked (RFC 6455)"""
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return header + mask + masked
+
+    async def _read_frame(self) -> Tuple[int, bytes]:
+        first, second = await self._reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await self._reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await self._reader.readexactly(8))[0]
+        return first & 0x0F, await self._reader.readexactly(length)
+
+    async def send(self, session_id: str, message: str) -> Tuple[int, Optional[float]]:
+        """Send one text frame and wait for the turn's reply frame"""
+        if self._writer is None:
+            await self._connect(session_id)
+        self._writer.write(self._frame(0x1, json.dumps({'message': message}).encode('utf-8')))
+        await self._writer.drain()
+        while True:
+            opcode, payload = await self._read_frame()
+            if opcode == 0x9:  # ping
+                self._writer.write(self._frame(0xA, payload))
+                await self._writer.drain()
+            elif opcode == 0x8:
+                raise ProtocolError("server closed the websocket")
+            elif opcode == 0x1:
+                reply = json.loads(payload)
+                return (500 if reply.get('type') == 'error' else 200), reply.get('elapsed_ms')
+
+    async def close(self):
+        if self._writer is not None:
+            try:
+                self._writer.write(self._frame(0x8, struct.pack('!H', 1000)))
+                self._writer.close()
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+
+class LoadStats:
+    def __init__(self, window: float = 10.0):
+        """Latencies per step, error counts and a per-window timeline"""
+        self.window = window
+        self.started = time.monotonic()
+        self.latencies = {}
+        self.server_latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.conversations = Counter()
+        self.timeline = {}
+
+    def _window(self) -> Dict:
+        index = int((time.monotonic() - self.started) // self.window)
+        return self.timeline.setdefault(index, {'requests': 0, 'errors': 0, 'latencies': [], 'patients': 0})
+
+    def record(self, step: str, latency: float, status: int, server_ms: Optional[float]):
+        self.latencies.setdefault(step, []).append(latency)
+        self.statuses[status] += 1
+        window = self._window()
+        window['requests'] += 1
+        window['latencies'].append(latency)
+        if status >= 400:
+            self.errors[f"http_{status}"] += 1
+            window['errors'] += 1
+        if server_ms is not None:
+            self.server_latencies.append(server_ms / 1000)
+
+    def error(self, kind: str):
+        self.errors[kind] += 1
+        self._window()['errors'] += 1
+
+    def report(self, active_patients: List[Tuple[float, int]]) -> Dict:
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        elapsed = time.monotonic() - self.started
+        requests = sum(self.statuses.values())
+        failures = sum(self.errors.values())
+        # Timeouts and connection errors never got a status, so they add to the attempts
+        attempts = requests + sum(count for kind, count in self.errors.items() if not kind.startswith('http_'))
+        return {
+            'duration_s': round(elapsed, 2),
+            'requests': requests,
+            'requests_per_sec': round(requests / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(failures / attempts, 4) if attempts else 0.0,
+            'errors': dict(self.errors),
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'conversations': dict(self.conversations),
+            'latency': latency_summary(all_latencies),
+            'server_latency': latency_summary(self.server_latencies),
+            'steps': {step: latency_summary(values) for step, values in sorted(self.latencies.items())},
+            'timeline': [
+                {
+                    't_s': index * self.window,
+                    'patients': max((count for at, count in active_patients
+                                     if index * self.window <= at < (index + 1) * self.window), default=0),
+                    'requests': window['requests'],
+                    'errors': window['errors'],
+                    'p95_ms': latency_summary(window['latencies'])['p95_ms']
+                }
+                for index, window in sorted(self.timeline.items())
+            ]
+        }
+
+
+def parse_stage(text: str) -> Tuple[float, int]:
+    """DURATION:PATIENTS -> (seconds, patients)"""
+    duration, patients = text.split(':')
+    return float(duration), int(patients)
+
+
+def target_patients(stages: List[Tuple[float, int]], elapsed: float) -> int:
+    """Concurrent patients the schedule calls for ``elapsed`` seconds in (linear within a stage)"""
+    previous = 0
+    for duration, patients in stages:
+        if elapsed < duration:
+            return round(previous + (patients - previous) * (elapsed / duration if duration else 1))
+        elapsed -= duration
+        previous = patients
+    return previous
+
+
+async def run_patient(patient_id: int, model: ConversationModel, client, stats: LoadStats,
+                      rng: random.Random, think_median: float, think_sigma: float,
+                      timeout: float, deadline: float, run_id: str):
+    session_id = f"load-{run_id}-{patient_id}"
+    outcome = 'completed'
+    try:
+        for step, message in model.conversation(rng):
+            if time.monotonic() >= deadline:
+                outcome = 'cut_off'
+                break
+            started = time.perf_counter()
+            try:
+                status, server_ms = await asyncio.wait_for(client.send(session_id, message), timeout)
+            except asyncio.TimeoutError:
+                stats.error('timeout')
+                outcome = 'failed'
+                break
+            except (OSError, asyncio.IncompleteReadError, ProtocolError, ValueError) as e:
+                stats.error(type(e).__name__)
+                outcome = 'failed'
+                break
+            stats.record(step, time.perf_counter() - started, status, server_ms)
+            if think_median > 0:
+                await asyncio.sleep(rng.lognormvariate(math.log(think_median), think_sigma))
+    finally:
+        stats.conversations[outcome] += 1
+        await client.close()
+
+
+async def run_load(url: str, transport: str, stages: List[Tuple[float, int]], model: ConversationModel,
+                   think_median: float, think_sigma: float, timeout: float, seed: int,
+                   grace: float = 30.0) -> Dict:
+    """Drive the schedule to the end, then give in-flight conversations ``grace`` seconds"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported URL scheme {parsed.scheme!r} (use http:// or https://)")
+    ssl_context = ssl.create_default_context() if parsed.scheme == 'https' else None
+    host = parsed.hostname or '127.0.0.1'
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    client_class = WebSocketChatClient if transport == 'ws' else HTTPChatClient
+
+    rng = random.Random(seed)
+    run_id = f"{seed}-{int(time.time())}"
+    stats = LoadStats()
+    total = sum(duration for duration, _ in stages)
+    deadline = time.monotonic() + total + grace
+    active = set()
+    samples = []
+    next_id = 0
+    last_print = 0.0
+
+    while True:
+        elapsed = time.monotonic() - stats.started
+        if elapsed >= total:
+            break
+        active = {task for task in active if not task.done()}
+        target = target_patients(stages, elapsed)
+        while len(active) < target:
+            patient_rng = random.Random(rng.getrandbits(64))
+            active.add(asyncio.ensure_future(run_patient(
+                next_id, model, client_class(host, port, ssl_context), stats, patient_rng,
+                think_median, think_sigma, timeout, deadline, run_id
+            )))
+            next_id += 1
+        samples.append((elapsed, len(active)))
+        if elapsed - last_print >= 10:
+            last_print = elapsed
+            print(f"🚶 t={elapsed:5.0f}s patients={len(active):5d} requests={sum(stats.statuses.values())} "
+                  f"errors={sum(stats.errors.values())}")
+        await asyncio.sleep(0.1)
+
+    if active:
+        await asyncio.wait(active, timeout=grace)
+        for task in active:
+            task.cancel()
+    report = stats.report(samples)
+    report.update({'url': url, 'transport': transport, 'stages': stages, 'patients_started': next_id,
+                   'think_median_s': think_median, 'seed': seed})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate patient traffic against the chat API")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Chat API base URL')
+    parser.add_argument('--transport', choices=('http', 'ws'), default='http')
+    parser.add_argument('--stage', action='append', type=parse_stage,
+                        help='DURATION:PATIENTS ramp stage (repeatable; default 30:20 60:20)')
+    parser.add_argument('--think-median', type=float, default=4.0, help='Median pause between messages (s)')
+    parser.add_argument('--think-sigma', type=float, default=0.75, help='Log-normal spread of the pause')
+    parser.add_argument('--timeout', type=float, default=15.0, help='Per-message timeout (s)')
+    parser.add_argument('--training-data', default=TRAINING_DATA_FILE)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    stages = args.stage or [(30.0, 20), (60.0, 20)]
+    model = ConversationModel.from_training_data(args.training_data)
+    print(f"🏥 Load test against {args.url} ({args.transport}), stages {stages}")
+    report = asyncio.run(run_load(args.url, args.transport, stages, model, args.think_median,
+                                  args.think_sigma, args.timeout, args.seed))
+
+    latency = report['latency']
+    print(f"\n📊 {report['requests']} requests in {report['duration_s']}s "
+          f"({report['requests_per_sec']}/s), error rate {report['error_rate']:.2%}")
+    print(f"  Latency p50 {latency['p50_ms']} ms | p95 {latency['p95_ms']} ms | p99 {latency['p99_ms']} ms")
+    print(f"  Conversations: {report['conversations']}  Errors: {report['errors'] or 'none'}")
+    for step, summary in report['steps'].items():
+        print(f"  {step:<20} p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.output}")
@@ -0,0 +1,1005 @@
+"""
+Baptist Health Hospital Doral - Medical Chatbot Core
+Database, rule-based NLP and conversation engine used by the chatbot front ends
+"""
+
+import sqlite3
+import re
+import time
+import os
+import queue
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, AsyncIterator, Optional
+
+from async_sessions import SessionLockRegistry, run_blocking
+from faq_index import FAQIndex
+from conversation_log import ConversationLogStore
+from instrumentation import tracer, traced
+from metrics import metrics
+from medical_vocabulary import MedicalVocabulary, default_vocabulary, current_vocabulary
+
+# Hospital Configuration, from medical_vocabulary.json as loaded at import.
+# Running chatbots read the live values through their vocabulary watcher.
+CLINIC_CONSTANTS = default_vocabulary().clinic_constants
+CLINIC_NAME = CLINIC_CONSTANTS['CLINIC_NAME']
+CLINIC_PHONE = CLINIC_CONSTANTS['CLINIC_PHONE']
+CLINIC_ADDRESS = CLINIC_CONSTANTS['CLINIC_ADDRESS']
+BILLING_PHONE = CLINIC_CONSTANTS['BILLING_PHONE']
+INSURANCE_PHONE = CLINIC_CONSTANTS['INSURANCE_PHONE']
+
+# Idle time (seconds) before a session's conversation state is dropped;
+# long enough for a patient to look up an insurance card mid-booking
+SESSION_TIMEOUT = int(os.environ.get('CHATBOT_SESSION_TIMEOUT', 30 * 60))
+
+class HospitalDatabase:
+    def __init__(self, db_name='hospital_appointments.db', vocabulary=None):
+        """Initialize hospital database with SQLite - CORRUPTION PROOF
+        
+        The doctors table is seeded from the medical vocabulary's roster;
+        ``vocabulary`` is a medical_vocabulary.watch_vocabulary() watcher, or
+        None for the file as loaded at import. When the watcher swaps in a
+        new version the table is reseeded on the next doctor lookup.
+        """
+        self.db_name = db_name
+        self.vocabulary = vocabulary
+        
+        # The connection and cursor are shared by every front-end thread,
+        # so each query + fetch runs under this lock
+        self._lock = threading.Lock()
+        
+        # Doctor lookups are cached per roster version and shared by every
+        # session; a reseed swaps in an empty cache
+        self._doctor_cache = {}
+        self._roster_version = None
+        
+        # Force remove any existing database first
+        if os.path.exists(db_name):
+            try:
+                os.remove(db_name)
+            except:
+                pass
+        
+        # Create completely fresh database
+        try:
+            # Use WAL mode to prevent corruption
+            self.conn = sqlite3.connect(
+                db_name, 
+                check_same_thread=False,
+                isolation_level=None  # Autocommit mode
+            )
+            self.cursor = self.conn.cursor()
+            
+            # Enable WAL mode for better concurrency
+            self.cursor.execute("PRAGMA journal_mode=WAL")
+            self.cursor.execute("PRAGMA synchronous=NORMAL")
+            self.cursor.execute("PRAGMA cache_size=1000")
+            
+            self._create_tables()
+            self._populate_mock_data()
+            
+        except Exception as e:
+            # Last resort: create in-memory database
+            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+            self.cursor = self.conn.cursor()
+            self._create_tables()
+            self._populate_mock_data()
+    
+    def _create_tables(self):
+        """Create database tables"""
+        try:
+            # Simple appointments table
+            self.cursor.execute('''
+                CREATE TABLE appointments (
+                    id INTEGER PRIMARY KEY,
+                    patient_name TEXT,
+                    patient_phone TEXT,
+                    doctor_name TEXT,
+                    specialty TEXT,
+                    appointment_date TEXT,
+                    appointment_time TEXT,
+                    status TEXT DEFAULT 'confirmed'
+                )
+            ''')
+            
+            # Simple doctors table
+            self.cursor.execute('''
+                CREATE TABLE doctors (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT,
+                    specialty TEXT,
+                    available_days TEXT,
+                    available_times TEXT
+                )
+            ''')
+            
+            self.conn.commit()
+            
+        except sqlite3.Error as e:
+            raise Exception(f"Database table creation failed: {e}")
+    
+    def _populate_mock_data(self):
+        """Populate database with Baptist Health Hospital Doral doctors"""
+        try:
+            self._seed_doctors(current_vocabulary(self.vocabulary))
+        except sqlite3.Error as e:
+            raise Exception(f"Database population failed: {e}")
+    
+    def _seed_doctors(self, vocabulary: MedicalVocabulary):
+        """Replace the doctors table with the vocabulary's roster (caller holds the lock, or is __init__)"""
+        doctors = [
+            (doctor_id, doctor['name'], doctor['specialty'],
+             ','.join(doctor['available_days']), ','.join(doctor['available_times']))
+            for doctor_id, doctor in enumerate(vocabulary.doctors, start=1)
+        ]
+        self.cursor.execute("BEGIN")
+        try:
+            self.cursor.execute("DELETE FROM doctors")
+            self.cursor.executemany('''
+                INSERT INTO doctors (id, name, specialty, available_days, available_times)
+                VALUES (?, ?, ?, ?, ?)
+            ''', doctors)
+            self.cursor.execute("COMMIT")
+        except sqlite3.Error:
+            self.cursor.execute("ROLLBACK")
+            raise
+        self._doctor_cache = {}
+        self._roster_version = vocabulary.version_id
+    
+    def _doctors_for_version(self) -> Dict:
+        """Doctor cache for the live roster, reseeding the table first if the vocabulary changed"""
+        vocabulary = current_vocabulary(self.vocabulary)
+        if vocabulary.version_id != self._roster_version:
+            with self._lock:
+                if vocabulary.version_id != self._roster_version:
+                    try:
+                        self._seed_doctors(vocabulary)
+                    except sqlite3.Error as e:
+                        # Keep serving the previous roster; retry on the next version
+                        self._roster_version = vocabulary.version_id
+                        print(f"⚠️ Doctor roster {vocabulary.version_id} not applied: {e}")
+        return self._doctor_cache
+    
+    @traced('db.get_available_doctors')
+    def get_available_doctors(self, specialty: str) -> List[Dict]:
+        """Get available doctors for a specialty"""
+        doctor_cache = self._doctors_for_version()
+        cached = doctor_cache.get(specialty)
+        if cached is not None:
+            metrics.inc('chatbot_cache_lookups_total', cache='doctors', result='hit')
+            return list(cached)
+        metrics.inc('chatbot_cache_lookups_total', cache='doctors', result='miss')
+        
+        try:
+            with self._lock:
+                self.cursor.execute('''
+                    SELECT name, specialty, available_days, available_times 
+                    FROM doctors 
+                    WHERE specialty = ? OR specialty LIKE ?
+                ''', (specialty, f'%{specialty}%'))
+                rows = self.cursor.fetchall()
+            
+            doctors = []
+            for row in rows:
+                doctors.append({
+                    'name': row[0],
+                    'specialty': row[1],
+                    'available_days': row[2].split(','),
+                    'available_times': row[3].split(',')
+                })
+            doctor_cache[specialty] = tuple(doctors)
+            return doctors
+        except sqlite3.Error as e:
+            return []
+    
+    @traced('db.book_appointment')
+    def book_appointment(self, patient_data: Dict) -> Dict:
+        """Book a new appointment"""
+        try:
+            with self._lock:
+                self.cursor.execute('''
+                    INSERT INTO appointments 
+                    (patient_name, patient_phone, doctor_name, specialty, appointment_date, appointment_time)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    patient_data.get('name'),
+                    patient_data.get('phone'),
+                    patient_data.get('doctor'),
+                    patient_data.get('specialty'),
+                    patient_data.get('date'),
+                    patient_data.get('time')
+                ))
+                
+                appointment_id = self.cursor.lastrowid
+                self.conn.commit()
+            
+            metrics.inc('chatbot_bookings_total', outcome='success')
+            return {
+                'success': True,
+                'appointment_id': appointment_id,
+                'message': f"Appointment booked with {patient_data.get('doctor')}"
+            }
+        except sqlite3.Error as e:
+            # A constraint violation means the slot or record already exists
+            outcome = 'conflict' if isinstance(e, sqlite3.IntegrityError) else 'error'
+            metrics.inc('chatbot_bookings_total', outcome=outcome)
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    @traced('db.get_patient_appointments')
+    def get_patient_appointments(self, patient_name: str, patient_phone: str = None) -> List[Dict]:
+        """Get appointments for a patient"""
+        try:
+            with self._lock:
+                self.cursor.execute('''
+                    SELECT * FROM appointments 
+                    WHERE patient_name = ?
+                    ORDER BY appointment_date, appointment_time
+                ''', (patient_name,))
+                rows = self.cursor.fetchall()
+            
+            appointments = []
+            for row in rows:
+                appointments.append({
+                    'id': row[0],
+                    'patient_name': row[1],
+                    'doctor_name': row[3],
+                    'specialty': row[4],
+                    'date': row[5],
+                    'time': row[6],
+                    'status': row[7] if len(row) > 7 else 'confirmed'
+                })
+            return appointments
+        except sqlite3.Error as e:
+            return []
+
+class MedicalNLPPipeline:
+    # Substrings that vote for each intent in classify_intent
+    INTENT_PATTERNS = {
+        'book_appointment': [
+            'book', 'schedule', 'appointment', 'make appointment', 'see doctor',
+            'visit', 'consultation', 'need to see', 'want to see'
+        ],
+        'check_appointment': [
+            'check appointment', 'my appointment', 'when is', 'appointment status',
+            'what appointments', 'show appointments'
+        ],
+        'cancel_appointment': [
+            'cancel', 'reschedule', 'change appointment', 'move appointment',
+            'can\'t make', 'need to cancel'
+        ],
+        'get_info': [
+            'hours', 'location', 'address', 'phone', 'cost', 'price', 'insurance',
+            'specialties', 'doctors available'
+        ],
+        'greeting': [
+            'hello', 'hi', 'hey', 'good morning', 'good afternoon', 'help'
+        ]
+    }
+    
+    def __init__(self, vocabulary=None):
+        """Initialize medical NLP with rule-based processing
+        
+        Keyword tables come from the medical vocabulary file; ``vocabulary``
+        is a medical_vocabulary.watch_vocabulary() watcher for live edits,
+        or None for the file as loaded at import.
+        """
+        self.vocabulary = vocabulary
+    
+    def active_vocabulary(self) -> MedicalVocabulary:
+        """Current vocabulary snapshot; read it once per call for a consistent view"""
+        return current_vocabulary(self.vocabulary)
+    
+    @property
+    def medical_specialties(self) -> Dict:
+        return self.active_vocabulary().medical_specialties
+    
+    @property
+    def symptoms(self):
+        return self.active_vocabulary().symptoms
+    
+    @property
+    def urgency_indicators(self):
+        return self.active_vocabulary().urgency_indicators
+    
+    def extract_medical_entities(self, text: str) -> Dict:
+        """Extract medical entities from text"""
+        text_lower = text.lower()
+        vocabulary = self.active_vocabulary()
+        # Keyword matching runs on the typo-corrected text ("cardiolgy" -> "cardiology")
+        corrected = vocabulary.spelling.correct_text(text_lower)
+        entities = {
+            'specialties': [],
+            'symptoms': [],
+            'urgency': [],
+            'doctors': [],
+            'confidence_scores': {}
+        }
+        
+        # Extract specialties (vocabulary keywords are stored lower-cased)
+        for specialty, keywords in vocabulary.medical_specialties.items():
+            for keyword in keywords:
+                if keyword in corrected:
+                    if specialty not in entities['specialties']:
+                        entities['specialties'].append(specialty)
+                        entities['confidence_scores'][specialty] = 0.85
+                    break
+        
+        # Extract symptoms
+        for symptom in vocabulary.symptoms:
+            if symptom in corrected:
+                entities['symptoms'].append(symptom)
+        
+        # Extract urgency
+        for urgency in vocabulary.urgency_indicators:
+            if urgency in corrected:
+                entities['urgency'].append(urgency)
+        
+        # Extract doctor names
+        doctor_patterns = [r'dr\.?\s+(\w+)', r'doctor\s+(\w+)']
+        for pattern in doctor_patterns:
+            matches = re.findall(pattern, text_lower)
+            for match in matches:
+                entities['doctors'].append(f"Dr. {match.title()}")
+        
+        return entities
+    
+    def classify_intent(self, text: str) -> Dict:
+        """Classify user intent"""
+        text_lower = text.lower()
+        
+        best_intent = 'unknown'
+        best_score = 0
+        
+        for intent, patterns in self.INTENT_PATTERNS.items():
+            score = 0
+            for pattern in patterns:
+                if pattern in text_lower:
+                    score += 1
+            
+            if score > best_score:
+                best_score = score
+                best_intent = intent
+        
+        confidence = min(best_score * 0.3, 1.0) if best_score > 0 else 0.1
+        
+        return {
+            'intent': best_intent,
+            'confidence': confidence
+        }
+    
+    def process_query(self, user_input: str) -> Dict:
+        """Process complete user query"""
+        entities = self.extract_medical_entities(user_input)
+        intent_result = self.classify_intent(user_input)
+        
+        return {
+            'user_input': user_input,
+            'intent': intent_result['intent'],
+            'confidence': intent_result['confidence'],
+            'entities': entities,
+            'medical_context': {
+                'needs_specialty': len(entities['specialties']) == 0 and intent_result['intent'] == 'book_appointment',
+                'has_urgency': len(entities['urgency']) > 0,
+                'suggested_specialties': entities['specialties'][:2],
+                'is_emergency': any('emergency' in u.lower() for u in entities['urgency'])
+            }
+        }
+
+def split_response_chunks(text: str) -> List[str]:
+    """Split a response into word-sized chunks for streaming (markup markers stay intact)"""
+    with tracer.span('render'):
+        return re.findall(r'\S+\s*|\s+', text)
+
+class ResponseStream:
+    """Iterable of text chunks for one bot turn
+    
+    ``result`` holds the complete response dict (type, suggestions, ...)
+    once the stream has been exhausted.
+    """
+    
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self.result = None
+    
+    def __iter__(self):
+        self.result = yield from self._chunks
+
+class MedicalChatbot:
+    def __init__(self, database, nlp_pipeline, faq_index: FAQIndex = None, semantic_index=None,
+                 turn_log: ConversationLogStore = None, intent_model=None, turn_capture=None):
+        """Initialize medical chatbot
+        
+        ``semantic_index`` (optional) is a hot_reload.HotReloader around a
+        semantic_index.SemanticIndex; it adds paraphrase matching when the
+        keyword NLP and BM25 FAQ search miss.
+        ``turn_log`` (optional) records anonymized user turns and their
+        intents for incremental retraining; ``intent_model`` (optional) is a
+        hot_reload.HotReloader around the retrained
+        intent_classifier.IncrementalIntentClassifier. ``turn_capture``
+        (optional, a turn_replay.TurnCaptureLog) records every turn with its
+        latency for replay against later builds.
+        """
+        self.db = database
+        self.nlp = nlp_pipeline
+        self.turn_log = turn_log
+        self.turn_capture = turn_capture
+        self.conversation_state = {}
+        
+        # Async front ends: per-session turn locks and the executor that runs
+        # blocking NLP/SQLite work (None = the event loop's default pool)
+        self.session_locks = SessionLockRegistry()
+        self.executor = None
+        
+        # Streaming turns: where progress notices for the current thread's turn go,
+        # and the pool that runs synchronous streamed turns when no executor is set
+        self._stream_local = threading.local()
+        self._stream_pool = None
+        self._stream_pool_lock = threading.Lock()
+        
+        # Idle sessions are evicted at most once per SESSION_SWEEP_INTERVAL.
+        # Sessions evicted mid-flow are remembered (bounded) so the user's
+        # next turn can say the session expired instead of silently restarting
+        self.SESSION_TIMEOUT = SESSION_TIMEOUT
+        self.SESSION_SWEEP_INTERVAL = 30
+        self._last_session_sweep = time.time()
+        self._expired_sessions = OrderedDict()
+        self.MAX_EXPIRED_SESSIONS = 10000
+        
+        # Conversation states
+        self.STATES = {
+            'IDLE': 'idle',
+            'COLLECTING_SPECIALTY': 'collecting_specialty',
+            'COLLECTING_DOCTOR': 'collecting_doctor',
+            'COLLECTING_PATIENT_INFO': 'collecting_patient_info',
+            'COLLECTING_PHONE': 'collecting_phone',
+            'COLLECTING_DATE_TIME': 'collecting_date_time',
+            'CONFIRMING_APPOINTMENT': 'confirming_appointment',
+            'CHECKING_APPOINTMENT_NAME': 'checking_appointment_name',
+            'APPOINTMENT_FOUND': 'appointment_found',
+            'MODIFYING_APPOINTMENT': 'modifying_appointment',
+            'CONFIRMING_CANCELLATION': 'confirming_cancellation'
+        }
+        
+        # States whose user replies are personal data
+        self.PRIVATE_STATES = {
+            self.STATES['COLLECTING_PATIENT_INFO'],
+            self.STATES['COLLECTING_PHONE'],
+            self.STATES['CHECKING_APPOINTMENT_NAME']
+        }
+        
+        # FAQ knowledge base (BM25); by default the vocabulary's, rebuilt when it reloads
+        self._faq_index = faq_index
+        self.MIN_FAQ_SCORE = 1.0
+        
+        # Embedding search fallback (cosine similarity thresholds)
+        self.semantic_index = semantic_index
+        self.MIN_SEMANTIC_FAQ_SCORE = 0.6
+        self.MIN_SEMANTIC_INTENT_CONFIDENCE = 0.5
+        
+        # Intent model retrained from logged conversations (posterior probability)
+        self.intent_model = intent_model
+        self.MIN_LEARNED_INTENT_CONFIDENCE = 0.6
+    
+    @property
+    def faq_index(self) -> FAQIndex:
+        """The injected FAQ index, else the active vocabulary's"""
+        return self._faq_index or self.nlp.active_vocabulary().faq_index
+    
+    def _clinic(self) -> Dict:
+        """Clinic constants from the active vocabulary"""
+        return self.nlp.active_vocabulary().clinic_constants
+    
+    def _get_main_menu_text(self) -> str:
+        """Get main menu text"""
+        clinic = self._clinic()
+        return f"👋 Welcome to **{clinic['CLINIC_NAME']}**! I'm your virtual assistant. I can help you:\\n\\n• **Book new appointments**\\n• **Check existing appointments**\\n• **Get hospital information**\\n• **Answer frequently asked questions (FAQs)**\\n\\nHow can I help you today?"
+    
+    def process_message(self, user_input: str, session_id: str = "streamlit_session") -> Dict:
+        """Process user message and return response"""
+        if time.time() - self._last_session_sweep >= self.SESSION_SWEEP_INTERVAL:
+            self.evict_expired_sessions()
+        
+        # Initialize session if not exists
+        expired = False
+        if session_id not in self.conversation_state:
+            expired = self._expired_sessions.pop(session_id, None) is not None
+            self.conversation_state[session_id] = {
+                'state': self.STATES['IDLE'],
+                'appointment_data': {},
+                'last_intent': None,
+                'context': {},
+                'attempt_count': 0,
+                'last_activity': time.time()
+            }
+        
+        session = self.conversation_state[session_id]
+        session['last_activity'] = time.time()
+        
+        state_before = session['state']
+        started = time.perf_counter()
+        with tracer.span('turn') as turn_span:
+            response = self._run_turn(session, user_input, turn_span)
+        if expired:
+            response = self._with_expiry_notice(response)
+        if self.turn_capture is not None:
+            self.turn_capture.record(session_id, user_input, time.perf_counter() - started, response,
+                                     private=state_before in self.PRIVATE_STATES, nlp=self.nlp)
+        return response
+    
+    def _run_turn(self, session: Dict, user_input: str, turn_span) -> Dict:
+        """NLP, intent fallbacks, routing and turn logging for one message"""
+        # Process with NLP
+        with tracer.span('nlp'):
+            nlp_result = self.nlp.process_query(user_input)
+        intent = nlp_result['intent']
+        confidence = nlp_result['confidence']
+        intent_source = 'rules'
+        entities = nlp_result['entities']
+        
+        # Paraphrases the keyword rules miss; only at the top level so free-text
+        # answers inside a booking flow (names, times) are never re-interpreted.
+        # The model reference is read once, so a hot swap mid-turn is harmless.
+        model = self.intent_model.current if self.intent_model is not None else None
+        if intent == 'unknown' and model is not None and session['state'] == self.STATES['IDLE']:
+            with tracer.span('nlp.learned_intent'):
+                prediction = model.predict(user_input)
+            if prediction['confidence'] >= self.MIN_LEARNED_INTENT_CONFIDENCE:
+                intent, confidence, intent_source = prediction['intent'], prediction['confidence'], 'learned'
+        
+        semantic = self.semantic_index.current if self.semantic_index is not None else None
+        if intent == 'unknown' and semantic is not None and session['state'] == self.STATES['IDLE']:
+            with tracer.span('nlp.semantic_intent'):
+                semantic_result = semantic.classify_intent(user_input)
+            if semantic_result['confidence'] >= self.MIN_SEMANTIC_INTENT_CONFIDENCE:
+                intent, confidence, intent_source = semantic_result['intent'], semantic_result['confidence'], 'semantic'
+        
+        state_before = session['state']
+        
+        # Route to appropriate handler
+        with tracer.span('routing', state=state_before):
+            if intent == 'greeting':
+                response = self._handle_greeting(session)
+            elif intent == 'book_appointment':
+                response = self._handle_book_appointment(session, entities, user_input)
+            elif intent == 'get_info':
+                response = self._handle_get_info(user_input)
+            else:
+                response = self._handle_continuation(session, user_input, entities)
+        
+        turn_span.set_attribute('intent', intent)
+        turn_span.set_attribute('intent_source', intent_source)
+        turn_span.set_attribute('response_type', response.get('type'))
+        metrics.inc('chatbot_turns_total', intent=intent, source=intent_source)
+        metrics.inc('chatbot_responses_total', type=response.get('type'))
+        
+        # Answers to personal-data prompts (names, phone numbers) are never logged
+        if self.turn_log is not None and state_before not in self.PRIVATE_STATES:
+            with tracer.span('turn_log'):
+                self.turn_log.append(user_input, intent, confidence, source=intent_source,
+                                     state=state_before, response_type=response.get('type'))
+        return response
+    
+    async def aprocess_message(self, user_input: str, session_id: str = "streamlit_session") -> Dict:
+        """Process user message without blocking the event loop
+        
+        Turns for the same session are serialized; NLP and database work run
+        in ``self.executor`` so one loop can serve many conversations.
+        """
+        async with self.session_locks.get(session_id):
+            return await run_blocking(self.executor, self.process_message, user_input, session_id)
+    
+    def stream_message(self, user_input: str, session_id: str = "streamlit_session") -> ResponseStream:
+        """Process user message, yielding response text as it becomes available
+        
+        The turn runs on ``self.executor`` (or a shared pool); progress
+        notices (e.g. while the booking is written) are yielded before the
+        full response is ready.
+        """
+        return ResponseStream(self._iter_message_chunks(user_input, session_id))
+    
+    def _iter_message_chunks(self, user_input: str, session_id: str):
+        """Generator behind stream_message; returns the response dict"""
+        chunks = queue.Queue()
+        done = object()
+        outcome = {}
+        
+        def run_turn():
+            try:
+                outcome['response'] = self._run_streaming_turn(user_input, session_id, chunks.put)
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                chunks.put(done)
+        
+        self._stream_executor().submit(run_turn)
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                break
+            yield chunk
+        
+        if 'error' in outcome:
+            raise outcome['error']
+        response = outcome['response']
+        yield from split_response_chunks(response['response'])
+        return response
+    
+    def _stream_executor(self):
+        """Executor for synchronous streamed turns: ``self.executor``, else a shared pool"""
+        if self.executor is not None:
+            return self.executor
+        with self._stream_pool_lock:
+            if self._stream_pool is None:
+                self._stream_pool = ThreadPoolExecutor(thread_name_prefix='chatbot-stream')
+            return self._stream_pool
+    
+    async def astream_message(self, user_input: str, session_id: str = "streamlit_session") -> AsyncIterator:
+        """Async variant of stream_message: yields text chunks, then the complete response dict"""
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+        
+        def emit(chunk):
+            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        
+        def run_turn():
+            try:
+                return self._run_streaming_turn(user_input, session_id, emit)
+            finally:
+                emit(done)
+        
+        async with self.session_locks.get(session_id):
+            turn = loop.run_in_executor(self.executor, run_turn)
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is done:
+                        break
+                    yield chunk
+                response = await turn
+            finally:
+                # A client that disconnects closes this generator mid-turn; the
+                # session stays locked until the worker has really finished
+                if not turn.done():
+                    await asyncio.wait([turn])
+        
+        for chunk in split_response_chunks(response['response']):
+            yield chunk
+        yield response
+    
+    def _run_streaming_turn(self, user_input: str, session_id: str, emit) -> Dict:
+        """Run one turn with progress notices routed to ``emit``"""
+        self._stream_local.emit = emit
+        try:
+            return self.process_message(user_input, session_id)
+        finally:
+            self._stream_local.emit = None
+    
+    def _notify_progress(self, text: str) -> None:
+        """Send an early notice to the streaming client, if this turn is being streamed"""
+        emit = getattr(self._stream_local, 'emit', None)
+        if emit is not None:
+            emit(text + "\\n\\n")
+    
+    def end_session(self, session_id: str) -> None:
+        """Drop one session's conversation state (e.g. "New Conversation")"""
+        self.conversation_state.pop(session_id, None)
+        self._expired_sessions.pop(session_id, None)
+    
+    def evict_expired_sessions(self) -> int:
+        """Drop sessions idle longer than SESSION_TIMEOUT; returns how many were evicted"""
+        now = time.time()
+        self._last_session_sweep = now
+        expired = [
+            session_id for session_id, session in list(self.conversation_state.items())
+            if now - session['last_activity'] > self.SESSION_TIMEOUT
+        ]
+        for session_id in expired:
+            session = self.conversation_state.pop(session_id, None)
+            if session is not None and session['state'] != self.STATES['IDLE']:
+                self._expired_sessions[session_id] = now
+                if len(self._expired_sessions) > self.MAX_EXPIRED_SESSIONS:
+                    self._expired_sessions.popitem(last=False)
+        if expired:
+            metrics.inc('chatbot_session_evictions_total', len(expired))
+        return len(expired)
+    
+    def _with_expiry_notice(self, response: Dict) -> Dict:
+        """Tell the user their previous session timed out before answering this turn"""
+        minutes = max(1, round(self.SESSION_TIMEOUT / 60))
+        notice = (f"⏰ Your previous session expired after {minutes} minute{'s' if minutes != 1 else ''} "
+                  f"of inactivity, so any booking in progress was not saved. Please start again.\\n\\n")
+        return {**response, 'response': notice + response['response'], 'session_expired': True}
+    
+    def _handle_greeting(self, session: Dict) -> Dict:
+        """Handle greeting messages"""
+        self._reset_session(session)
+        return {
+            'response': self._get_main_menu_text(),
+            'type': 'greeting',
+            'suggestions': ['Book appointment', 'Hospital info', 'FAQs']
+        }
+    
+    def _reset_session(self, session: Dict) -> None:
+        """Reset session to initial state"""
+        session['state'] = self.STATES['IDLE']
+        session['appointment_data'] = {}
+        session['attempt_count'] = 0
+        session['last_activity'] = time.time()
+    
+    def _handle_book_appointment(self, session: Dict, entities: Dict, user_input: str) -> Dict:
+        """Handle appointment booking flow"""
+        clinic = self._clinic()
+        
+        # Check for emergency
+        if entities['urgency'] and any('emergency' in u.lower() for u in entities['urgency']):
+            return {
+                'response': f"🚨 **Medical Emergency Protocol**\\n\\nFor medical emergencies:\\n• **Call 911 immediately**\\n• **Emergency Department**: {clinic['CLINIC_NAME']} - {clinic['CLINIC_PHONE']}\\n• **We are open 24/7** for emergency care\\n\\nI can help you schedule regular appointments once your emergency is addressed.",
+                'type': 'emergency_redirect'
+            }
+        
+        # Update session with extracted entities
+        if entities['specialties']:
+            session['appointment_data']['specialty'] = entities['specialties'][0]
+        if entities['doctors']:
+            session['appointment_data']['doctor'] = entities['doctors'][0]
+        
+        # Determine next step in booking flow
+        if 'specialty' not in session['appointment_data']:
+            session['state'] = self.STATES['COLLECTING_SPECIALTY']
+            return {
+                'response': f"🏥 **Book Appointment** - {clinic['CLINIC_NAME']}\\n\\nWhich medical specialty do you need?",
+                'type': 'specialty_selection',
+                'suggestions': ['Cardiology', 'Dermatology', 'Pediatrics', 'Neurology', 'Orthopedics']
+            }
+        
+        # Get available doctors for specialty
+        doctors = self.db.get_available_doctors(session['appointment_data']['specialty'])
+        if not doctors:
+            return {
+                'response': f"Sorry, we don't have doctors available for {session['appointment_data']['specialty']} right now. Please try another specialty or call {clinic['CLINIC_PHONE']}.",
+                'type': 'error'
+            }
+        
+        if 'doctor' not in session['appointment_data']:
+            session['state'] = self.STATES['COLLECTING_DOCTOR']
+            doctor_list = "\\n".join([f"• **{doc['name']}** - Available: {', '.join(doc['available_days'][:3])}" for doc in doctors[:3]])
+            return {
+                'response': f"👨‍⚕️ **Available Doctors** for {session['appointment_data']['specialty']}:\\n\\n{doctor_list}\\n\\nWhich doctor would you prefer?",
+                'type': 'doctor_selection',
+                'suggestions': [doc['name'] for doc in doctors[:3]]
+            }
+        
+        # Collect patient information
+        if 'patient_name' not in session['appointment_data']:
+            session['state'] = self.STATES['COLLECTING_PATIENT_INFO']
+            return {
+                'response': "📝 **Patient Information**\\n\\nWhat's the patient's full name?",
+                'type': 'patient_info',
+                'collecting': 'name'
+            }
+        
+        return self._continue_booking_flow(session)
+    
+    def _continue_booking_flow(self, session: Dict) -> Dict:
+        """Continue the booking flow"""
+        appointment_data = session['appointment_data']
+        
+        if 'patient_phone' not in appointment_data:
+            session['state'] = self.STATES['COLLECTING_PHONE']
+            return {
+                'response': "📱 What's your contact phone number?",
+                'type': 'patient_info',
+                'collecting': 'phone'
+            }
+        
+        if 'date' not in appointment_data or 'time' not in appointment_data:
+            session['state'] = self.STATES['COLLECTING_DATE_TIME']
+            doctors = self.db.get_available_doctors(appointment_data['specialty'])
+            selected_doctor = next((d for d in doctors if d['name'] == appointment_data.get('doctor')), doctors[0] if doctors else None)
+            
+            if selected_doctor:
+                available_times = selected_doctor['available_times'][:4]
+                return {
+                    'response': f"🗓️ **Available Time Slots** with {selected_doctor['name']}:\\n\\n" + "\\n".join([f"• {time}" for time in available_times]) + "\\n\\nWhich time works best for you?",
+                    'type': 'time_selection',
+                    'suggestions': available_times
+                }
+        
+        return self._confirm_appointment(session)
+    
+    def _confirm_appointment(self, session: Dict) -> Dict:
+        """Confirm and book the appointment"""
+        clinic = self._clinic()
+        appointment_data = session['appointment_data']
+        
+        self._notify_progress(f"⏳ Booking your appointment with {appointment_data.get('doctor')}...")
+        booking_result = self.db.book_appointment({
+            'name': appointment_data.get('patient_name'),
+            'phone': appointment_data.get('patient_phone'),
+            'doctor': appointment_data.get('doctor'),
+            'specialty': appointment_data.get('specialty'),
+            'date': appointment_data.get('date', '2024-02-15'),
+            'time': appointment_data.get('time', '10:00'),
+            'symptoms': appointment_data.get('symptoms', ''),
+            'urgency': 'normal'
+        })
+        
+        if booking_result['success']:
+            self._reset_session(session)
+            return {
+                'response': f"✅ **Appointment Confirmed!** - {clinic['CLINIC_NAME']}\\n\\n📋 **Details:**\\n• **Patient**: {appointment_data.get('patient_name')}\\n• **Doctor**: {appointment_data.get('doctor')}\\n• **Date**: {appointment_data.get('date', '2024-02-15')}\\n• **Time**: {appointment_data.get('time', '10:00')}\\n• **Appointment ID**: #{booking_result['appointment_id']}\\n\\n📞 **Confirmation call within 24 hours**\\n💡 **Arrive 15 minutes early**",
+                'type': 'booking_confirmation',
+                'appointment_id': booking_result['appointment_id'],
+                'suggestions': ['Book another', 'Hospital info', 'FAQs']
+            }
+        else:
+            return {
+                'response': f"❌ **Booking Error**: {booking_result.get('error')}. Please try again or call {clinic['CLINIC_PHONE']}.",
+                'type': 'error'
+            }
+    
+    def _is_phone_number(self, text: str) -> bool:
+        """Check if text looks like a phone number"""
+        cleaned = re.sub(r'[^\d]', '', text)
+        return cleaned.isdigit() and 7 <= len(cleaned) <= 15
+    
+    def _handle_continuation(self, session: Dict, user_input: str, entities: Dict) -> Dict:
+        """Handle continuation of conversation flow"""
+        current_state = session['state']
+        user_input_clean = user_input.strip()
+        
+        # Handle regular booking flow states
+        if current_state == self.STATES['COLLECTING_SPECIALTY']:
+            if entities['specialties']:
+                session['appointment_data']['specialty'] = entities['specialties'][0]
+                return self._handle_book_appointment(session, entities, user_input)
+            else:
+                vocabulary = self.nlp.active_vocabulary()
+                user_lower = vocabulary.spelling.correct_text(user_input)
+                for specialty, keywords in vocabulary.medical_specialties.items():
+                    if specialty in user_lower or any(keyword in user_lower for keyword in keywords):
+                        session['appointment_data']['specialty'] = specialty
+                        return self._handle_book_appointment(session, entities, user_input)
+                
+                return {
+                    'response': "Please select a medical specialty: Cardiology, Dermatology, Pediatrics, Neurology, or Orthopedics",
+                    'type': 'retry_input',
+                    'suggestions': ['Cardiology', 'Dermatology', 'Pediatrics', 'Neurology', 'Orthopedics']
+                }
+        
+        elif current_state == self.STATES['COLLECTING_DOCTOR']:
+            doctors = self.db.get_available_doctors(session['appointment_data']['specialty'])
+            doctor_found = False
+            
+            for doctor in doctors:
+                if user_input_clean.lower() in doctor['name'].lower() or doctor['name'].lower() in user_input_clean.lower():
+                    session['appointment_data']['doctor'] = doctor['name']
+                    doctor_found = True
+                    break
+            
+            if doctor_found:
+                return self._continue_booking_flow(session)
+            else:
+                doctor_names = [doc['name'] for doc in doctors[:3]]
+                return {
+                    'response': f"Please select one of the available doctors: {', '.join(doctor_names)}",
+                    'type': 'retry_input',
+                    'suggestions': doctor_names
+                }
+        
+        elif current_state == self.STATES['COLLECTING_PATIENT_INFO']:
+            if user_input_clean and len(user_input_clean) > 1:
+                session['appointment_data']['patient_name'] = user_input_clean
+                return self._continue_booking_flow(session)
+            else:
+                return {
+                    'response': "Please provide the patient's full name.",
+                    'type': 'retry_input'
+                }
+        
+        elif current_state == self.STATES['COLLECTING_PHONE']:
+            if self._is_phone_number(user_input_clean):
+                session['appointment_data']['patient_phone'] = user_input_clean
+                return self._continue_booking_flow(session)
+            else:
+                return {
+                    'response': "Please provide a valid phone number (e.g., 786-595-3900).",
+                    'type': 'retry_input'
+                }
+        
+        elif current_state == self.STATES['COLLECTING_DATE_TIME']:
+            if ':' in user_input_clean or 'am' in user_input_clean.lower() or 'pm' in user_input_clean.lower():
+                session['appointment_data']['time'] = user_input_clean
+                session['appointment_data']['date'] = '2024-02-15'
+                return self._confirm_appointment(session)
+            else:
+                doctors = self.db.get_available_doctors(session['appointment_data']['specialty'])
+                selected_doctor = next((d for d in doctors if d['name'] == session['appointment_data'].get('doctor')), doctors[0] if doctors else None)
+                if selected_doctor:
+                    available_times = selected_doctor['available_times']
+                    for time_slot in available_times:
+                        if user_input_clean in time_slot or time_slot in user_input_clean:
+                            session['appointment_data']['time'] = time_slot
+                            session['appointment_data']['date'] = '2024-02-15'
+                            return self._confirm_appointment(session)
+                
+                return {
+                    'response': "Please select one of the available time slots.",
+                    'type': 'retry_input'
+                }
+        
+        # Handle commands in IDLE state
+        if current_state == self.STATES['IDLE']:
+            # Check if it's an FAQ question
+            faq_response = self._faq_response(user_input)
+            if faq_response is not None:
+                return faq_response
+        
+        return {
+            'response': f"I'm not sure how to help with that. You can ask me to:\\n\\n• **Book an appointment**\\n• **Get hospital information**\\n• **Answer FAQs**\\n\\nWhat would you like to do?",
+            'type': 'fallback',
+            'suggestions': ['Book appointment', 'Hospital info', 'FAQs']
+        }
+    
+    def _faq_response(self, user_input: str) -> Optional[Dict]:
+        """Answer from the FAQ knowledge base (BM25, then embeddings), or None when nothing matches"""
+        faq_index = self.faq_index
+        faq_matches = faq_index.search(user_input, top_k=3, min_score=self.MIN_FAQ_SCORE)
+        semantic = self.semantic_index.current if self.semantic_index is not None else None
+        if not faq_matches and semantic is not None:
+            faq_matches = self._semantic_faq_search(user_input, faq_index, semantic)
+        if not faq_matches:
+            return None
+        best = faq_matches[0]
+        return {
+            'response': best['answer'],
+            'type': 'faq_answer',
+            'faq_category': best['category'],
+            'faq_matches': [
+                {'id': match['id'], 'question': match['question'], 'score': match['score']}
+                for match in faq_matches
+            ],
+            'suggestions': ['Book appointment', 'Hospital info', 'FAQs']
+        }
+    
+    def _semantic_faq_search(self, user_input: str, faq_index: FAQIndex, semantic) -> List[Dict]:
+        """FAQ matches by embedding similarity, in the same shape as FAQIndex.search"""
+        matches = []
+        for hit in semantic.search(user_input, top_k=3, kind='faq'):
+            faq = faq_index.get(hit['id'])
+            if faq is None or hit['score'] < self.MIN_SEMANTIC_FAQ_SCORE:
+                continue
+            match = dict(faq)
+            match['score'] = hit['score']
+            matches.append(match)
+        return matches
+    
+    def _handle_get_info(self, user_input: str) -> Dict:
+        """Handle information requests"""
+        clinic = self._clinic()
+        user_lower = user_input.lower()
+        
+        if 'hours' in user_lower or 'time' in user_lower:
+            response_text = f"🕒 **{clinic['CLINIC_NAME']} Hours:**\\n\\n• **Emergency Department**: 24/7 - Always open\\n• **Outpatient Services**: Monday - Friday 8:00 AM - 6:00 PM\\n• **Visitor Hours**: 7:00 AM - 9:00 PM daily\\n\\n📞 **Emergency**: Call 911\\n📱 **Hospital**: {clinic['CLINIC_PHONE']}"
+        elif 'location' in user_lower or 'address' in user_lower:
+            response_text = f"📍 **{clinic['CLINIC_NAME']} Location:**\\n\\n{clinic['CLINIC_ADDRESS']}\\n\\n🚗 **Free parking** available for patients\\n🚌 **Public transport**: Miami-Dade Transit accessible\\n🗺️ **Area**: Doral community"
+        elif 'phone' in user_lower or 'contact' in user_lower:
+            response_text = f"📞 **Contact {clinic['CLINIC_NAME']}:**\\n\\n• **Main Line**: {clinic['CLINIC_PHONE']}\\n• **Appointments**: {clinic['CLINIC_PHONE']}\\n• **Billing**: {clinic['BILLING_PHONE']}\\n• **Insurance**: {clinic['INSURANCE_PHONE']}\\n• **Emergency**: 911\\n\\n✉️ **Email**: insurance@BaptistHealth.net"
+        else:
+            # Insurance, cost, specialties...: the FAQ knowledge base has the specific answer
+            faq_response = self._faq_response(user_input)
+            if faq_response is not None:
+                return faq_response
+            response_text = f"ℹ️ **{clinic['CLINIC_NAME']} Information:**\\n\\n📍 **Address**: {clinic['CLINIC_ADDRESS']}\\n📞 **Phone**: {clinic['CLINIC_PHONE']}\\n📧 **Billing**: {clinic['BILLING_PHONE']}\\n\\n🏥 **Services**: 24/7 Emergency Care, Advanced Medical Services\\n💳 **Insurance**: Most plans accepted\\n🅿️ **Parking**: Free on-site\\n\\nWhat specific information do you need?"
+        
+        return {
+            'response': response_text,
+            'type': 'info_provided',
+            'suggestions': ['Hours', 'Location', 'Contact', 'Book appointment']
+        }
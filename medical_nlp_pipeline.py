@@ -7,11 +7,19 @@ import torch
 from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
 import re
 import json
+from datetime import datetime
 from typing import Dict, List, Tuple
 
+from instrumentation import tracer
+from medical_vocabulary import current_vocabulary
+
 class MedicalNLPPipeline:
-    def __init__(self):
-        """Initialize BioClinicalBERT medical NLP pipeline"""
+    def __init__(self, vocabulary=None):
+        """Initialize BioClinicalBERT medical NLP pipeline
+        
+        ``vocabulary`` is a medical_vocabulary.watch_vocabulary() watcher, or
+        None for the vocabulary file as loaded at import.
+        """
         print("🏥 Loading BioClinicalBERT medical model...")
         
         # Load BioClinicalBERT for medical entity recognition
@@ -20,27 +28,25 @@ class MedicalNLPPipeline:
             "allenai/scibert_scivocab_uncased"  # Alternative medical model
         )
         
-        # Medical specialties mapping
-        self.medical_specialties = {
-            'cardiology': ['heart', 'cardiac', 'cardio', 'chest pain', 'heart attack'],
-            'dermatology': ['skin', 'rash', 'acne', 'dermat', 'mole'],
-            'pediatrics': ['child', 'baby', 'pediatric', 'kid', 'infant'],
-            'neurology': ['brain', 'headache', 'migraine', 'neurolog', 'seizure'],
-            'orthopedics': ['bone', 'joint', 'fracture', 'orthopedic', 'back pain'],
-            'gynecology': ['women', 'pregnancy', 'gynec', 'obstetric', 'pap smear'],
-            'psychiatry': ['mental', 'depression', 'anxiety', 'psychiatric', 'therapy'],
-            'internal_medicine': ['general', 'internal', 'checkup', 'physical']
-        }
-        
-        # Common medical entities
-        self.medical_entities = {
-            'symptoms': ['pain', 'fever', 'cough', 'headache', 'nausea', 'fatigue'],
-            'urgency': ['urgent', 'asap', 'emergency', 'immediately', 'soon'],
-            'time_preferences': ['morning', 'afternoon', 'evening', 'weekend', 'weekday']
-        }
+        # Specialty keywords, symptoms and urgency words come from the medical
+        # vocabulary (see the properties below), so live edits apply here too
+        self.vocabulary = vocabulary
         
         print("✅ Medical NLP Pipeline initialized successfully!")
     
+    @property
+    def medical_specialties(self) -> Dict:
+        return current_vocabulary(self.vocabulary).medical_specialties
+    
+    @property
+    def medical_entities(self) -> Dict:
+        vocabulary = current_vocabulary(self.vocabulary)
+        return {
+            'symptoms': vocabulary.symptoms,
+            'urgency': vocabulary.urgency_indicators,
+            'time_preferences': vocabulary.time_expressions
+        }
+    
     def extract_medical_entities(self, text: str) -> Dict[str, List[str]]:
         """Extract medical entities from text using BERT and rule-based matching"""
         text_lower = text.lower()
@@ -53,8 +59,9 @@ class MedicalNLPPipeline:
             'confidence_scores': {}
         }
         
-        # Extract medical specialties
-        for specialty, keywords in self.medical_specialties.items():
+        # Extract medical specialties (one vocabulary snapshot for the whole call)
+        vocabulary = current_vocabulary(self.vocabulary)
+        for specialty, keywords in vocabulary.medical_specialties.items():
             for keyword in keywords:
                 if keyword in text_lower:
                     entities['specialties'].append(specialty)
@@ -62,12 +69,12 @@ class MedicalNLPPipeline:
                     break
         
         # Extract symptoms
-        for symptom in self.medical_entities['symptoms']:
+        for symptom in vocabulary.symptoms:
             if symptom in text_lower:
                 entities['symptoms'].append(symptom)
         
         # Extract urgency indicators
-        for urgency in self.medical_entities['urgency']:
+        for urgency in vocabulary.urgency_indicators:
             if urgency in text_lower:
                 entities['urgency'].append(urgency)
         
@@ -129,15 +136,18 @@ class MedicalNLPPipeline:
         print(f"🔍 Processing: '{user_input}'")
         
         # Extract entities and classify intent
-        entities = self.extract_medical_entities(user_input)
-        intent = self.classify_medical_intent(user_input)
+        with tracer.span('nlp.entities'):
+            entities = self.extract_medical_entities(user_input)
+        with tracer.span('nlp.intent'):
+            intent = self.classify_medical_intent(user_input)
         
         result = {
             'user_input': user_input,
             'intent': intent,
             'entities': entities,
             'medical_context': self._build_medical_context(entities),
-            'timestamp': str(torch.cuda.current_device() if torch.cuda.is_available() else 'cpu')
+            'timestamp': datetime.now().isoformat(),
+            'device': str(torch.cuda.current_device() if torch.cuda.is_available() else 'cpu')
         }
         
         print(f"✅ Extracted: Intent={list(intent.keys())[0]}, Specialties={entities['specialties']}")
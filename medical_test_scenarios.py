@@ -4,10 +4,129 @@ Validates chatbot accuracy across medical use cases
 """
 
 import json
+import sys
 from typing import Dict, List, Tuple
 from datetime import datetime
 
 class MedicalTestRunner:
+    NLP_TEST_CASES = [
+        # Intent Classification Tests
+        ("I need to book an appointment with cardiology", "book_appointment", ["cardiology"]),
+        ("I want to schedule with a heart doctor", "book_appointment", ["cardiology"]),
+        ("I have chest pain and need help", "book_appointment", ["cardiology"]),
+        ("What are your clinic hours?", "get_info", []),
+        ("Where is your office located?", "get_info", []),
+        ("Check my appointments please", "check_appointment", []),
+        ("I want to cancel my appointment", "cancel_appointment", []),
+        ("Hello, can you help me?", "greeting", []),
+        
+        # Medical Entity Extraction Tests
+        ("I need dermatology for my skin rash", "book_appointment", ["dermatology"]),
+        ("My child has fever, need pediatrics", "book_appointment", ["pediatrics"]),
+        ("Headache getting worse, need neurology", "book_appointment", ["neurology"]),
+        ("Back pain issue, orthopedics appointment", "book_appointment", ["orthopedics"]),
+        ("Mental health consultation needed", "book_appointment", ["psychiatry"]),
+        ("General checkup with family doctor", "book_appointment", ["internal_medicine"]),
+        
+        # Complex Medical Queries
+        ("I have anxiety and depression, need therapy", "book_appointment", ["psychiatry"]),
+        ("Chest pain and shortness of breath urgent", "book_appointment", ["cardiology"]),
+        ("My baby has high fever and won't eat", "book_appointment", ["pediatrics"]),
+        ("Severe migraine, brain doctor needed", "book_appointment", ["neurology"]),
+    ]
+    
+    CONVERSATION_FLOW_SCENARIOS = [
+        {
+            'name': 'Complete Booking Flow - Cardiology',
+            'conversation': [
+                ("Hello", "greeting"),
+                ("I want to book an appointment", "specialty_selection"),
+                ("Cardiology", "doctor_selection"),
+                ("Dr. Garcia", "patient_info_collection"),
+                ("John Smith", "patient_info_collection"),
+                ("+1-555-123-4567", "time_selection"),
+                ("10:00", "booking_confirmation")
+            ]
+        },
+        {
+            'name': 'Information Request Flow',
+            'conversation': [
+                ("What are your hours?", "hours_info"),
+                ("Where are you located?", "location_info"),
+                ("Phone number?", "contact_info")
+            ]
+        },
+        {
+            'name': 'Medical Context Detection',
+            'conversation': [
+                ("I have chest pain", "doctor_selection"),  # Should detect cardiology
+                ("Dr. Garcia", "patient_info_collection"),
+                ("Sarah Johnson", "patient_info_collection"),
+                ("+1-555-999-8888", "time_selection")
+            ]
+        }
+    ]
+    
+    MEDICAL_SCENARIOS = [
+        {
+            'name': 'Chest Pain - Cardiology Route',
+            'input': "I have severe chest pain and need help",
+            'expected_specialty': 'cardiology',
+            'expected_urgency': True
+        },
+        {
+            'name': 'Child Fever - Pediatrics Route',
+            'input': "My 3-year-old has high fever",
+            'expected_specialty': 'pediatrics',
+            'expected_urgency': False
+        },
+        {
+            'name': 'Skin Rash - Dermatology Route',
+            'input': "I have a spreading rash on my arms",
+            'expected_specialty': 'dermatology',
+            'expected_urgency': False
+        },
+        {
+            'name': 'Mental Health - Psychiatry Route',
+            'input': "I'm dealing with anxiety and depression",
+            'expected_specialty': 'psychiatry',
+            'expected_urgency': False
+        },
+        {
+            'name': 'Back Pain - Orthopedics Route',
+            'input': "Chronic lower back pain getting worse",
+            'expected_specialty': 'orthopedics',
+            'expected_urgency': False
+        }
+    ]
+    
+    EMERGENCY_CASES = [
+        ("I'm having a heart attack!", True),
+        ("My chest pain is severe, emergency!", True),
+        ("I can't breathe properly", True),
+        ("Severe bleeding won't stop", True),
+        ("I think I'm having a stroke", True),
+        ("My baby isn't breathing", True),
+        ("Suicidal thoughts, need help", True),
+        
+        # Non-emergency cases
+        ("I have a mild headache", False),
+        ("Need a routine checkup", False),
+        ("Skin rash appeared yesterday", False),
+        ("Back pain for a few days", False),
+        ("Want to schedule vaccination", False)
+    ]
+    
+    ERROR_CASES = [
+        ("", "empty_input"),
+        ("asdfghjkl qwerty", "gibberish"),
+        ("Book appointment with aliens", "invalid_specialty"),
+        ("I want to see Dr. NonExistent", "invalid_doctor"),
+        ("🤖🚀💫", "emojis_only"),
+        ("a" * 1000, "extremely_long_input"),
+        ("Book appointment " * 50, "repetitive_input")
+    ]
+    
     def __init__(self, chatbot_engine, nlp_pipeline, database):
         """Initialize medical test runner"""
         self.chatbot = chatbot_engine
@@ -22,4 +141,625 @@ class MedicalTestRunner:
         print("🚀 Starting Comprehensive Medical Tests...")
         print("=" * 60)
         
-        all_results = {}\n        \n        # Test 1: NLP Accuracy\n        print(\"\\n🧠 Test 1: Medical NLP Accuracy\")\n        nlp_results = self._test_nlp_accuracy()\n        all_results['nlp_accuracy'] = nlp_results\n        \n        # Test 2: Conversation Flow\n        print(\"\\n💬 Test 2: Conversation Flow Management\")\n        flow_results = self._test_conversation_flows()\n        all_results['conversation_flows'] = flow_results\n        \n        # Test 3: Medical Scenario Handling\n        print(\"\\n🏥 Test 3: Medical Scenario Handling\")\n        scenario_results = self._test_medical_scenarios()\n        all_results['medical_scenarios'] = scenario_results\n        \n        # Test 4: Emergency Detection\n        print(\"\\n🚨 Test 4: Emergency Detection\")\n        emergency_results = self._test_emergency_detection()\n        all_results['emergency_detection'] = emergency_results\n        \n        # Test 5: Database Operations\n        print(\"\\n🗄️ Test 5: Database Operations\")\n        db_results = self._test_database_operations()\n        all_results['database_operations'] = db_results\n        \n        # Test 6: Error Handling\n        print(\"\\n⚠️ Test 6: Error Handling & Edge Cases\")\n        error_results = self._test_error_handling()\n        all_results['error_handling'] = error_results\n        \n        # Generate final report\n        final_report = self._generate_final_report(all_results)\n        all_results['final_report'] = final_report\n        \n        return all_results\n    \n    def _test_nlp_accuracy(self) -> Dict:\n        \"\"\"Test NLP accuracy for medical queries\"\"\"\n        test_cases = [\n            # Intent Classification Tests\n            (\"I need to book an appointment with cardiology\", \"book_appointment\", [\"cardiology\"]),\n            (\"I want to schedule with a heart doctor\", \"book_appointment\", [\"cardiology\"]),\n            (\"I have chest pain and need help\", \"book_appointment\", [\"cardiology\"]),\n            (\"What are your clinic hours?\", \"get_info\", []),\n            (\"Where is your office located?\", \"get_info\", []),\n            (\"Check my appointments please\", \"check_appointment\", []),\n            (\"I want to cancel my appointment\", \"cancel_appointment\", []),\n            (\"Hello, can you help me?\", \"greeting\", []),\n            \n            # Medical Entity Extraction Tests\n            (\"I need dermatology for my skin rash\", \"book_appointment\", [\"dermatology\"]),\n            (\"My child has fever, need pediatrics\", \"book_appointment\", [\"pediatrics\"]),\n            (\"Headache getting worse, need neurology\", \"book_appointment\", [\"neurology\"]),\n            (\"Back pain issue, orthopedics appointment\", \"book_appointment\", [\"orthopedics\"]),\n            (\"Mental health consultation needed\", \"book_appointment\", [\"psychiatry\"]),\n            (\"General checkup with family doctor\", \"book_appointment\", [\"internal_medicine\"]),\n            \n            # Complex Medical Queries\n            (\"I have anxiety and depression, need therapy\", \"book_appointment\", [\"psychiatry\"]),\n            (\"Chest pain and shortness of breath urgent\", \"book_appointment\", [\"cardiology\"]),\n            (\"My baby has high fever and won't eat\", \"book_appointment\", [\"pediatrics\"]),\n            (\"Severe migraine, brain doctor needed\", \"book_appointment\", [\"neurology\"]),\n        ]\n        \n        correct_intents = 0\n        correct_entities = 0\n        total_tests = len(test_cases)\n        \n        detailed_results = []\n        \n        for query, expected_intent, expected_specialties in test_cases:\n            nlp_result = self.nlp.process_query(query)\n            \n            # Check intent accuracy\n            intent_correct = nlp_result['intent'] == expected_intent\n            if intent_correct:\n                correct_intents += 1\n            \n            # Check entity extraction\n            entities_correct = True\n            if expected_specialties:\n                entities_correct = any(\n                    specialty in nlp_result['entities']['specialties'] \n                    for specialty in expected_specialties\n                )\n            if entities_correct:\n                correct_entities += 1\n            \n            detailed_results.append({\n                'query': query,\n                'expected_intent': expected_intent,\n                'actual_intent': nlp_result['intent'],\n                'expected_specialties': expected_specialties,\n                'actual_specialties': nlp_result['entities']['specialties'],\n                'intent_correct': intent_correct,\n                'entities_correct': entities_correct,\n                'overall_correct': intent_correct and entities_correct\n            })\n            \n            status = \"✅\" if (intent_correct and entities_correct) else \"❌\"\n            print(f\"{status} '{query[:40]}...' -> Intent: {nlp_result['intent']} | Entities: {nlp_result['entities']['specialties']}\")\n        \n        intent_accuracy = (correct_intents / total_tests) * 100\n        entity_accuracy = (correct_entities / total_tests) * 100\n        overall_accuracy = (sum(1 for r in detailed_results if r['overall_correct']) / total_tests) * 100\n        \n        print(f\"\\n📊 NLP Test Results:\")\n        print(f\"• Intent Accuracy: {intent_accuracy:.1f}% ({correct_intents}/{total_tests})\")\n        print(f\"• Entity Accuracy: {entity_accuracy:.1f}% ({correct_entities}/{total_tests})\")\n        print(f\"• Overall Accuracy: {overall_accuracy:.1f}%\")\n        \n        return {\n            'intent_accuracy': intent_accuracy,\n            'entity_accuracy': entity_accuracy,\n            'overall_accuracy': overall_accuracy,\n            'total_tests': total_tests,\n            'detailed_results': detailed_results\n        }\n    \n    def _test_conversation_flows(self) -> Dict:\n        \"\"\"Test conversation flow management\"\"\"\n        test_scenarios = [\n            {\n                'name': 'Complete Booking Flow - Cardiology',\n                'conversation': [\n                    (\"Hello\", \"greeting\"),\n                    (\"I want to book an appointment\", \"specialty_selection\"),\n                    (\"Cardiology\", \"doctor_selection\"),\n                    (\"Dr. Garcia\", \"patient_info_collection\"),\n                    (\"John Smith\", \"patient_info_collection\"),\n                    (\"+1-555-123-4567\", \"time_selection\"),\n                    (\"10:00\", \"booking_confirmation\")\n                ]\n            },\n            {\n                'name': 'Information Request Flow',\n                'conversation': [\n                    (\"What are your hours?\", \"hours_info\"),\n                    (\"Where are you located?\", \"location_info\"),\n                    (\"Phone number?\", \"contact_info\")\n                ]\n            },\n            {\n                'name': 'Medical Context Detection',\n                'conversation': [\n                    (\"I have chest pain\", \"doctor_selection\"),  # Should detect cardiology\n                    (\"Dr. Garcia\", \"patient_info_collection\"),\n                    (\"Sarah Johnson\", \"patient_info_collection\"),\n                    (\"+1-555-999-8888\", \"time_selection\")\n                ]\n            }\n        ]\n        \n        flow_results = []\n        total_steps = 0\n        correct_steps = 0\n        \n        for scenario in test_scenarios:\n            print(f\"\\n📋 Testing: {scenario['name']}\")\n            print(\"-\" * 40)\n            \n            session_id = f\"test_{scenario['name'].lower().replace(' ', '_')}\"\n            scenario_correct = 0\n            scenario_total = len(scenario['conversation'])\n            \n            for step, (message, expected_type) in enumerate(scenario['conversation'], 1):\n                response = self.chatbot.process_message(message, session_id)\n                \n                is_correct = response['type'] == expected_type\n                if is_correct:\n                    correct_steps += 1\n                    scenario_correct += 1\n                \n                total_steps += 1\n                \n                status = \"✅\" if is_correct else \"❌\"\n                print(f\"{status} Step {step}: '{message}' -> {response['type']} (expected: {expected_type})\")\n            \n            scenario_accuracy = (scenario_correct / scenario_total) * 100\n            flow_results.append({\n                'name': scenario['name'],\n                'accuracy': scenario_accuracy,\n                'correct_steps': scenario_correct,\n                'total_steps': scenario_total\n            })\n            \n            print(f\"📈 Scenario Accuracy: {scenario_accuracy:.1f}%\")\n        \n        overall_flow_accuracy = (correct_steps / total_steps) * 100\n        \n        print(f\"\\n📊 Conversation Flow Results:\")\n        print(f\"• Overall Flow Accuracy: {overall_flow_accuracy:.1f}% ({correct_steps}/{total_steps})\")\n        \n        return {\n            'overall_accuracy': overall_flow_accuracy,\n            'total_steps': total_steps,\n            'correct_steps': correct_steps,\n            'scenario_results': flow_results\n        }\n    \n    def _test_medical_scenarios(self) -> Dict:\n        \"\"\"Test specific medical scenarios\"\"\"\n        medical_scenarios = [\n            {\n                'name': 'Chest Pain - Cardiology Route',\n                'input': \"I have severe chest pain and need help\",\n                'expected_specialty': 'cardiology',\n                'expected_urgency': True\n            },\n            {\n                'name': 'Child Fever - Pediatrics Route',\n                'input': \"My 3-year-old has high fever\",\n                'expected_specialty': 'pediatrics',\n                'expected_urgency': False\n            },\n            {\n                'name': 'Skin Rash - Dermatology Route',\n                'input': \"I have a spreading rash on my arms\",\n                'expected_specialty': 'dermatology',\n                'expected_urgency': False\n            },\n            {\n                'name': 'Mental Health - Psychiatry Route',\n                'input': \"I'm dealing with anxiety and depression\",\n                'expected_specialty': 'psychiatry',\n                'expected_urgency': False\n            },\n            {\n                'name': 'Back Pain - Orthopedics Route',\n                'input': \"Chronic lower back pain getting worse\",\n                'expected_specialty': 'orthopedics',\n                'expected_urgency': False\n            }\n        ]\n        \n        scenario_results = []\n        correct_routing = 0\n        \n        for scenario in medical_scenarios:\n            nlp_result = self.nlp.process_query(scenario['input'])\n            response = self.chatbot.process_message(scenario['input'], f\"medical_test_{len(scenario_results)}\")\n            \n            # Check specialty routing\n            specialty_correct = scenario['expected_specialty'] in nlp_result['entities']['specialties']\n            \n            # Check urgency detection\n            urgency_detected = len(nlp_result['entities']['urgency']) > 0\n            urgency_correct = urgency_detected == scenario['expected_urgency']\n            \n            overall_correct = specialty_correct and urgency_correct\n            if overall_correct:\n                correct_routing += 1\n            \n            scenario_results.append({\n                'name': scenario['name'],\n                'input': scenario['input'],\n                'specialty_correct': specialty_correct,\n                'urgency_correct': urgency_correct,\n                'overall_correct': overall_correct,\n                'detected_specialties': nlp_result['entities']['specialties'],\n                'detected_urgency': nlp_result['entities']['urgency']\n            })\n            \n            status = \"✅\" if overall_correct else \"❌\"\n            print(f\"{status} {scenario['name']}: Specialty={specialty_correct}, Urgency={urgency_correct}\")\n        \n        routing_accuracy = (correct_routing / len(medical_scenarios)) * 100\n        \n        print(f\"\\n📊 Medical Scenario Results:\")\n        print(f\"• Medical Routing Accuracy: {routing_accuracy:.1f}% ({correct_routing}/{len(medical_scenarios)})\")\n        \n        return {\n            'routing_accuracy': routing_accuracy,\n            'total_scenarios': len(medical_scenarios),\n            'correct_routing': correct_routing,\n            'scenario_details': scenario_results\n        }\n    \n    def _test_emergency_detection(self) -> Dict:\n        \"\"\"Test emergency detection capabilities\"\"\"\n        emergency_cases = [\n            (\"I'm having a heart attack!\", True),\n            (\"My chest pain is severe, emergency!\", True),\n            (\"I can't breathe properly\", True),\n            (\"Severe bleeding won't stop\", True),\n            (\"I think I'm having a stroke\", True),\n            (\"My baby isn't breathing\", True),\n            (\"Suicidal thoughts, need help\", True),\n            \n            # Non-emergency cases\n            (\"I have a mild headache\", False),\n            (\"Need a routine checkup\", False),\n            (\"Skin rash appeared yesterday\", False),\n            (\"Back pain for a few days\", False),\n            (\"Want to schedule vaccination\", False)\n        ]\n        \n        correct_detections = 0\n        emergency_results = []\n        \n        for case, is_emergency in emergency_cases:\n            response = self.chatbot.process_message(case, f\"emergency_test_{len(emergency_results)}\")\n            \n            # Check if emergency was detected\n            emergency_detected = response['type'] == 'emergency_response'\n            \n            is_correct = emergency_detected == is_emergency\n            if is_correct:\n                correct_detections += 1\n            \n            emergency_results.append({\n                'input': case,\n                'expected_emergency': is_emergency,\n                'detected_emergency': emergency_detected,\n                'correct': is_correct,\n                'response_type': response['type']\n            })\n            \n            status = \"✅\" if is_correct else \"❌\"\n            emergency_status = \"🚨\" if emergency_detected else \"😌\"\n            print(f\"{status} {emergency_status} '{case}' -> Emergency: {emergency_detected}\")\n        \n        emergency_accuracy = (correct_detections / len(emergency_cases)) * 100\n        \n        print(f\"\\n📊 Emergency Detection Results:\")\n        print(f\"• Emergency Detection Accuracy: {emergency_accuracy:.1f}% ({correct_detections}/{len(emergency_cases)})\")\n        \n        return {\n            'accuracy': emergency_accuracy,\n            'total_cases': len(emergency_cases),\n            'correct_detections': correct_detections,\n            'detailed_results': emergency_results\n        }\n    \n    def _test_database_operations(self) -> Dict:\n        \"\"\"Test database operations\"\"\"\n        db_test_results = {\n            'connection_test': False,\n            'doctor_retrieval': False,\n            'appointment_booking': False,\n            'appointment_retrieval': False,\n            'data_persistence': False\n        }\n        \n        try:\n            # Test 1: Database Connection\n            self.db.cursor.execute(\"SELECT COUNT(*) FROM doctors\")\n            doctor_count = self.db.cursor.fetchone()[0]\n            if doctor_count > 0:\n                db_test_results['connection_test'] = True\n                print(\"✅ Database connection successful\")\n            \n            # Test 2: Doctor Retrieval\n            doctors = self.db.get_available_doctors('cardiology')\n            if doctors:\n                db_test_results['doctor_retrieval'] = True\n                print(\"✅ Doctor retrieval working\")\n            \n            # Test 3: Appointment Booking\n            test_appointment = {\n                'name': 'Test Patient DB',\n                'phone': '+1-test-db-123',\n                'doctor': 'Dr. Garcia',\n                'specialty': 'cardiology',\n                'date': '2024-02-20',\n                'time': '10:00',\n                'symptoms': 'test symptoms'\n            }\n            \n            booking_result = self.db.book_appointment(test_appointment)\n            if booking_result['success']:\n                db_test_results['appointment_booking'] = True\n                test_appointment_id = booking_result['appointment_id']\n                print(\"✅ Appointment booking successful\")\n                \n                # Test 4: Appointment Retrieval\n                appointments = self.db.get_patient_appointments('Test Patient DB', '+1-test-db-123')\n                if appointments:\n                    db_test_results['appointment_retrieval'] = True\n                    print(\"✅ Appointment retrieval working\")\n                    \n                    # Test 5: Data Persistence\n                    if appointments[0]['doctor_name'] == 'Dr. Garcia':\n                        db_test_results['data_persistence'] = True\n                        print(\"✅ Data persistence verified\")\n        \n        except Exception as e:\n            print(f\"❌ Database error: {e}\")\n        \n        success_count = sum(db_test_results.values())\n        db_accuracy = (success_count / len(db_test_results)) * 100\n        \n        print(f\"\\n📊 Database Test Results:\")\n        print(f\"• Database Operations: {db_accuracy:.1f}% ({success_count}/{len(db_test_results)})\")\n        \n        return {\n            'accuracy': db_accuracy,\n            'successful_operations': success_count,\n            'total_operations': len(db_test_results),\n            'detailed_results': db_test_results\n        }\n    \n    def _test_error_handling(self) -> Dict:\n        \"\"\"Test error handling and edge cases\"\"\"\n        error_cases = [\n            (\"\", \"empty_input\"),\n            (\"asdfghjkl qwerty\", \"gibberish\"),\n            (\"Book appointment with aliens\", \"invalid_specialty\"),\n            (\"I want to see Dr. NonExistent\", \"invalid_doctor\"),\n            (\"🤖🚀💫\", \"emojis_only\"),\n            (\"a\" * 1000, \"extremely_long_input\"),\n            (\"Book appointment \" * 50, \"repetitive_input\")\n        ]\n        \n        handled_errors = 0\n        error_results = []\n        \n        for error_input, error_type in error_cases:\n            try:\n                response = self.chatbot.process_message(error_input, f\"error_test_{len(error_results)}\")\n                \n                # Check if response was provided\n                response_provided = 'response' in response and response['response']\n                \n                # Check if it's a graceful fallback\n                graceful_fallback = response.get('type') in ['fallback', 'specialty_clarification', 'error']\n                \n                if response_provided and graceful_fallback:\n                    handled_errors += 1\n                    status = \"✅\"\n                else:\n                    status = \"❌\"\n                \n                error_results.append({\n                    'input': error_input[:50] + \"...\" if len(error_input) > 50 else error_input,\n                    'error_type': error_type,\n                    'response_provided': response_provided,\n                    'graceful_fallback': graceful_fallback,\n                    'handled_correctly': response_provided and graceful_fallback\n                })\n                \n                print(f\"{status} {error_type}: Response provided and handled gracefully\")\n                \n            except Exception as e:\n                error_results.append({\n                    'input': error_input[:50] + \"...\" if len(error_input) > 50 else error_input,\n                    'error_type': error_type,\n                    'exception': str(e),\n                    'handled_correctly': False\n                })\n                print(f\"❌ {error_type}: Exception occurred - {e}\")\n        \n        error_handling_rate = (handled_errors / len(error_cases)) * 100\n        \n        print(f\"\\n📊 Error Handling Results:\")\n        print(f\"• Error Handling Rate: {error_handling_rate:.1f}% ({handled_errors}/{len(error_cases)})\")\n        \n        return {\n            'handling_rate': error_handling_rate,\n            'handled_errors': handled_errors,\n            'total_error_cases': len(error_cases),\n            'detailed_results': error_results\n        }\n    \n    def _generate_final_report(self, all_results: Dict) -> Dict:\n        \"\"\"Generate comprehensive final test report\"\"\"\n        print(\"\\n\" + \"=\" * 60)\n        print(\"🎯 COMPREHENSIVE TEST REPORT\")\n        print(\"=\" * 60)\n        \n        # Calculate overall scores\n        scores = {\n            'NLP Accuracy': all_results['nlp_accuracy']['overall_accuracy'],\n            'Conversation Flows': all_results['conversation_flows']['overall_accuracy'],\n            'Medical Scenarios': all_results['medical_scenarios']['routing_accuracy'],\n            'Emergency Detection': all_results['emergency_detection']['accuracy'],\n            'Database Operations': all_results['database_operations']['accuracy'],\n            'Error Handling': all_results['error_handling']['handling_rate']\n        }\n        \n        overall_score = sum(scores.values()) / len(scores)\n        \n        print(f\"\\n📊 INDIVIDUAL COMPONENT SCORES:\")\n        for component, score in scores.items():\n            print(f\"• {component:<20}: {score:>6.1f}%\")\n        \n        print(f\"\\n🎯 OVERALL SYSTEM SCORE: {overall_score:.1f}%\")\n        \n        # Performance Assessment\n        if overall_score >= 85:\n            grade = \"EXCELLENT 🌟\"\n            assessment = \"System exceeds production requirements!\"\n        elif overall_score >= 75:\n            grade = \"VERY GOOD 👍\"\n            assessment = \"System meets production standards with minor optimizations needed\"\n        elif overall_score >= 60:\n            grade = \"GOOD ✅\"\n            assessment = \"System functional, some improvements recommended\"\n        else:\n            grade = \"NEEDS IMPROVEMENT ⚠️\"\n            assessment = \"System requires significant enhancements\"\n        \n        print(f\"\\n🏆 GRADE: {grade}\")\n        print(f\"💡 ASSESSMENT: {assessment}\")\n        \n        # Detailed Statistics\n        print(f\"\\n📈 DETAILED STATISTICS:\")\n        print(f\"• Total NLP Tests: {all_results['nlp_accuracy']['total_tests']}\")\n        print(f\"• Total Conversation Steps: {all_results['conversation_flows']['total_steps']}\")\n        print(f\"• Medical Scenarios Tested: {all_results['medical_scenarios']['total_scenarios']}\")\n        print(f\"• Emergency Cases Tested: {all_results['emergency_detection']['total_cases']}\")\n        print(f\"• Database Operations: {all_results['database_operations']['total_operations']}\")\n        print(f\"• Error Cases Handled: {all_results['error_handling']['handled_errors']}/{all_results['error_handling']['total_error_cases']}\")\n        \n        # Recommendations\n        recommendations = []\n        if scores['NLP Accuracy'] < 80:\n            recommendations.append(\"Enhance NLP training data with more medical variations\")\n        if scores['Emergency Detection'] < 90:\n            recommendations.append(\"Expand emergency keyword detection patterns\")\n        if scores['Error Handling'] < 85:\n            recommendations.append(\"Improve graceful error handling for edge cases\")\n        \n        if recommendations:\n            print(f\"\\n🔧 RECOMMENDATIONS:\")\n            for i, rec in enumerate(recommendations, 1):\n                print(f\"{i}. {rec}\")\n        \n        return {\n            'overall_score': overall_score,\n            'component_scores': scores,\n            'grade': grade,\n            'assessment': assessment,\n            'recommendations': recommendations,\n            'test_timestamp': datetime.now().isoformat(),\n            'total_tests_run': sum([\n                all_results['nlp_accuracy']['total_tests'],\n                all_results['conversation_flows']['total_steps'],\n                all_results['medical_scenarios']['total_scenarios'],\n                all_results['emergency_detection']['total_cases'],\n                all_results['database_operations']['total_operations'],\n                all_results['error_handling']['total_error_cases']\n            ])\n        }\n\nif __name__ == \"__main__\":\n    print(\"🧪 Medical Test Scenarios - Comprehensive Validation Suite\")\n    print(\"Features: NLP testing, conversation flows, medical scenarios, emergency detection\")
\ No newline at end of file
+        all_results = {}
+        
+        # Test 1: NLP Accuracy
+        print("\n🧠 Test 1: Medical NLP Accuracy")
+        nlp_results = self._test_nlp_accuracy()
+        all_results['nlp_accuracy'] = nlp_results
+        
+        # Test 2: Conversation Flow
+        print("\n💬 Test 2: Conversation Flow Management")
+        flow_results = self._test_conversation_flows()
+        all_results['conversation_flows'] = flow_results
+        
+        # Test 3: Medical Scenario Handling
+        print("\n🏥 Test 3: Medical Scenario Handling")
+        scenario_results = self._test_medical_scenarios()
+        all_results['medical_scenarios'] = scenario_results
+        
+        # Test 4: Emergency Detection
+        print("\n🚨 Test 4: Emergency Detection")
+        emergency_results = self._test_emergency_detection()
+        all_results['emergency_detection'] = emergency_results
+        
+        # Test 5: Database Operations
+        print("\n🗄️ Test 5: Database Operations")
+        db_results = self._test_database_operations()
+        all_results['database_operations'] = db_results
+        
+        # Test 6: Error Handling
+        print("\n⚠️ Test 6: Error Handling & Edge Cases")
+        error_results = self._test_error_handling()
+        all_results['error_handling'] = error_results
+        
+        # Generate final report
+        final_report = self._generate_final_report(all_results)
+        all_results['final_report'] = final_report
+        
+        return all_results
+    
+    def _test_nlp_accuracy(self, test_cases: List = None) -> Dict:
+        """Test NLP accuracy for medical queries"""
+        test_cases = self.NLP_TEST_CASES if test_cases is None else test_cases
+        
+        correct_intents = 0
+        correct_entities = 0
+        total_tests = len(test_cases)
+        
+        detailed_results = []
+        
+        for query, expected_intent, expected_specialties in test_cases:
+            nlp_result = self.nlp.process_query(query)
+            
+            # Check intent accuracy
+            intent_correct = nlp_result['intent'] == expected_intent
+            if intent_correct:
+                correct_intents += 1
+            
+            # Check entity extraction
+            entities_correct = True
+            if expected_specialties:
+                entities_correct = any(
+                    specialty in nlp_result['entities']['specialties'] 
+                    for specialty in expected_specialties
+                )
+            if entities_correct:
+                correct_entities += 1
+            
+            detailed_results.append({
+                'query': query,
+                'expected_intent': expected_intent,
+                'actual_intent': nlp_result['intent'],
+                'expected_specialties': expected_specialties,
+                'actual_specialties': nlp_result['entities']['specialties'],
+                'intent_correct': intent_correct,
+                'entities_correct': entities_correct,
+                'overall_correct': intent_correct and entities_correct
+            })
+            
+            status = "✅" if (intent_correct and entities_correct) else "❌"
+            print(f"{status} '{query[:40]}...' -> Intent: {nlp_result['intent']} | Entities: {nlp_result['entities']['specialties']}")
+        
+        intent_accuracy = (correct_intents / total_tests) * 100
+        entity_accuracy = (correct_entities / total_tests) * 100
+        overall_accuracy = (sum(1 for r in detailed_results if r['overall_correct']) / total_tests) * 100
+        
+        print(f"\n📊 NLP Test Results:")
+        print(f"• Intent Accuracy: {intent_accuracy:.1f}% ({correct_intents}/{total_tests})")
+        print(f"• Entity Accuracy: {entity_accuracy:.1f}% ({correct_entities}/{total_tests})")
+        print(f"• Overall Accuracy: {overall_accuracy:.1f}%")
+        
+        return {
+            'intent_accuracy': intent_accuracy,
+            'entity_accuracy': entity_accuracy,
+            'overall_accuracy': overall_accuracy,
+            'total_tests': total_tests,
+            'detailed_results': detailed_results
+        }
+    
+    def _test_conversation_flows(self, test_scenarios: List = None) -> Dict:
+        """Test conversation flow management"""
+        test_scenarios = self.CONVERSATION_FLOW_SCENARIOS if test_scenarios is None else test_scenarios
+        
+        flow_results = []
+        total_steps = 0
+        correct_steps = 0
+        
+        for scenario in test_scenarios:
+            print(f"\n📋 Testing: {scenario['name']}")
+            print("-" * 40)
+            
+            session_id = f"test_{scenario['name'].lower().replace(' ', '_')}"
+            scenario_correct = 0
+            scenario_total = len(scenario['conversation'])
+            
+            for step, (message, expected_type) in enumerate(scenario['conversation'], 1):
+                response = self.chatbot.process_message(message, session_id)
+                
+                is_correct = response['type'] == expected_type
+                if is_correct:
+                    correct_steps += 1
+                    scenario_correct += 1
+                
+                total_steps += 1
+                
+                status = "✅" if is_correct else "❌"
+                print(f"{status} Step {step}: '{message}' -> {response['type']} (expected: {expected_type})")
+            
+            scenario_accuracy = (scenario_correct / scenario_total) * 100
+            flow_results.append({
+                'name': scenario['name'],
+                'accuracy': scenario_accuracy,
+                'correct_steps': scenario_correct,
+                'total_steps': scenario_total
+            })
+            
+            print(f"📈 Scenario Accuracy: {scenario_accuracy:.1f}%")
+        
+        overall_flow_accuracy = (correct_steps / total_steps) * 100
+        
+        print(f"\n📊 Conversation Flow Results:")
+        print(f"• Overall Flow Accuracy: {overall_flow_accuracy:.1f}% ({correct_steps}/{total_steps})")
+        
+        return {
+            'overall_accuracy': overall_flow_accuracy,
+            'total_steps': total_steps,
+            'correct_steps': correct_steps,
+            'scenario_results': flow_results
+        }
+    
+    def _test_medical_scenarios(self, medical_scenarios: List = None) -> Dict:
+        """Test specific medical scenarios"""
+        medical_scenarios = self.MEDICAL_SCENARIOS if medical_scenarios is None else medical_scenarios
+        
+        scenario_results = []
+        correct_routing = 0
+        
+        for scenario in medical_scenarios:
+            nlp_result = self.nlp.process_query(scenario['input'])
+            response = self.chatbot.process_message(scenario['input'], f"medical_test_{len(scenario_results)}")
+            
+            # Check specialty routing
+            specialty_correct = scenario['expected_specialty'] in nlp_result['entities']['specialties']
+            
+            # Check urgency detection
+            urgency_detected = len(nlp_result['entities']['urgency']) > 0
+            urgency_correct = urgency_detected == scenario['expected_urgency']
+            
+            overall_correct = specialty_correct and urgency_correct
+            if overall_correct:
+                correct_routing += 1
+            
+            scenario_results.append({
+                'name': scenario['name'],
+                'input': scenario['input'],
+                'specialty_correct': specialty_correct,
+                'urgency_correct': urgency_correct,
+                'overall_correct': overall_correct,
+                'detected_specialties': nlp_result['entities']['specialties'],
+                'detected_urgency': nlp_result['entities']['urgency']
+            })
+            
+            status = "✅" if overall_correct else "❌"
+            print(f"{status} {scenario['name']}: Specialty={specialty_correct}, Urgency={urgency_correct}")
+        
+        routing_accuracy = (correct_routing / len(medical_scenarios)) * 100
+        
+        print(f"\n📊 Medical Scenario Results:")
+        print(f"• Medical Routing Accuracy: {routing_accuracy:.1f}% ({correct_routing}/{len(medical_scenarios)})")
+        
+        return {
+            'routing_accuracy': routing_accuracy,
+            'total_scenarios': len(medical_scenarios),
+            'correct_routing': correct_routing,
+            'scenario_details': scenario_results
+        }
+    
+    def _test_emergency_detection(self, emergency_cases: List = None) -> Dict:
+        """Test emergency detection capabilities"""
+        emergency_cases = self.EMERGENCY_CASES if emergency_cases is None else emergency_cases
+        
+        correct_detections = 0
+        emergency_results = []
+        
+        for case, is_emergency in emergency_cases:
+            response = self.chatbot.process_message(case, f"emergency_test_{len(emergency_results)}")
+            
+            # Check if emergency was detected
+            emergency_detected = response['type'] == 'emergency_response'
+            
+            is_correct = emergency_detected == is_emergency
+            if is_correct:
+                correct_detections += 1
+            
+            emergency_results.append({
+                'input': case,
+                'expected_emergency': is_emergency,
+                'detected_emergency': emergency_detected,
+                'correct': is_correct,
+                'response_type': response['type']
+            })
+            
+            status = "✅" if is_correct else "❌"
+            emergency_status = "🚨" if emergency_detected else "😌"
+            print(f"{status} {emergency_status} '{case}' -> Emergency: {emergency_detected}")
+        
+        emergency_accuracy = (correct_detections / len(emergency_cases)) * 100
+        
+        print(f"\n📊 Emergency Detection Results:")
+        print(f"• Emergency Detection Accuracy: {emergency_accuracy:.1f}% ({correct_detections}/{len(emergency_cases)})")
+        
+        return {
+            'accuracy': emergency_accuracy,
+            'total_cases': len(emergency_cases),
+            'correct_detections': correct_detections,
+            'detailed_results': emergency_results
+        }
+    
+    def _test_database_operations(self) -> Dict:
+        """Test database operations"""
+        db_test_results = {
+            'connection_test': False,
+            'doctor_retrieval': False,
+            'appointment_booking': False,
+            'appointment_retrieval': False,
+            'data_persistence': False
+        }
+        
+        try:
+            # Test 1: Database Connection
+            self.db.cursor.execute("SELECT COUNT(*) FROM doctors")
+            doctor_count = self.db.cursor.fetchone()[0]
+            if doctor_count > 0:
+                db_test_results['connection_test'] = True
+                print("✅ Database connection successful")
+            
+            # Test 2: Doctor Retrieval
+            doctors = self.db.get_available_doctors('cardiology')
+            if doctors:
+                db_test_results['doctor_retrieval'] = True
+                print("✅ Doctor retrieval working")
+            
+            # Test 3: Appointment Booking
+            test_appointment = {
+                'name': 'Test Patient DB',
+                'phone': '+1-test-db-123',
+                'doctor': 'Dr. Garcia',
+                'specialty': 'cardiology',
+                'date': '2024-02-20',
+                'time': '10:00',
+                'symptoms': 'test symptoms'
+            }
+            
+            booking_result = self.db.book_appointment(test_appointment)
+            if booking_result['success']:
+                db_test_results['appointment_booking'] = True
+                test_appointment_id = booking_result['appointment_id']
+                print("✅ Appointment booking successful")
+                
+                # Test 4: Appointment Retrieval
+                appointments = self.db.get_patient_appointments('Test Patient DB', '+1-test-db-123')
+                if appointments:
+                    db_test_results['appointment_retrieval'] = True
+                    print("✅ Appointment retrieval working")
+                    
+                    # Test 5: Data Persistence
+                    if appointments[0]['doctor_name'] == 'Dr. Garcia':
+                        db_test_results['data_persistence'] = True
+                        print("✅ Data persistence verified")
+        
+        except Exception as e:
+            print(f"❌ Database error: {e}")
+        
+        success_count = sum(db_test_results.values())
+        db_accuracy = (success_count / len(db_test_results)) * 100
+        
+        print(f"\n📊 Database Test Results:")
+        print(f"• Database Operations: {db_accuracy:.1f}% ({success_count}/{len(db_test_results)})")
+        
+        return {
+            'accuracy': db_accuracy,
+            'successful_operations': success_count,
+            'total_operations': len(db_test_results),
+            'detailed_results': db_test_results
+        }
+    
+    def _test_error_handling(self, error_cases: List = None) -> Dict:
+        """Test error handling and edge cases"""
+        error_cases = self.ERROR_CASES if error_cases is None else error_cases
+        
+        handled_errors = 0
+        error_results = []
+        
+        for error_input, error_type in error_cases:
+            try:
+                response = self.chatbot.process_message(error_input, f"error_test_{len(error_results)}")
+                
+                # Check if response was provided
+                response_provided = 'response' in response and response['response']
+                
+                # Check if it's a graceful fallback
+                graceful_fallback = response.get('type') in ['fallback', 'specialty_clarification', 'error']
+                
+                if response_provided and graceful_fallback:
+                    handled_errors += 1
+                    status = "✅"
+                else:
+                    status = "❌"
+                
+                error_results.append({
+                    'input': error_input[:50] + "..." if len(error_input) > 50 else error_input,
+                    'error_type': error_type,
+                    'response_provided': response_provided,
+                    'graceful_fallback': graceful_fallback,
+                    'handled_correctly': response_provided and graceful_fallback
+                })
+                
+                print(f"{status} {error_type}: Response provided and handled gracefully")
+                
+            except Exception as e:
+                error_results.append({
+                    'input': error_input[:50] + "..." if len(error_input) > 50 else error_input,
+                    'error_type': error_type,
+                    'exception': str(e),
+                    'handled_correctly': False
+                })
+                print(f"❌ {error_type}: Exception occurred - {e}")
+        
+        error_handling_rate = (handled_errors / len(error_cases)) * 100
+        
+        print(f"\n📊 Error Handling Results:")
+        print(f"• Error Handling Rate: {error_handling_rate:.1f}% ({handled_errors}/{len(error_cases)})")
+        
+        return {
+            'handling_rate': error_handling_rate,
+            'handled_errors': handled_errors,
+            'total_error_cases': len(error_cases),
+            'detailed_results': error_results
+        }
+    
+    def _generate_final_report(self, all_results: Dict) -> Dict:
+        """Generate comprehensive final test report"""
+        print("\n" + "=" * 60)
+        print("🎯 COMPREHENSIVE TEST REPORT")
+        print("=" * 60)
+        
+        # Calculate overall scores
+        scores = {
+            'NLP Accuracy': all_results['nlp_accuracy']['overall_accuracy'],
+            'Conversation Flows': all_results['conversation_flows']['overall_accuracy'],
+            'Medical Scenarios': all_results['medical_scenarios']['routing_accuracy'],
+            'Emergency Detection': all_results['emergency_detection']['accuracy'],
+            'Database Operations': all_results['database_operations']['accuracy'],
+            'Error Handling': all_results['error_handling']['handling_rate']
+        }
+        
+        overall_score = sum(scores.values()) / len(scores)
+        
+        print(f"\n📊 INDIVIDUAL COMPONENT SCORES:")
+        for component, score in scores.items():
+            print(f"• {component:<20}: {score:>6.1f}%")
+        
+        print(f"\n🎯 OVERALL SYSTEM SCORE: {overall_score:.1f}%")
+        
+        # Performance Assessment
+        if overall_score >= 85:
+            grade = "EXCELLENT 🌟"
+            assessment = "System exceeds production requirements!"
+        elif overall_score >= 75:
+            grade = "VERY GOOD 👍"
+            assessment = "System meets production standards with minor optimizations needed"
+        elif overall_score >= 60:
+            grade = "GOOD ✅"
+            assessment = "System functional, some improvements recommended"
+        else:
+            grade = "NEEDS IMPROVEMENT ⚠️"
+            assessment = "System requires significant enhancements"
+        
+        print(f"\n🏆 GRADE: {grade}")
+        print(f"💡 ASSESSMENT: {assessment}")
+        
+        # Detailed Statistics
+        print(f"\n📈 DETAILED STATISTICS:")
+        print(f"• Total NLP Tests: {all_results['nlp_accuracy']['total_tests']}")
+        print(f"• Total Conversation Steps: {all_results['conversation_flows']['total_steps']}")
+        print(f"• Medical Scenarios Tested: {all_results['medical_scenarios']['total_scenarios']}")
+        print(f"• Emergency Cases Tested: {all_results['emergency_detection']['total_cases']}")
+        print(f"• Database Operations: {all_results['database_operations']['total_operations']}")
+        print(f"• Error Cases Handled: {all_results['error_handling']['handled_errors']}/{all_results['error_handling']['total_error_cases']}")
+        
+        # Recommendations
+        recommendations = []
+        if scores['NLP Accuracy'] < 80:
+            recommendations.append("Enhance NLP training data with more medical variations")
+        if scores['Emergency Detection'] < 90:
+            recommendations.append("Expand emergency keyword detection patterns")
+        if scores['Error Handling'] < 85:
+            recommendations.append("Improve graceful error handling for edge cases")
+        
+        if recommendations:
+            print(f"\n🔧 RECOMMENDATIONS:")
+            for i, rec in enumerate(recommendations, 1):
+                print(f"{i}. {rec}")
+        
+        return {
+            'overall_score': overall_score,
+            'component_scores': scores,
+            'grade': grade,
+            'assessment': assessment,
+            'recommendations': recommendations,
+            'test_timestamp': datetime.now().isoformat(),
+            'total_tests_run': sum([
+                all_results['nlp_accuracy']['total_tests'],
+                all_results['conversation_flows']['total_steps'],
+                all_results['medical_scenarios']['total_scenarios'],
+                all_results['emergency_detection']['total_cases'],
+                all_results['database_operations']['total_operations'],
+                all_results['error_handling']['total_error_cases']
+            ])
+        }
+
+# suite -> (result key in run_comprehensive_tests, runner method, case list attribute, passed(result))
+SUITES = {
+    'nlp': ('nlp_accuracy', '_test_nlp_accuracy', 'NLP_TEST_CASES',
+            lambda result: result['overall_accuracy'] == 100),
+    'flows': ('conversation_flows', '_test_conversation_flows', 'CONVERSATION_FLOW_SCENARIOS',
+              lambda result: result['correct_steps'] == result['total_steps']),
+    'medical': ('medical_scenarios', '_test_medical_scenarios', 'MEDICAL_SCENARIOS',
+                lambda result: result['correct_routing'] == result['total_scenarios']),
+    'emergency': ('emergency_detection', '_test_emergency_detection', 'EMERGENCY_CASES',
+                  lambda result: result['correct_detections'] == result['total_cases']),
+    'db': ('database_operations', '_test_database_operations', None,
+           lambda result: result['successful_operations'] == result['total_operations']),
+    'error': ('error_handling', '_test_error_handling', 'ERROR_CASES',
+              lambda result: result['handled_errors'] == result['total_error_cases'])
+}
+
+
+def scenario_units(suites: List[str] = None) -> List[Tuple[str, int]]:
+    """Every (suite, case index) to run, in suite then case order (index -1: the suite has no case list)"""
+    units = []
+    for suite in suites or SUITES:
+        cases_attribute = SUITES[suite][2]
+        if cases_attribute is None:
+            units.append((suite, -1))
+        else:
+            units.extend((suite, index) for index in range(len(getattr(MedicalTestRunner, cases_attribute))))
+    return units
+
+
+def _case_name(suite: str, index: int) -> str:
+    if index < 0:
+        return suite
+    case = getattr(MedicalTestRunner, SUITES[suite][2])[index]
+    if isinstance(case, dict):
+        return case['name']
+    label = case[1] if suite == 'error' else case[0]
+    return label[:60] if label else '(empty input)'
+
+
+def run_isolated_unit(unit: Tuple[str, int]) -> Dict:
+    """Run one scenario against its own in-memory database, NLP pipeline and engine
+
+    Module imports happen here so pool workers (fresh interpreters under the
+    spawn start method) load the chatbot only once each.
+    """
+    import contextlib
+    import io
+    import time
+    from medical_chatbot import HospitalDatabase, MedicalNLPPipeline
+    from conversation_flows import MedicalConversationEngine
+
+    suite, index = unit
+    _, method_name, cases_attribute, passed = SUITES[suite]
+    output = io.StringIO()
+    started = time.perf_counter()
+    result, error = None, None
+    with contextlib.redirect_stdout(output):
+        try:
+            database = HospitalDatabase(':memory:')
+            nlp_pipeline = MedicalNLPPipeline()
+            engine = MedicalConversationEngine(database, nlp_pipeline)
+            runner = MedicalTestRunner(engine, nlp_pipeline, database)
+            method = getattr(runner, method_name)
+            if cases_attribute is None:
+                result = method()
+            else:
+                result = method([getattr(MedicalTestRunner, cases_attribute)[index]])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    return {
+        'suite': suite,
+        'index': index,
+        'name': _case_name(suite, index),
+        'passed': error is None and passed(result),
+        'error': error,
+        'duration_s': round(time.perf_counter() - started, 6),
+        'result': result,
+        'output': output.getvalue()
+    }
+
+
+def run_parallel_tests(suites: List[str] = None, workers: int = None) -> List[Dict]:
+    """Every scenario isolated and fanned out over a process pool; results come back in unit order"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    units = scenario_units(suites)
+    if workers == 1:
+        return [run_isolated_unit(unit) for unit in units]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_isolated_unit, units, chunksize=max(1, len(units) // (4 * (workers or 4)))))
+
+
+def summarize_units(units: List[Dict]) -> Dict:
+    """Per-suite pass counts and the overall pass rate"""
+    suites = {}
+    for unit in units:
+        summary = suites.setdefault(unit['suite'], {'total': 0, 'passed': 0, 'failed': 0, 'duration_s': 0.0})
+        summary['total'] += 1
+        summary['passed' if unit['passed'] else 'failed'] += 1
+        summary['duration_s'] = round(summary['duration_s'] + unit['duration_s'], 6)
+    for summary in suites.values():
+        summary['pass_rate'] = round(summary['passed'] / summary['total'] * 100, 1)
+    total = len(units)
+    passed = sum(1 for unit in units if unit['passed'])
+    return {
+        'total': total,
+        'passed': passed,
+        'failed': total - passed,
+        'pass_rate': round(passed / total * 100, 1) if total else 0.0,
+        'suites': suites
+    }
+
+
+def write_junit_xml(units: List[Dict], path: str, elapsed: float = 0.0) -> None:
+    """JUnit XML with one <testsuite> per suite and one <testcase> per scenario"""
+    import xml.etree.ElementTree as ET
+
+    summary = summarize_units(units)
+    root = ET.Element('testsuites', name='medical_test_scenarios', tests=str(summary['total']),
+                      failures=str(summary['failed']), time=f"{elapsed:.3f}")
+    suite_elements = {}
+    for unit in units:
+        suite_summary = summary['suites'][unit['suite']]
+        element = suite_elements.get(unit['suite'])
+        if element is None:
+            element = suite_elements[unit['suite']] = ET.SubElement(
+                root, 'testsuite', name=unit['suite'], tests=str(suite_summary['total']),
+                failures=str(suite_summary['failed']), time=f"{suite_summary['duration_s']:.3f}"
+            )
+        case = ET.SubElement(element, 'testcase', classname=f"medical_test_scenarios.{unit['suite']}",
+                             name=f"{unit['index']:03d} {unit['name']}", time=f"{unit['duration_s']:.6f}")
+        if not unit['passed']:
+            message = unit['error'] or 'scenario did not meet its expectation'
+            failure = ET.SubElement(case, 'failure', message=message)
+            failure.text = json.dumps(unit['result'], indent=2, default=str) if unit['result'] else message
+        if unit['output']:
+            ET.SubElement(case, 'system-out').text = unit['output']
+
+    ET.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    print("🧪 Medical Test Scenarios - Comprehensive Validation Suite")
+    print("Features: NLP testing, conversation flows, medical scenarios, emergency detection")
+
+    parser = argparse.ArgumentParser(description="Run every medical scenario in isolation across a process pool")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES), help='Only these suites (repeatable)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count; 1 runs in-process)')
+    parser.add_argument('--junit', help='Write a JUnit XML report here')
+    parser.add_argument('--json', help='Write the per-scenario results JSON here')
+    parser.add_argument('--verbose', action='store_true', help='Print each scenario\'s captured output')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    units = run_parallel_tests(args.suite, args.workers)
+    elapsed = time.perf_counter() - started
+
+    for unit in units:
+        status = "✅" if unit['passed'] else "❌"
+        detail = f" ({unit['error']})" if unit['error'] else ""
+        print(f"{status} [{unit['suite']}] {unit['name']}{detail}")
+        if args.verbose or unit['error']:
+            print(unit['output'].rstrip())
+
+    summary = summarize_units(units)
+    print(f"\n📊 {summary['passed']}/{summary['total']} scenarios passed ({summary['pass_rate']}%) in {elapsed:.2f}s")
+    for suite, suite_summary in summary['suites'].items():
+        print(f"• {suite:<10}: {suite_summary['passed']}/{suite_summary['total']} ({suite_summary['pass_rate']}%)")
+
+    if args.junit:
+        write_junit_xml(units, args.junit, elapsed)
+        print(f"💾 JUnit report saved to {args.junit}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': datetime.now().isoformat(), 'elapsed_s': round(elapsed, 3),
+                       'summary': summary, 'scenarios': units}, f, indent=2, default=str)
+        print(f"💾 Results saved to {args.json}")
+
+    sys.exit(0 if summary['failed'] == 0 else 1)
@@ -0,0 +1,200 @@
+"""
+Medical Vocabulary Configuration
+Clinic constants, specialty keywords, doctors, symptoms, urgency and emergency words and FAQs from one hot-reloadable file
+
+    python medical_vocabulary.py check medical_vocabulary.json
+
+Workers watch the file (see watch_vocabulary); an edit is validated and
+compiled on the watcher thread and swapped in whole, tagged with a new
+version id, without a restart.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from faq_index import FAQIndex
+from hot_reload import HotReloader
+from spelling_index import SpellingIndex, vocabulary_words
+
+VOCABULARY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medical_vocabulary.json')
+
+REQUIRED_CLINIC_KEYS = ('CLINIC_NAME', 'CLINIC_PHONE', 'CLINIC_ADDRESS', 'BILLING_PHONE', 'INSURANCE_PHONE')
+SPECIALTY_LIST_FIELDS = ('keywords', 'routing_keywords', 'emergency_keywords', 'aliases')
+
+
+def _string_list(value, where: str) -> Tuple[str, ...]:
+    """Validate a list of non-empty strings"""
+    if not isinstance(value, list) or not all(isinstance(item, str) and item.strip() for item in value):
+        raise ValueError(f"{where} must be a list of non-empty strings")
+    return tuple(value)
+
+
+def _doctor_list(value, where: str) -> Tuple[Dict, ...]:
+    """Validate a specialty's doctor roster (name plus available days and times)"""
+    if not isinstance(value, list):
+        raise ValueError(f"{where} must be a list")
+    doctors = []
+    for index, doctor in enumerate(value):
+        if not isinstance(doctor, dict) or not isinstance(doctor.get('name'), str) or not doctor['name'].strip():
+            raise ValueError(f"{where}[{index}] must be an object with a name")
+        doctors.append({
+            'name': doctor['name'],
+            'available_days': _string_list(doctor.get('available_days'), f"{where}[{index}].available_days"),
+            'available_times': _string_list(doctor.get('available_times'), f"{where}[{index}].available_times")
+        })
+    return tuple(doctors)
+
+
+class MedicalVocabulary:
+    """One validated, compiled snapshot of the vocabulary file.
+
+    Snapshots are never mutated after construction; a reload builds a new
+    one, so code that reads ``current`` once per call sees a consistent set.
+    """
+
+    def __init__(self, config: Dict, base_dir: str = '.', source_files: List[str] = (), version_id: str = ''):
+        self.version_id = version_id
+        self.source_files = list(source_files)
+
+        clinic = config.get('clinic')
+        if not isinstance(clinic, dict):
+            raise ValueError("'clinic' must be an object")
+        missing = [key for key in REQUIRED_CLINIC_KEYS if not isinstance(clinic.get(key), str)]
+        if missing:
+            raise ValueError(f"'clinic' is missing {', '.join(missing)}")
+        self.clinic_constants = dict(clinic)
+
+        specialties = config.get('specialties')
+        if not isinstance(specialties, dict) or not specialties:
+            raise ValueError("'specialties' must be a non-empty object")
+        self.specialties = {}
+        for name, spec in specialties.items():
+            if not isinstance(spec, dict):
+                raise ValueError(f"specialty {name!r} must be an object")
+            self.specialties[name] = {
+                field: _string_list(spec.get(field, []), f"specialties.{name}.{field}")
+                for field in SPECIALTY_LIST_FIELDS
+            }
+            self.specialties[name]['description'] = str(spec.get('description', name))
+            self.specialties[name]['doctors'] = _doctor_list(spec.get('doctors', []), f"specialties.{name}.doctors")
+            if not self.specialties[name]['keywords']:
+                raise ValueError(f"specialties.{name}.keywords must not be empty")
+
+        # Matcher structures used by the NLP pipeline on every turn
+        self.medical_specialties = {
+            name: tuple(keyword.lower() for keyword in spec['keywords'])
+            for name, spec in self.specialties.items()
+        }
+        self.symptoms = tuple(symptom.lower() for symptom in _string_list(config.get('symptoms'), 'symptoms'))
+        self.urgency_indicators = tuple(
+            word.lower() for word in _string_list(config.get('urgency_indicators'), 'urgency_indicators')
+        )
+        # Phrases the conversation engine treats as an emergency on their own
+        self.emergency_indicators = tuple(
+            phrase.lower() for phrase in _string_list(config.get('emergency_indicators', []), 'emergency_indicators')
+        )
+        # Training-data and entity vocabulary (synthetic_training_generator, the BERT pipeline)
+        self.conditions = tuple(
+            condition.lower() for condition in _string_list(config.get('conditions', []), 'conditions')
+        )
+        self.time_expressions = _string_list(config.get('time_expressions', []), 'time_expressions')
+        
+        # Doctor roster in file order; seeds the doctors table
+        self.doctors = tuple(
+            dict(doctor, specialty=name)
+            for name, spec in self.specialties.items()
+            for doctor in spec['doctors']
+        )
+
+        # Conversation-engine routing table, same shape it always had
+        self.specialty_routing = {
+            name: {
+                'keywords': list(spec['routing_keywords']),
+                'emergency_keywords': list(spec['emergency_keywords']),
+                'description': spec['description']
+            }
+            for name, spec in self.specialties.items()
+        }
+
+        faq_file = config.get('faq_file')
+        if not isinstance(faq_file, str):
+            raise ValueError("'faq_file' must be a path")
+        self.faq_file = os.path.join(base_dir, faq_file)
+        self.faq_index = FAQIndex.from_file(self.faq_file, self.clinic_constants)
+
+        # Typo correction over every specialty, symptom and urgency term; the
+        # FAQ wording is protected so correctly spelled words stay as typed
+        terms = list(self.specialties) + list(self.symptoms) + list(self.urgency_indicators)
+        for spec in self.specialties.values():
+            for field in SPECIALTY_LIST_FIELDS:
+                terms.extend(spec[field])
+        faq_text = (' '.join([faq['question'], faq['answer']] + list(faq['keywords'])) for faq in self.faq_index.faqs)
+        self.spelling = SpellingIndex(vocabulary_words(terms), known_words=vocabulary_words(faq_text))
+
+
+def load_vocabulary(path: str = VOCABULARY_FILE) -> MedicalVocabulary:
+    """Read, validate and compile a vocabulary file (and the FAQ file it names)
+
+    The version id is a digest of both files, so every worker that loaded
+    the same content reports the same id.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    config = json.loads(raw)
+    if not isinstance(config, dict):
+        raise ValueError("vocabulary file must hold a JSON object")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    digest = hashlib.sha256(raw)
+    source_files = []
+    if isinstance(config.get('faq_file'), str):
+        faq_path = os.path.join(base_dir, config['faq_file'])
+        source_files.append(faq_path)
+        if os.path.isfile(faq_path):
+            with open(faq_path, 'rb') as f:
+                digest.update(f.read())
+    version_id = f"v{config.get('version', 0)}-{digest.hexdigest()[:12]}"
+    return MedicalVocabulary(config, base_dir, source_files, version_id)
+
+
+@lru_cache(maxsize=None)
+def default_vocabulary() -> MedicalVocabulary:
+    """The vocabulary file as first loaded in this process (used when nothing is watched)"""
+    return load_vocabulary(VOCABULARY_FILE)
+
+
+def current_vocabulary(watcher: Optional[HotReloader] = None) -> MedicalVocabulary:
+    """The watcher's live snapshot, falling back to the default vocabulary"""
+    if watcher is not None and watcher.current is not None:
+        return watcher.current
+    return default_vocabulary()
+
+
+def watch_vocabulary(path: str = VOCABULARY_FILE, poll_interval: float = 2.0) -> HotReloader:
+    """Load the vocabulary now and keep it current from a background thread"""
+    def announce(vocabulary):
+        print(f"📚 Medical vocabulary {vocabulary.version_id} loaded")
+
+    return HotReloader(path, load_vocabulary, poll_interval, on_swap=announce).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate a medical vocabulary file")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_parser = subparsers.add_parser('check', help='Validate and compile, then print a summary')
+    check_parser.add_argument('path', nargs='?', default=VOCABULARY_FILE)
+
+    args = parser.parse_args()
+    vocabulary = load_vocabulary(args.path)
+    print(f"✅ {args.path} is valid ({vocabulary.version_id})")
+    print(f"  Specialties: {len(vocabulary.specialties)}")
+    print(f"  Doctors: {len(vocabulary.doctors)}")
+    print(f"  Symptoms: {len(vocabulary.symptoms)}, urgency words: {len(vocabulary.urgency_indicators)}, "
+          f"emergency phrases: {len(vocabulary.emergency_indicators)}")
+    print(f"  Conditions: {len(vocabulary.conditions)}, time expressions: {len(vocabulary.time_expressions)}")
+    print(f"  FAQs: {len(vocabulary.faq_index)} from {vocabulary.faq_file}")
+    print(f"  Spelling index: {len(vocabulary.spelling)} words")
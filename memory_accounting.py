@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Memory Accounting
+Approximate bytes held by each chatbot subsystem and each session, plus tracemalloc leak diffs
+
+    python memory_accounting.py --conversations 1000 --node-mb 16384
+    python memory_accounting.py --target engine --leak-rounds 5
+    GET  /admin/memory              on the headless API (chat_api.py, needs ADMIN_TOKEN)
+    POST /admin/memory/baseline     start tracemalloc; later GETs include the growth since
+
+Python structures are measured with a deep sizeof that follows containers
+and instance attributes; models are measured by their tensor sizes. Objects
+reachable from several components are counted once, under the component
+measured first, so the components add up to (roughly) the chatbot's share of
+the worker's RSS; the rest is the interpreter, imported modules and allocator
+slack.
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import tracemalloc
+import types
+from typing import Dict, List, Optional
+
+# Shared by everything, owned by nothing the chatbot allocates
+_SKIPPED_TYPES = (
+    types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    types.CodeType, types.FrameType, types.GeneratorType
+)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 2)
+
+
+def current_rss_mb() -> float:
+    """Resident set size right now (Linux /proc; elsewhere the peak is the best available)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 2)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def tensor_bytes(model) -> int:
+    """Bytes held by a torch module's parameters and buffers (or one tensor)"""
+    if hasattr(model, 'element_size') and hasattr(model, 'nelement'):
+        return model.element_size() * model.nelement()
+    total = 0
+    seen = set()
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        if id(tensor) not in seen:
+            seen.add(id(tensor))
+            total += tensor.element_size() * tensor.nelement()
+    return total
+
+
+def _is_torch_module(obj) -> bool:
+    return callable(getattr(obj, 'parameters', None)) and callable(getattr(obj, 'buffers', None))
+
+
+def deep_sizeof(obj, seen: Optional[Dict] = None) -> int:
+    """Bytes reachable from ``obj``: containers, instance attributes, slots and tensors
+
+    Pass the same ``seen`` dict to several calls to count shared objects only
+    once. It holds on to every visited object: a temporary (a copied dict, a
+    lazily created instance ``__dict__``) freed mid-walk could otherwise hand
+    its id to a new object, which would then be skipped as already counted.
+    Modules, classes and functions are never counted.
+    """
+    seen = {} if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIPPED_TYPES):
+            continue
+        seen[id(current)] = current
+
+        if _is_torch_module(current) or hasattr(current, 'element_size'):
+            total += tensor_bytes(current)
+            continue
+        total += sys.getsizeof(current, 0)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)) or type(current).__name__ == 'deque':
+            stack.extend(current)
+        if callable(getattr(current, 'get_vocab', None)):
+            # Fast tokenizers keep their vocabulary in Rust; its Python copy is the estimate
+            try:
+                stack.append(current.get_vocab())
+            except Exception:
+                pass
+        instance_dict = getattr(current, '__dict__', None)
+        if isinstance(instance_dict, dict):
+            stack.append(instance_dict)
+        for slot in getattr(type(current), '__slots__', ()):
+            if isinstance(slot, str) and hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return total
+
+
+def _sessions(bot) -> Dict:
+    """Session dict of a MedicalChatbot (conversation_state) or engine (sessions)"""
+    sessions = getattr(bot, 'conversation_state', None)
+    return sessions if sessions is not None else getattr(bot, 'sessions', {})
+
+
+def component_sizes(bot, bert=None) -> Dict[str, int]:
+    """Approximate bytes per subsystem of a MedicalChatbot or MedicalConversationEngine
+
+    ``bert`` is an optional medical_nlp_pipeline.MedicalNLPPipeline whose
+    model and tokenizer are reported separately.
+    """
+    seen = {}
+    sizes = {}
+    # Snapshot the containers first: request threads keep mutating them
+    sessions = dict(_sessions(bot))
+    histories = [session.get('conversation_history', []) for session in sessions.values()]
+
+    if bert is not None:
+        sizes['bert_model'] = deep_sizeof(bert.model, seen)
+        sizes['bert_tokenizer'] = deep_sizeof(bert.tokenizer, seen)
+        sizes['bert_pipeline'] = deep_sizeof(bert, seen)
+
+    sizes['conversation_histories'] = deep_sizeof(histories, seen)
+    sizes['session_state'] = deep_sizeof(sessions, seen)
+    sizes['session_locks'] = deep_sizeof(getattr(bot, 'session_locks', None), seen)
+
+    database = getattr(bot, 'db', None)
+    if database is not None:
+        sizes['doctor_cache'] = deep_sizeof(dict(getattr(database, '_doctor_cache', {})), seen)
+
+    nlp = getattr(bot, 'nlp', None)
+    if nlp is not None and hasattr(nlp, 'active_vocabulary'):
+        vocabulary = nlp.active_vocabulary()
+        sizes['spelling_index'] = deep_sizeof(vocabulary.spelling, seen)
+        sizes['faq_index'] = deep_sizeof(vocabulary.faq_index, seen)
+        sizes['vocabulary'] = deep_sizeof(vocabulary, seen)
+
+    intent_model = getattr(bot, 'intent_model', None)
+    if intent_model is not None:
+        sizes['intent_model'] = deep_sizeof(intent_model.current, seen)
+    semantic_index = getattr(bot, 'semantic_index', None)
+    if semantic_index is not None:
+        sizes['semantic_index'] = deep_sizeof(semantic_index.current, seen)
+    if hasattr(bot, 'response_templates'):
+        sizes['response_templates'] = deep_sizeof(bot.response_templates, seen)
+
+    # Everything else the bot holds (state tables, thresholds, executors)
+    sizes['other'] = deep_sizeof(bot, seen)
+    return sizes
+
+
+def session_sizes(bot) -> Dict[str, int]:
+    """Bytes per live session (each measured on its own, strings it shares included)"""
+    return {session_id: deep_sizeof(session) for session_id, session in dict(_sessions(bot)).items()}
+
+
+def memory_report(bot, bert=None, top_sessions: int = 10) -> Dict:
+    """Per-component and per-session memory with the worker's RSS, JSON-ready"""
+    # Diff first: measuring allocates, and that must not show up as growth
+    growth = leak_tracker.diff() if leak_tracker.baseline is not None else None
+    components = component_sizes(bot, bert)
+    per_session = session_sizes(bot)
+    ordered = sorted(per_session.items(), key=lambda item: -item[1])
+    total_sessions = sum(per_session.values())
+    report = {
+        'rss_mb': current_rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+        'accounted_bytes': sum(components.values()),
+        'components': dict(sorted(components.items(), key=lambda item: -item[1])),
+        'sessions': {
+            'count': len(per_session),
+            'total_bytes': total_sessions,
+            'mean_bytes': round(total_sessions / len(per_session)) if per_session else 0,
+            'largest': [{'session_id': session_id, 'bytes': size} for session_id, size in ordered[:top_sessions]]
+        }
+    }
+    if growth is not None:
+        report['tracemalloc'] = growth
+    return report
+
+
+def workers_per_node(node_mb: float, worker_rss_mb: float, reserve_mb: float = 512) -> int:
+    """Workers of this RSS that fit on a node after reserving memory for the OS"""
+    if worker_rss_mb <= 0:
+        return 0
+    return max(int((node_mb - reserve_mb) // worker_rss_mb), 0)
+
+
+class LeakTracker:
+    def __init__(self, frames: int = 10):
+        """tracemalloc snapshots diffed against a baseline, for finding what keeps growing"""
+        self.frames = frames
+        self.baseline = None
+        self._started_tracing = False
+
+    def start(self) -> 'LeakTracker':
+        """Start tracing (if it is not already) and take the baseline snapshot"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        gc.collect()
+        self.baseline = self._snapshot()
+        return self
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>')
+        ))
+
+    def diff(self, top: int = 15, key_type: str = 'lineno') -> List[Dict]:
+        """Allocation sites that grew most since the baseline"""
+        if self.baseline is None:
+            return []
+        gc.collect()
+        stats = self._snapshot().compare_to(self.baseline, key_type)
+        growth = [stat for stat in stats if stat.size_diff > 0][:top]
+        return [{
+            'where': str(stat.traceback[0]) if stat.traceback else '?',
+            'size_diff_bytes': stat.size_diff,
+            'count_diff': stat.count_diff,
+            'size_bytes': stat.size
+        } for stat in growth]
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.baseline = None
+
+
+# Process-wide tracker behind the admin endpoints
+leak_tracker = LeakTracker()
+
+
+def _print_report(report: Dict) -> None:
+    print(f"\n{'component':<24}{'KiB':>12}")
+    for name, size in report['components'].items():
+        print(f"{name:<24}{size / 1024:>12.1f}")
+    print(f"{'accounted':<24}{report['accounted_bytes'] / 1024:>12.1f}")
+    sessions = report['sessions']
+    print(f"\n👥 {sessions['count']} sessions, {sessions['total_bytes'] / 1024:.1f} KiB "
+          f"(mean {sessions['mean_bytes']} bytes per session)")
+    print(f"📦 RSS {report['rss_mb']} MB (peak {report['peak_rss_mb']} MB)")
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+
+    from benchmark_conversations import CONVERSATION_SCRIPTS, TARGETS, build_target, run_conversation
+
+    parser = argparse.ArgumentParser(description="Report memory per chatbot component and per session")
+    parser.add_argument('--target', choices=TARGETS, default='chatbot')
+    parser.add_argument('--conversations', type=int, default=500, help='Scripted conversations left live as sessions')
+    parser.add_argument('--bert', action='store_true', help='Also load and measure the BioClinicalBERT pipeline')
+    parser.add_argument('--node-mb', type=float, help='Node memory; prints how many workers of this RSS fit')
+    parser.add_argument('--leak-rounds', type=int, default=0,
+                        help='After a baseline, run this many rounds of ended conversations and diff')
+    parser.add_argument('--output', help='Write the report JSON here')
+    args = parser.parse_args()
+
+    bert = None
+    if args.bert:
+        try:
+            from medical_nlp_pipeline import MedicalNLPPipeline as BertNLPPipeline
+            bert = BertNLPPipeline()
+        except ImportError as e:
+            print(f"⚠️ Skipping BERT: {e}")
+
+    bot = build_target(args.target)
+    names = sorted(CONVERSATION_SCRIPTS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.conversations):
+            run_conversation(bot, CONVERSATION_SCRIPTS[names[i % len(names)]], f"memory-{i}")
+
+    if args.leak_rounds:
+        # Sessions that end should leave nothing behind; growth here is a leak
+        leak_tracker.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for round_number in range(args.leak_rounds):
+                for i in range(100):
+                    session_id = f"leak-{round_number}-{i}"
+                    run_conversation(bot, CONVERSATION_SCRIPTS[names[i % len(names)]], session_id)
+                    if hasattr(bot, 'end_session'):
+                        bot.end_session(session_id)
+                    else:
+                        _sessions(bot).pop(session_id, None)
+
+    report = memory_report(bot, bert)
+    _print_report(report)
+
+    if 'tracemalloc' in report:
+        print(f"\n🔎 Growth since baseline ({args.leak_rounds} rounds of 100 ended conversations):")
+        for row in report['tracemalloc']:
+            print(f"  {row['size_diff_bytes']:>+10} B {row['count_diff']:>+7} blocks  {row['where']}")
+        leak_tracker.stop()
+
+    if args.node_mb:
+        print(f"\n🖥️ {workers_per_node(args.node_mb, report['rss_mb'])} workers of {report['rss_mb']} MB "
+              f"fit in {args.node_mb:.0f} MB (512 MB reserved)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.output}")
@@ -0,0 +1,170 @@
+"""
+Operational Metrics
+Per-thread counters merged on scrape, served in the Prometheus text format
+
+    GET /metrics                  on the headless API (chat_api.py)
+    METRICS_PORT=9100             standalone endpoint next to the Streamlit app
+
+Counting is a dict update on the calling thread's own table, so request
+threads never wait on a lock or on a scrape; a scrape merges every thread's
+table (and the tracer's span histograms) into one exposition. Tables of
+threads that have exited are folded into one retired table, so short-lived
+threads do not pile up.
+
+Rates are left to the dashboard, e.g. intents per minute is
+rate(chatbot_turns_total[1m]) * 60, the fallback rate is
+chatbot_responses_total{type="fallback"} over all responses, and the
+cache hit rate is result="hit" over all chatbot_cache_lookups_total.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+from instrumentation import tracer
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name -> help text for every counter the chatbot modules increment
+COUNTERS = {
+    'chatbot_turns_total': 'Messages processed, by resolved intent and the stage that resolved it',
+    'chatbot_responses_total': 'Responses sent, by response type (fallback, emergency_redirect, ...)',
+    'chatbot_bookings_total': 'Appointment booking attempts, by outcome (success, conflict, error)',
+    'chatbot_session_evictions_total': 'Idle sessions evicted after the session timeout',
+    'chatbot_cache_lookups_total': 'Cache lookups, by cache and result (hit, miss)'
+}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Counter registry; each thread increments its own table"""
+        self._local = threading.local()
+        self._thread_counters = []  # (thread, its counters) for every thread that counted
+        self._retired = {}          # counters of threads that have exited
+        self._register_lock = threading.Lock()
+        self._gauges = {}  # name -> (help, callback)
+
+    def _counters(self) -> Dict:
+        counters = getattr(self._local, 'counters', None)
+        if counters is None:
+            counters = self._local.counters = {}
+            with self._register_lock:
+                self._retire_dead_threads()
+                self._thread_counters.append((threading.current_thread(), counters))
+        return counters
+
+    def _retire_dead_threads(self) -> None:
+        """Fold the tables of exited threads into the retired table (caller holds the lock)"""
+        live = []
+        for thread, counters in self._thread_counters:
+            if thread.is_alive():
+                live.append((thread, counters))
+                continue
+            for key, value in counters.items():
+                self._retired[key] = self._retired.get(key, 0) + value
+        self._thread_counters = live
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Add to a counter (labels become Prometheus labels)"""
+        key = (name, tuple(labels.items()))
+        counters = self._counters()
+        counters[key] = counters.get(key, 0) + amount
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], float]) -> None:
+        """Register a gauge whose value is read from ``callback`` at scrape time"""
+        self._gauges[name] = (help_text, callback)
+
+    def snapshot(self) -> Dict[Tuple, float]:
+        """All threads' counters summed: (name, labels) -> value"""
+        with self._register_lock:
+            self._retire_dead_threads()
+            per_thread = [counters for _, counters in self._thread_counters]
+            merged = dict(self._retired)
+        for counters in per_thread:
+            for key, value in list(counters.items()):
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def value(self, name: str, **labels) -> float:
+        """Current total of one counter series"""
+        return self.snapshot().get((name, tuple(labels.items())), 0)
+
+    def reset(self) -> None:
+        with self._register_lock:
+            self._retired.clear()
+            for _, counters in self._thread_counters:
+                counters.clear()
+
+    def prometheus_text(self) -> str:
+        """Counters and gauges in the Prometheus text exposition format"""
+        by_name = {}
+        for (name, labels), value in self.snapshot().items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(set(by_name) | set(COUNTERS)):
+            lines.append(f"# HELP {name} {COUNTERS.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(by_name.get(name, []), key=lambda item: str(item[0])):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, (help_text, callback) in sorted(self._gauges.items()):
+            try:
+                value = callback()
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels) + '}'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Process-wide registry used by the chatbot modules
+metrics = MetricsRegistry()
+
+
+def metrics_text() -> str:
+    """Everything a /metrics scrape returns: counters, gauges and span histograms"""
+    return metrics.prometheus_text() + tracer.prometheus_text()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the app log
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0') -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread (for front ends without their own HTTP routes)"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ Metrics endpoint not started on port {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    print(f"📈 Metrics at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Sampling Profiler
+Stack samples of every live thread, aggregated by stack and exported as flame graphs
+
+    kill -USR2 <worker pid>               start; send again to stop and write the profile
+    POST /admin/profile?seconds=10        on the headless API (chat_api.py, needs ADMIN_TOKEN)
+    python sampling_profiler.py --seconds 5 --output conversations.speedscope.json
+
+Optional environment (read by configure_profiler_from_env):
+    CHATBOT_PROFILER_SIGNAL=1    install the SIGUSR2 start/stop handler
+    CHATBOT_PROFILE_HZ           samples per second (default 100)
+    CHATBOT_PROFILE_DIR          where signal-triggered profiles go (default: the temp dir)
+    CHATBOT_PROFILE_FOCUS        keep only stacks through this function (default process_message)
+
+A background thread reads ``sys._current_frames()`` at the configured rate;
+nothing is hooked into the profiled code, so the cost while sampling is a
+stack walk per thread per tick and nothing at all while stopped. Profiles are
+written as collapsed stacks (flamegraph.pl, speedscope, inferno) or, for a
+.json path, in the speedscope file format.
+
+The sampler needs the GIL to take a sample. Threads in GIL-releasing calls
+(SQLite, torch) or in long Python stretches are caught where they are, but a
+pure-Python burst shorter than sys.getswitchinterval() (5 ms) usually ends
+before the sampler gets in, so fast turns are under-counted; it finds where
+slow turns spend their time, not what a 100 µs turn is made of.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+DEFAULT_HZ = 100
+DEFAULT_FOCUS = 'process_message'
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, hz: float = DEFAULT_HZ, focus: Optional[str] = None, max_depth: int = 128):
+        """Statistical profiler for the threads of this process
+
+        ``focus`` keeps only samples whose stack passes through a function of
+        that name (e.g. process_message), so idle server threads waiting on
+        sockets do not drown out the chatbot turns.
+        """
+        self.interval = 1.0 / hz
+        self.focus = focus
+        self.max_depth = max_depth
+        self.stacks = Counter()  # tuple of code objects, root first -> samples
+        self.ticks = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None) -> 'SamplingProfiler':
+        """Start sampling from a daemon thread (stops by itself after ``duration`` seconds)"""
+        if self.running:
+            return self
+        self._stop.clear()
+        self.started_at = datetime.now()
+        self._thread = threading.Thread(target=self._run, args=(duration,), name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.ticks = 0
+            self.elapsed = 0.0
+
+    def _run(self, duration: Optional[float]):
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+        next_tick = started
+        while not self._stop.is_set():
+            self._sample(own_id)
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                break
+            # Fixed-rate schedule; a slow tick is not made up with a burst
+            next_tick = max(next_tick + self.interval, now)
+            self._stop.wait(next_tick - now)
+        with self._lock:
+            self.elapsed += time.perf_counter() - started
+
+    def _sample(self, own_id: int):
+        focus = self.focus
+        samples = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            keep = focus is None
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(code)
+                if not keep and code.co_name == focus:
+                    keep = True
+                frame = frame.f_back
+            if keep:
+                stack.reverse()
+                samples.append(tuple(stack))
+        with self._lock:
+            self.ticks += 1
+            for stack in samples:
+                self.stacks[stack] += 1
+
+    def _snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.stacks)
+
+    def total_samples(self) -> int:
+        return sum(self._snapshot().values())
+
+    def top_functions(self, limit: int = 15) -> List[Dict]:
+        """Functions by self samples (leaf frame) and total samples (anywhere on the stack)"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self._snapshot().items():
+            own[_frame_label(stack[-1])] += count
+            for label in {_frame_label(code) for code in stack}:
+                total[label] += count
+        return [{'function': label, 'self': own[label], 'total': count}
+                for label, count in sorted(total.items(), key=lambda item: (-own[item[0]], -item[1]))[:limit]]
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format: "root;caller;leaf count" per line"""
+        lines = Counter()
+        for stack, count in self._snapshot().items():
+            lines[';'.join(_frame_label(code) for code in stack)] += count
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(lines.items()))
+
+    def speedscope(self, name: str = 'medical chatbot') -> Dict:
+        """Profile in the speedscope file format (one sampled profile, weights in seconds)"""
+        frames, frame_index = [], {}
+        samples, weights = [], []
+        for stack, count in sorted(self._snapshot().items(), key=lambda item: -item[1]):
+            indices = []
+            for code in stack:
+                index = frame_index.get(code)
+                if index is None:
+                    index = frame_index[code] = len(frames)
+                    frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+                indices.append(index)
+            samples.append(indices)
+            weights.append(round(count * self.interval, 6))
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': round(sum(weights), 6),
+                'samples': samples,
+                'weights': weights
+            }],
+            'name': name,
+            'exporter': 'sampling_profiler.py'
+        }
+
+    def render(self, fmt: str = 'collapsed') -> str:
+        if fmt == 'speedscope':
+            return json.dumps(self.speedscope())
+        if fmt == 'collapsed':
+            return self.collapsed()
+        raise ValueError(f"Unknown profile format: {fmt!r}")
+
+    def save(self, path: str) -> str:
+        """Write the profile (speedscope for .json paths, collapsed stacks otherwise), atomically"""
+        content = self.render('speedscope' if path.endswith('.json') else 'collapsed')
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.profile-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+
+# Process-wide profiler the signal handler and admin actions share
+profiler = SamplingProfiler(focus=DEFAULT_FOCUS)
+
+
+def profile_path(directory: Optional[str] = None, fmt: str = 'speedscope') -> str:
+    """Timestamped output file for this worker"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    extension = 'speedscope.json' if fmt == 'speedscope' else 'collapsed.txt'
+    return os.path.join(directory or tempfile.gettempdir(), f"chatbot-profile-{os.getpid()}-{stamp}.{extension}")
+
+
+def install_signal_handler(signum: int = None, directory: Optional[str] = None) -> bool:
+    """Toggle ``profiler`` on ``signum`` (SIGUSR2): start on one signal, stop and save on the next
+
+    Signal handlers can only be installed from the main thread, which some
+    front ends (Streamlit script runs) are not; returns False there.
+    """
+    signum = signum if signum is not None else getattr(signal, 'SIGUSR2', None)
+    if signum is None:
+        print("⚠️ Profiler signal not installed: no SIGUSR2 on this platform")
+        return False
+
+    def toggle(received, frame):
+        if profiler.running:
+            profiler.stop()
+            # Write from a thread: file I/O does not belong in a signal handler
+            threading.Thread(target=_save_and_reset, args=(directory,), name='profile-writer', daemon=True).start()
+        else:
+            profiler.reset()
+            profiler.start()
+            print(f"🔬 Sampling profiler started (pid {os.getpid()}); signal again to stop")
+
+    try:
+        signal.signal(signum, toggle)
+    except ValueError as e:
+        print(f"⚠️ Profiler signal not installed: {e}")
+        return False
+    return True
+
+
+def _save_and_reset(directory: Optional[str]):
+    path = profiler.save(profile_path(directory))
+    print(f"🔬 Profile with {profiler.total_samples()} samples saved to {path}")
+
+
+def configure_profiler_from_env(environ=None) -> SamplingProfiler:
+    """Rate, focus and signal trigger as the environment asks (see the module docstring)"""
+    environ = os.environ if environ is None else environ
+    if environ.get('CHATBOT_PROFILE_HZ'):
+        profiler.interval = 1.0 / float(environ['CHATBOT_PROFILE_HZ'])
+    if 'CHATBOT_PROFILE_FOCUS' in environ:
+        profiler.focus = environ['CHATBOT_PROFILE_FOCUS'] or None
+    if environ.get('CHATBOT_PROFILER_SIGNAL', '').lower() in ('1', 'true', 'yes'):
+        install_signal_handler(directory=environ.get('CHATBOT_PROFILE_DIR'))
+    return profiler
+
+
+if __name__ == "__main__":
+    from benchmark_conversations import CONVERSATION_SCRIPTS, TARGETS, build_target, run_conversation
+
+    parser = argparse.ArgumentParser(description="Profile scripted conversations with the sampling profiler")
+    parser.add_argument('--target', choices=TARGETS, default='chatbot')
+    parser.add_argument('--seconds', type=float, default=5.0, help='How long to keep conversations running')
+    parser.add_argument('--hz', type=float, default=DEFAULT_HZ, help='Samples per second')
+    parser.add_argument('--threads', type=int, default=4, help='Conversation threads')
+    parser.add_argument('--output', help='Profile file (.json: speedscope, otherwise collapsed stacks)')
+    args = parser.parse_args()
+
+    bot = build_target(args.target)
+    names = sorted(CONVERSATION_SCRIPTS)
+    deadline = time.perf_counter() + args.seconds
+
+    def converse(worker: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            run_conversation(bot, CONVERSATION_SCRIPTS[names[i % len(names)]], f"profile-{worker}-{i}")
+            i += 1
+
+    session_profiler = SamplingProfiler(args.hz, focus=DEFAULT_FOCUS).start()
+    workers = [threading.Thread(target=converse, args=(worker,)) for worker in range(args.threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    session_profiler.stop()
+
+    print(f"🔬 {session_profiler.total_samples()} stack samples in {session_profiler.ticks} ticks "
+          f"over {session_profiler.elapsed:.1f}s")
+    print(f"\n{'self':>6} {'total':>6}  function")
+    for row in session_profiler.top_functions():
+        print(f"{row['self']:>6} {row['total']:>6}  {row['function']}")
+    if args.output:
+        session_profiler.save(args.output)
+        print(f"💾 Profile saved to {args.output}")
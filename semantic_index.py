@@ -0,0 +1,229 @@
+"""
+Semantic FAQ & Intent Search
+Sentence embeddings in a memory-mapped float16 matrix with vectorized top-k search
+
+Build once (needs torch + transformers), then every worker maps the same file:
+    python semantic_index.py build --output medical_semantic_index
+    python semantic_index.py query --index medical_semantic_index "where do I park"
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from faq_index import FAQ_KNOWLEDGE_BASE
+
+DEFAULT_ENCODER = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_TRAINING_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medical_training_data.json')
+
+# Rows converted to float32 per matrix-vector block; bounds the per-query scratch memory
+SEARCH_BLOCK_ROWS = 16384
+
+# Query encoders by model name, shared by every index (and every reload) in the process
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+class SentenceEncoder:
+    def __init__(self, model_name: str = DEFAULT_ENCODER, device: str = 'cpu'):
+        """Small CPU sentence encoder (mean-pooled transformer, L2-normalized)"""
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self._torch = torch
+        self.model_name = model_name
+        self.device = device
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(device).eval()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts to unit-length float32 vectors"""
+        torch = self._torch
+        batches = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                batch = self.tokenizer(
+                    texts[start:start + batch_size], padding=True, truncation=True,
+                    max_length=128, return_tensors='pt'
+                ).to(self.device)
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, dim=1)
+                batches.append(pooled.cpu().numpy().astype(np.float32))
+        return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+
+def build_semantic_index(output_prefix: str, encoder: SentenceEncoder,
+                         faq_path: str = FAQ_KNOWLEDGE_BASE,
+                         training_path: str = DEFAULT_TRAINING_DATA) -> Dict:
+    """Embed every FAQ and training utterance into ``<prefix>.npy`` + ``<prefix>.json``
+
+    FAQ rows come first, then intent rows, so a search can be restricted
+    to one kind by slicing the matrix instead of filtering results.
+
+    Both files are written under temporary names and moved into place, the
+    matrix first and the metadata last: workers mapping the old matrix keep
+    their pages, and a hot reload triggered by the new metadata always
+    finds the matching matrix.
+    """
+    with open(faq_path, 'r', encoding='utf-8') as f:
+        faqs = json.load(f)['faqs']
+    if training_path.endswith(('.arrow', '.parquet')):
+        from training_data_store import load_training_table, texts_and_intents
+        training_samples = zip(*texts_and_intents(load_training_table(training_path)))
+    else:
+        with open(training_path, 'r', encoding='utf-8') as f:
+            training_data = json.load(f)
+        training_samples = [
+            (sample['text'], intent['name'])
+            for intent in training_data['intents']
+            for sample in intent['samples']
+        ]
+
+    items = []
+    texts = []
+    for faq in faqs:
+        items.append({'kind': 'faq', 'id': faq['id'], 'label': faq.get('category', faq['id']), 'text': faq['question']})
+        texts.append(f"{faq['question']} {' '.join(faq.get('keywords', []))}")
+    faq_rows = len(items)
+
+    for text, intent_name in training_samples:
+        items.append({'kind': 'intent', 'id': str(len(items)), 'label': intent_name, 'text': text})
+        texts.append(text)
+
+    embeddings = encoder.encode(texts)
+    metadata = {
+        'encoder': encoder.model_name,
+        'dim': int(embeddings.shape[1]),
+        'rows': len(items),
+        'ranges': {'faq': [0, faq_rows], 'intent': [faq_rows, len(items)]},
+        'items': items
+    }
+
+    directory = os.path.dirname(os.path.abspath(output_prefix))
+    matrix_fd, matrix_tmp = tempfile.mkstemp(prefix='.semantic_index_', suffix='.npy', dir=directory)
+    metadata_fd, metadata_tmp = tempfile.mkstemp(prefix='.semantic_index_', suffix='.json', dir=directory)
+    os.close(matrix_fd)
+    os.close(metadata_fd)
+    try:
+        matrix = np.lib.format.open_memmap(matrix_tmp, mode='w+', dtype=np.float16, shape=embeddings.shape)
+        matrix[:] = embeddings.astype(np.float16)
+        matrix.flush()
+        del matrix
+        with open(metadata_tmp, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+        os.replace(matrix_tmp, output_prefix + '.npy')
+        os.replace(metadata_tmp, output_prefix + '.json')
+    except BaseException:
+        for path in (matrix_tmp, metadata_tmp):
+            if os.path.exists(path):
+                os.unlink(path)
+        raise
+    return metadata
+
+
+class SemanticIndex:
+    def __init__(self, index_prefix: str, encoder: Optional[SentenceEncoder] = None):
+        """Map a prebuilt index read-only
+
+        The matrix is never copied into the process: all workers mapping the
+        same file share its pages through the OS page cache.
+        """
+        with open(index_prefix + '.json', 'r', encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self.vectors = np.load(index_prefix + '.npy', mmap_mode='r')
+        self.items = self.metadata['items']
+        self._encoder = encoder
+        # hot_reload.HotReloader watches the metadata file and these
+        self.source_files = [index_prefix + '.npy']
+
+    @classmethod
+    def load(cls, metadata_path: str) -> 'SemanticIndex':
+        """Open the index whose ``<prefix>.json`` is given (the hot_reload.HotReloader loader)"""
+        prefix = metadata_path[:-len('.json')] if metadata_path.endswith('.json') else metadata_path
+        return cls(prefix)
+
+    @property
+    def encoder(self) -> SentenceEncoder:
+        """Query encoder, loaded on first search and reused across reloads of the index"""
+        if self._encoder is None:
+            model_name = self.metadata['encoder']
+            with _encoders_lock:
+                if model_name not in _encoders:
+                    _encoders[model_name] = SentenceEncoder(model_name)
+                self._encoder = _encoders[model_name]
+        return self._encoder
+
+    def search(self, query: str, top_k: int = 5, kind: Optional[str] = None) -> List[Dict]:
+        """Top-k rows by cosine similarity, optionally restricted to 'faq' or 'intent'"""
+        start, stop = self.metadata['ranges'][kind] if kind else (0, len(self.items))
+        if stop <= start:
+            return []
+
+        query_vector = self.encoder.encode([query])[0]
+        scores = np.empty(stop - start, dtype=np.float32)
+        for block_start in range(start, stop, SEARCH_BLOCK_ROWS):
+            block_stop = min(block_start + SEARCH_BLOCK_ROWS, stop)
+            block = np.asarray(self.vectors[block_start:block_stop], dtype=np.float32)
+            scores[block_start - start:block_stop - start] = block @ query_vector
+
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for row in best:
+            match = dict(self.items[start + row])
+            match['score'] = round(float(scores[row]), 4)
+            results.append(match)
+        return results
+
+    def classify_intent(self, text: str, k: int = 5) -> Dict:
+        """Similarity-weighted vote over the k nearest training utterances"""
+        neighbours = self.search(text, top_k=k, kind='intent')
+        if not neighbours:
+            return {'intent': 'unknown', 'confidence': 0.0}
+
+        votes = defaultdict(float)
+        for neighbour in neighbours:
+            votes[neighbour['label']] += max(neighbour['score'], 0.0)
+        intent, weight = max(votes.items(), key=lambda item: item[1])
+        total = sum(votes.values()) or 1.0
+        return {
+            'intent': intent,
+            'confidence': round(weight / total * neighbours[0]['score'], 4)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the semantic FAQ/intent index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Embed FAQs and training utterances')
+    build_parser.add_argument('--output', default='medical_semantic_index')
+    build_parser.add_argument('--encoder', default=DEFAULT_ENCODER)
+    build_parser.add_argument('--faqs', default=FAQ_KNOWLEDGE_BASE)
+    build_parser.add_argument('--training-data', default=DEFAULT_TRAINING_DATA, help='.json, .arrow or .parquet')
+
+    query_parser = subparsers.add_parser('query', help='Search an existing index')
+    query_parser.add_argument('--index', default='medical_semantic_index')
+    query_parser.add_argument('--kind', choices=['faq', 'intent'])
+    query_parser.add_argument('--top-k', type=int, default=5)
+    query_parser.add_argument('text')
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        print(f"🧠 Encoding with {args.encoder}...")
+        metadata = build_semantic_index(args.output, SentenceEncoder(args.encoder), args.faqs, args.training_data)
+        print(f"✅ Indexed {metadata['rows']} rows ({metadata['dim']} dims, float16) -> {args.output}.npy")
+    else:
+        index = SemanticIndex(args.index)
+        for match in index.search(args.text, top_k=args.top_k, kind=args.kind):
+            print(f"{match['score']:.3f}  [{match['kind']}] {match['label']}  {match['text']}")
@@ -0,0 +1,157 @@
+"""
+Spelling-Tolerant Vocabulary Matching
+SymSpell-style deletion index that maps misspelled words onto the medical vocabulary
+
+    python spelling_index.py "I need a cardiolgy appointment for my migrane"
+
+Every vocabulary word is stored under each string reachable from it by
+deleting up to ``max_distance`` characters. A typed token only generates its
+own deletes and looks them up, so correcting a token costs a handful of dict
+lookups however large the vocabulary is; candidates are then confirmed with
+a true edit distance (adjacent transpositions count as one edit).
+"""
+
+import argparse
+import re
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+
+from metrics import metrics
+
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings obtained from ``word`` by deleting up to ``max_distance`` characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        results.update(next_frontier)
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(first: str, second: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or ``max_distance + 1`` once it is exceeded"""
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and first[i - 1] == second[j - 2]
+                    and first[i - 2] == second[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SpellingIndex:
+    # Short words sit one edit away from too many everyday words ("fever" /
+    # "never", "mental" / "dental"), so only longer vocabulary words are
+    # correction targets and only longer tokens are corrected
+    MIN_WORD_LENGTH = 7
+    MIN_TOKEN_LENGTH = 5
+    # Tokens this long may be two edits away from their word; shorter ones one
+    TWO_EDIT_TOKEN_LENGTH = 9
+    # Bounds: correction targets (the most frequent are kept; each adds a few
+    # hundred delete variants) and cached corrections (least recently used go)
+    MAX_WORDS = 20000
+    MAX_CACHE_SIZE = 10000
+
+    def __init__(self, words: Iterable[str], known_words: Iterable[str] = (), max_distance: int = 2):
+        """Index ``words`` (the correction targets)
+
+        ``known_words`` are left alone when typed even though they are not
+        targets, e.g. the FAQ vocabulary: a correctly spelled word must never
+        be "corrected" into a medical term.
+        """
+        self.max_distance = max_distance
+        self.frequencies = {}
+        for word in words:
+            word = word.lower()
+            self.frequencies[word] = self.frequencies.get(word, 0) + 1
+        self.known_words = set(self.frequencies) | {word.lower() for word in known_words}
+
+        targets = [word for word in self.frequencies if len(word) >= self.MIN_WORD_LENGTH]
+        if len(targets) > self.MAX_WORDS:
+            targets = sorted(targets, key=lambda word: (-self.frequencies[word], word))[:self.MAX_WORDS]
+        self._deletes = {}  # delete variant -> vocabulary words it came from
+        for word in targets:
+            for variant in _deletes(word, max_distance):
+                self._deletes.setdefault(variant, []).append(word)
+        self._cache = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    def correct(self, token: str) -> Optional[str]:
+        """Closest vocabulary word for a misspelled token, or None when there is none"""
+        if token in self.known_words or len(token) < self.MIN_TOKEN_LENGTH:
+            return None
+        try:
+            cached = self._cache[token]
+        except KeyError:
+            metrics.inc('chatbot_cache_lookups_total', cache='spelling', result='miss')
+        else:
+            metrics.inc('chatbot_cache_lookups_total', cache='spelling', result='hit')
+            try:
+                self._cache.move_to_end(token)
+            except KeyError:
+                pass  # evicted by another thread meanwhile
+            return cached
+
+        max_distance = min(self.max_distance, 2 if len(token) >= self.TWO_EDIT_TOKEN_LENGTH else 1)
+        best = None
+        best_key = None
+        for variant in _deletes(token, max_distance):
+            for word in self._deletes.get(variant, ()):
+                distance = edit_distance(token, word, max_distance)
+                if distance > max_distance:
+                    continue
+                # Fewest edits first, then the word the vocabulary uses most
+                key = (distance, -self.frequencies[word], word)
+                if best_key is None or key < best_key:
+                    best, best_key = word, key
+
+        self._cache[token] = best
+        while len(self._cache) > self.MAX_CACHE_SIZE:
+            try:
+                self._cache.popitem(last=False)
+            except KeyError:
+                break
+        return best
+
+    def correct_text(self, text: str) -> str:
+        """Lower-cased text with each misspelled word replaced by its correction"""
+        def replace(match):
+            return self.correct(match.group()) or match.group()
+
+        return WORD_PATTERN.sub(replace, text.lower())
+
+
+def vocabulary_words(phrases: Iterable[str]) -> Iterable[str]:
+    """Individual words of vocabulary phrases ("chest pain" -> "chest", "pain")"""
+    for phrase in phrases:
+        yield from WORD_PATTERN.findall(phrase.lower())
+
+
+if __name__ == "__main__":
+    from medical_vocabulary import VOCABULARY_FILE, load_vocabulary
+
+    parser = argparse.ArgumentParser(description="Correct misspelled medical terms against the vocabulary")
+    parser.add_argument('text')
+    parser.add_argument('--vocabulary', default=VOCABULARY_FILE)
+    args = parser.parse_args()
+
+    spelling = load_vocabulary(args.vocabulary).spelling
+    print(f"📝 {spelling.correct_text(args.text)}")
@@ -1,12 +1,123 @@
 """
 Synthetic Training Data Generator for Medical Chatbot
 Generates thousands of realistic medical conversation examples
+
+    python synthetic_training_generator.py
+    python synthetic_training_generator.py --jsonl samples.jsonl --samples-per-intent 5000 --seed 7
+    python synthetic_training_generator.py --jsonl samples.jsonl --workers 8 --seed 7
+    python synthetic_training_generator.py --bio tokens.jsonl --table samples.parquet --seed 7
+
+Without an output flag the whole dataset is built in memory and written as
+medical_training_data.json plus the Botpress export. --jsonl streams
+samples with their entity spans (in parallel with --workers; byte-identical
+for a given --seed), --bio writes BIO-tagged token sequences and --table an
+Arrow/Parquet table; none of these hold the dataset in memory.
 """
 
+import argparse
 import json
+import os
+import re
 import random
-from typing import List, Dict
-from itertools import product
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from itertools import product, islice
+
+from medical_vocabulary import default_vocabulary
+
+# Choice groups in templates, e.g. {want/need/would like}
+CHOICE_PATTERN = re.compile(r'\{([^}]+)\}')
+
+# Entity placeholders are filled by entity injection, not by choice expansion
+ENTITY_PLACEHOLDERS = ('specialty', 'condition', 'symptom', 'doctor')
+ENTITY_PLACEHOLDER_PATTERN = re.compile(r'\{(' + '|'.join(ENTITY_PLACEHOLDERS) + r')\}')
+
+# Tokens for token-classification export: words, and punctuation on its own
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)?|[^\w\s]")
+
+
+class EntityMatcher:
+    def __init__(self, lexicon: Dict[str, Iterable[Tuple[str, str]]]):
+        """Single compiled regex over every surface form, returning character spans
+        
+        ``lexicon`` maps an entity label to (surface text, canonical value)
+        pairs. Alternatives are ordered longest first, so the regex prefers
+        "high blood pressure" over any shorter overlapping form, and matches
+        are whole-word and case-insensitive.
+        """
+        self.labels = list(lexicon)
+        self._lookup = {}
+        for label, entries in lexicon.items():
+            for surface, value in entries:
+                self._lookup.setdefault(surface.lower(), (label, value))
+        alternatives = sorted(self._lookup, key=len, reverse=True)
+        self.pattern = re.compile(
+            r'(?<!\w)(?:' + '|'.join(re.escape(surface) for surface in alternatives) + r')(?!\w)',
+            re.IGNORECASE
+        )
+    
+    def find(self, text: str, offset: int = 0) -> List[Dict]:
+        """Non-overlapping entity spans in text, left to right; positions are shifted by offset"""
+        spans = []
+        for match in self.pattern.finditer(text):
+            label, value = self._lookup[match.group(0).lower()]
+            spans.append({
+                'entity': label,
+                'value': value,
+                'text': match.group(0),
+                'start': match.start() + offset,
+                'end': match.end() + offset
+            })
+        return spans
+
+
+def bio_tags(text: str, entities: List[Dict]) -> Dict:
+    """Tokenize text and tag each token B-<label>/I-<label>/O from character spans"""
+    tokens = []
+    tags = []
+    for match in TOKEN_PATTERN.finditer(text):
+        tag = 'O'
+        for entity in entities:
+            if entity['start'] <= match.start() < entity['end']:
+                tag = ('B-' if match.start() == entity['start'] else 'I-') + entity['entity']
+                break
+        tokens.append(match.group(0))
+        tags.append(tag)
+    return {'tokens': tokens, 'tags': tags}
+
+def derive_shard_seed(master_seed: int, intent_name: str, template_index: int) -> int:
+    """Stable per-shard seed: same master seed -> same shard streams, on any machine"""
+    digest = hashlib.blake2b(f"{master_seed}:{intent_name}:{template_index}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+# Generator instance for pool workers, installed once per process by _init_shard_worker
+_shard_generator = None
+
+def _init_shard_worker(generator: 'MedicalTrainingDataGenerator'):
+    """Process-pool initializer: receive the generator configuration once per worker"""
+    global _shard_generator
+    _shard_generator = generator
+
+def split_quota(quota: int, parts: int) -> List[int]:
+    """``quota`` in ``parts`` near-equal shares, the remainder going to the first parts"""
+    base, remainder = divmod(quota, parts)
+    return [base + (1 if index < remainder else 0) for index in range(parts)]
+
+def _generate_shard(shard: Tuple[str, int, int, int, int, str]) -> Tuple[str, int]:
+    """Write samples [start, start + quota) of one (intent, template) stream to a JSON Lines file; returns (path, count)"""
+    intent_name, template_index, start, quota, master_seed, path = shard
+    rng = random.Random(derive_shard_seed(master_seed, intent_name, template_index))
+    samples = islice(_shard_generator._iter_template_samples(intent_name, template_index, rng), start, start + quota)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for sample in samples:
+            f.write(json.dumps(sample, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return path, count
 
 class MedicalTrainingDataGenerator:
     def __init__(self):
@@ -58,97 +169,239 @@ class MedicalTrainingDataGenerator:
             ]
         }
         
-        # Medical specialties with variations
+        # Specialties with variations, conditions, doctors, time and urgency
+        # words all come from the medical vocabulary the chatbot itself runs on
+        vocabulary = default_vocabulary()
         self.specialties = {
-            'cardiology': ['cardiology', 'heart doctor', 'cardiologist', 'heart specialist'],
-            'dermatology': ['dermatology', 'skin doctor', 'dermatologist', 'skin specialist'],
-            'pediatrics': ['pediatrics', 'pediatrician', 'children\'s doctor', 'child doctor'],
-            'neurology': ['neurology', 'neurologist', 'brain doctor', 'nerve specialist'],
-            'orthopedics': ['orthopedics', 'bone doctor', 'orthopedist', 'joint specialist'],
-            'gynecology': ['gynecology', 'gynecologist', 'women\'s health', 'OB-GYN'],
-            'psychiatry': ['psychiatry', 'psychiatrist', 'mental health', 'therapist'],
-            'internal_medicine': ['internal medicine', 'general practitioner', 'family doctor', 'GP']
+            name: list(spec['aliases'])
+            for name, spec in vocabulary.specialties.items()
         }
+        self.conditions = list(vocabulary.conditions)
+        self.doctor_names = [doctor['name'] for doctor in vocabulary.doctors]
+        self.time_expressions = list(vocabulary.time_expressions)
+        self.urgency_words = list(vocabulary.urgency_indicators)
         
-        # Medical conditions and symptoms
-        self.conditions = [
-            'chest pain', 'headache', 'fever', 'cough', 'back pain', 'joint pain',
-            'skin rash', 'anxiety', 'depression', 'high blood pressure', 'diabetes',
-            'allergies', 'migraine', 'insomnia', 'fatigue', 'dizziness'
-        ]
-        
-        # Doctor names (mock)
-        self.doctor_names = [
-            'Dr. Garcia', 'Dr. Martinez', 'Dr. Rodriguez', 'Dr. Lopez', 'Dr. Gonzalez',
-            'Dr. Fernandez', 'Dr. Sanchez', 'Dr. Ramirez', 'Dr. Torres', 'Dr. Flores'
-        ]
-        
-        # Time expressions
-        self.time_expressions = [
-            'today', 'tomorrow', 'this week', 'next week', 'Monday', 'Tuesday',
-            'Wednesday', 'Thursday', 'Friday', 'morning', 'afternoon', 'evening'
+        # Values each entity placeholder expands to: (surface text, label, canonical value)
+        specialty_values = [
+            (variation, 'specialty', specialty)
+            for specialty, variations in self.specialties.items()
+            for variation in variations
         ]
+        condition_values = [(condition, 'condition', condition) for condition in self.conditions]
+        self.placeholder_values = {
+            'specialty': specialty_values,
+            'condition': condition_values,
+            'symptom': condition_values,
+            'doctor': [(doctor, 'doctor', doctor) for doctor in self.doctor_names]
+        }
         
-        # Urgency indicators
-        self.urgency_words = ['urgent', 'ASAP', 'emergency', 'immediately', 'soon', 'quickly']
+        # Annotates template literals and arbitrary text in one regex pass
+        self.entity_matcher = EntityMatcher({
+            'specialty': [(surface, value) for surface, _, value in specialty_values],
+            'doctor': [(doctor, doctor) for doctor in self.doctor_names],
+            'condition': [(condition, condition) for condition in self.conditions],
+            'urgency': [(word, word) for word in self.urgency_words],
+            'time': [(expression, expression) for expression in self.time_expressions]
+        })
         
         print("✅ Medical Training Data Generator initialized!")
     
     def expand_template(self, template: str, intent: str) -> List[str]:
         """Expand a template into multiple variations"""
-        variations = []
-        
-        # Handle choice patterns like {want/need/would like}
-        import re
-        choice_pattern = r'\{([^}]+)\}'
-        choices = re.findall(choice_pattern, template)
-        
-        if not choices:
-            return [template]
+        return list(self.iter_expand_template(template, intent))
+    
+    def iter_expand_template(self, template: str, intent: str) -> Iterator[str]:
+        """Lazily expand choice patterns like {want/need/would like}
         
-        # Generate all combinations
-        choice_lists = []
-        for choice_str in choices:
-            choice_lists.append(choice_str.split('/'))
+        Variations are produced one at a time from itertools.product, so a
+        consumer that stops early never pays for the rest of the expansion.
+        """
+        # Split into literal text and choice groups: even indexes are literals.
+        # Entity placeholders pass through untouched for iter_medical_entities.
+        parts = CHOICE_PATTERN.split(template)
+        literals = parts[0::2]
+        choice_lists = [
+            ['{' + choice_str + '}'] if choice_str in ENTITY_PLACEHOLDERS else choice_str.split('/')
+            for choice_str in parts[1::2]
+        ]
         
-        # Create all combinations
         for combination in product(*choice_lists):
-            variation = template
-            for i, choice in enumerate(combination):
-                variation = re.sub(r'\{[^}]+\}', choice, variation, count=1)
-            variations.append(variation)
-        
-        return variations
+            pieces = [literals[0]]
+            for choice, literal in zip(combination, literals[1:]):
+                pieces.append(choice)
+                pieces.append(literal)
+            yield ''.join(pieces)
     
     def inject_medical_entities(self, template: str) -> List[str]:
         """Inject medical entities into templates"""
-        variations = []
+        return list(self.iter_medical_entities(template))
+    
+    def iter_medical_entities(self, template: str) -> Iterator[str]:
+        """Lazily inject medical entities into a template"""
+        for text, _ in self.iter_annotated_entities(template):
+            yield text
+    
+    def iter_annotated_entities(self, template: str) -> Iterator[Tuple[str, List[Dict]]]:
+        """Inject medical entities into every placeholder, yielding (text, entity spans)
         
-        # Replace {specialty} placeholder
-        if '{specialty}' in template:
-            for specialty_group in self.specialties.values():
-                for specialty in specialty_group:
-                    variations.append(template.replace('{specialty}', specialty))
+        Spans of injected entities come from their insertion offsets; the
+        template's literal text is scanned by the entity matcher once per
+        template rather than once per variation.
+        """
+        parts = ENTITY_PLACEHOLDER_PATTERN.split(template)
+        literals = parts[0::2]
+        literal_spans = [self.entity_matcher.find(literal) for literal in literals]
+        value_lists = [self.placeholder_values[placeholder] for placeholder in parts[1::2]]
         
-        # Replace {condition} placeholder
-        elif '{condition}' in template:
-            for condition in self.conditions:
-                variations.append(template.replace('{condition}', condition))
+        for combination in product(*value_lists):
+            pieces = []
+            entities = []
+            position = 0
+            for index, literal in enumerate(literals):
+                for span in literal_spans[index]:
+                    entities.append(dict(span, start=span['start'] + position, end=span['end'] + position))
+                pieces.append(literal)
+                position += len(literal)
+                if index < len(combination):
+                    surface, label, value = combination[index]
+                    entities.append({
+                        'entity': label,
+                        'value': value,
+                        'text': surface,
+                        'start': position,
+                        'end': position + len(surface)
+                    })
+                    pieces.append(surface)
+                    position += len(surface)
+            yield ''.join(pieces), entities
+    
+    def iter_intent_samples(self, intent_name: str, samples_per_intent: int,
+                            master_seed: Optional[int] = None) -> Iterator[Dict]:
+        """Yield up to samples_per_intent samples for one intent, generating only what is consumed
         
-        # Replace {doctor} placeholder
-        elif '{doctor}' in template:
-            for doctor in self.doctor_names:
-                variations.append(template.replace('{doctor}', doctor))
+        The quota is shared across the intent's templates in rounds, as in
+        generate_jsonl_parallel. With a master_seed every template draws from
+        its own derived RNG, so the output matches generate_jsonl_parallel for
+        the same seed; without one the global ``random`` module is used.
+        """
+        streams = {}
+        for template_index in range(len(self.intent_templates[intent_name])):
+            if master_seed is None:
+                rng = random
+            else:
+                rng = random.Random(derive_shard_seed(master_seed, intent_name, template_index))
+            streams[template_index] = self._iter_template_samples(intent_name, template_index, rng)
         
-        # Replace {symptom} placeholder
-        elif '{symptom}' in template:
-            for condition in self.conditions:
-                variations.append(template.replace('{symptom}', condition))
+        pending = samples_per_intent
+        while pending > 0 and streams:
+            for template_index, share in zip(list(streams), split_quota(pending, len(streams))):
+                count = 0
+                for sample in islice(streams[template_index], share):
+                    yield sample
+                    count += 1
+                pending -= count
+                if count < share:
+                    del streams[template_index]
+    
+    def _iter_template_samples(self, intent_name: str, template_index: int, rng) -> Iterator[Dict]:
+        """Every sample one template can produce, with random decorations drawn from rng"""
+        template = self.intent_templates[intent_name][template_index]
+        # Expand template choices
+        for expanded_template in self.iter_expand_template(template, intent_name):
+            # Inject medical entities (annotated as they are inserted)
+            for variation, entities in self.iter_annotated_entities(expanded_template):
+                # Add urgency variations for booking
+                if intent_name == 'book_appointment' and rng.random() < 0.3:
+                    urgency = rng.choice(self.urgency_words)
+                    entities = entities + [self._appended_span('urgency', urgency, variation)]
+                    variation = f"{variation} {urgency}"
+                
+                # Add time variations
+                if rng.random() < 0.4:
+                    time_expr = rng.choice(self.time_expressions)
+                    entities = entities + [self._appended_span('time', time_expr, variation)]
+                    variation = f"{variation} {time_expr}"
+                
+                yield {
+                    'text': variation,
+                    'intent': intent_name,
+                    'entities': entities
+                }
+    
+    def _appended_span(self, label: str, value: str, text: str) -> Dict:
+        """Span of a word about to be appended to text after a space"""
+        start = len(text) + 1
+        return {'entity': label, 'value': value, 'text': value, 'start': start, 'end': start + len(value)}
+    
+    def iter_training_samples(self, samples_per_intent: int = 200, master_seed: Optional[int] = None) -> Iterator[Dict]:
+        """Stream samples for every intent without holding the dataset in memory"""
+        for intent_name in self.intent_templates:
+            yield from self.iter_intent_samples(intent_name, samples_per_intent, master_seed)
+    
+    def generate_jsonl_parallel(self, filename: str, samples_per_intent: int = 200,
+                                master_seed: int = 0, workers: Optional[int] = None) -> Dict[str, int]:
+        """Generate JSON Lines across a process pool; output is byte-identical for a given master_seed
         
-        else:
-            variations.append(template)
+        Work is sharded by (intent, template) and each intent's quota is split
+        across its templates (split_quota, in template order). A template that
+        runs out of variations leaves its shortfall to the next round, shared
+        the same way among the templates that still have samples, so the
+        quota is met whenever the templates can produce it. Each shard draws
+        from its own derived seed and writes a temporary file; files are merged
+        per intent in (round, template) order - the order iter_intent_samples
+        yields for the same seed - so neither the worker count nor scheduling
+        order affects the result. Returns the number of samples written per intent.
+        """
+        shard_dir = tempfile.mkdtemp(prefix='training_shards_')
+        pending = {intent_name: samples_per_intent for intent_name in self.intent_templates}
+        live = {intent_name: list(range(len(templates))) for intent_name, templates in self.intent_templates.items()}
+        produced = {}  # (intent, template) -> samples written so far
+        shard_files = {intent_name: [] for intent_name in self.intent_templates}  # in (round, template) order
         
-        return variations
+        print(f"🔄 Generating {sum(len(t) for t in live.values())} template shards on "
+              f"{workers or os.cpu_count()} workers (seed={master_seed})...")
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker, initargs=(self,)) as pool:
+                round_index = 0
+                while True:
+                    shards = []
+                    for intent_name, quota in pending.items():
+                        if quota <= 0 or not live[intent_name]:
+                            continue
+                        for template_index, share in zip(live[intent_name], split_quota(quota, len(live[intent_name]))):
+                            if share:
+                                key = (intent_name, template_index)
+                                path = os.path.join(shard_dir, f"{intent_name}_{template_index:04d}_{round_index}.jsonl")
+                                shards.append((intent_name, template_index, produced.get(key, 0), share, master_seed, path))
+                    if not shards:
+                        break
+                    
+                    futures = [pool.submit(_generate_shard, shard) for shard in shards]
+                    for (intent_name, template_index, _, share, _, _), future in zip(shards, futures):
+                        path, count = future.result()
+                        key = (intent_name, template_index)
+                        produced[key] = produced.get(key, 0) + count
+                        shard_files[intent_name].append(path)
+                        pending[intent_name] -= count
+                        if count < share:
+                            # Exhausted: its shortfall goes to the others next round
+                            live[intent_name].remove(template_index)
+                    round_index += 1
+            
+            counts = {intent_name: 0 for intent_name in self.intent_templates}
+            with open(filename, 'w', encoding='utf-8') as out:
+                for intent_name, paths in shard_files.items():
+                    for path in paths:
+                        with open(path, 'r', encoding='utf-8') as shard_file:
+                            for line in shard_file:
+                                out.write(line)
+                                counts[intent_name] += 1
+                        os.remove(path)
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        
+        print(f"✅ {sum(counts.values())} samples merged into {filename}")
+        return counts
     
     def generate_training_data(self, samples_per_intent: int = 200) -> Dict:
         """Generate complete training dataset"""
@@ -166,46 +419,10 @@ class MedicalTrainingDataGenerator:
         }
         
         # Generate samples for each intent
-        for intent_name, templates in self.intent_templates.items():
-            intent_samples = []
-            
-            for template in templates:
-                # Expand template choices
-                expanded = self.expand_template(template, intent_name)
-                
-                for expanded_template in expanded:
-                    # Inject medical entities
-                    medical_variations = self.inject_medical_entities(expanded_template)
-                    
-                    for variation in medical_variations:
-                        # Add urgency variations for booking
-                        if intent_name == 'book_appointment' and random.random() < 0.3:
-                            urgency = random.choice(self.urgency_words)
-                            variation = f"{variation} {urgency}"
-                        
-                        # Add time variations
-                        if random.random() < 0.4:
-                            time_expr = random.choice(self.time_expressions)
-                            variation = f"{variation} {time_expr}"
-                        
-                        intent_samples.append({
-                            'text': variation.strip(),
-                            'intent': intent_name,
-                            'entities': self._extract_entities_from_text(variation)
-                        })
-                        
-                        if len(intent_samples) >= samples_per_intent:
-                            break
-                    
-                    if len(intent_samples) >= samples_per_intent:
-                        break
-                
-                if len(intent_samples) >= samples_per_intent:
-                    break
-            
+        for intent_name in self.intent_templates:
             training_data['intents'].append({
                 'name': intent_name,
-                'samples': intent_samples[:samples_per_intent]
+                'samples': list(self.iter_intent_samples(intent_name, samples_per_intent))
             })
         
         # Calculate total samples
@@ -237,40 +454,8 @@ class MedicalTrainingDataGenerator:
         }
     
     def _extract_entities_from_text(self, text: str) -> List[Dict]:
-        """Extract entities from generated text"""
-        entities = []
-        text_lower = text.lower()
-        
-        # Extract specialties
-        for specialty, variations in self.specialties.items():
-            for variation in variations:
-                if variation.lower() in text_lower:
-                    entities.append({
-                        'entity': 'specialty',
-                        'value': specialty,
-                        'text': variation
-                    })
-                    break
-        
-        # Extract doctors
-        for doctor in self.doctor_names:
-            if doctor.lower() in text_lower:
-                entities.append({
-                    'entity': 'doctor',
-                    'value': doctor,
-                    'text': doctor
-                })
-        
-        # Extract conditions
-        for condition in self.conditions:
-            if condition.lower() in text_lower:
-                entities.append({
-                    'entity': 'condition',
-                    'value': condition,
-                    'text': condition
-                })
-        
-        return entities
+        """Extract entity spans from arbitrary text (generated samples are annotated at injection)"""
+        return self.entity_matcher.find(text)
     
     def save_training_data(self, training_data: Dict, filename: str):
         """Save training data to JSON file"""
@@ -278,6 +463,38 @@ class MedicalTrainingDataGenerator:
             json.dump(training_data, f, indent=2, ensure_ascii=False)
         print(f"💾 Training data saved to {filename}")
     
+    def save_training_samples_jsonl(self, samples: Iterable[Dict], filename: str) -> int:
+        """Write samples as JSON Lines, one at a time; returns the number written"""
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as f:
+            for sample in samples:
+                f.write(json.dumps(sample, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        print(f"💾 {count} samples streamed to {filename}")
+        return count
+    
+    def save_training_table(self, samples: Iterable[Dict], filename: str) -> int:
+        """Stream samples into a columnar .arrow / .parquet file (needs pyarrow)"""
+        from training_data_store import write_training_table
+        
+        count = write_training_table(samples, filename, list(self.intent_templates), self.entity_matcher.labels)
+        print(f"💾 {count} samples written to {filename}")
+        return count
+    
+    def save_token_classification_jsonl(self, samples: Iterable[Dict], filename: str) -> int:
+        """Write samples as BIO-tagged token sequences, one JSON object per line"""
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as f:
+            for sample in samples:
+                record = bio_tags(sample['text'], sample['entities'])
+                record['intent'] = sample['intent']
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        print(f"💾 {count} token-classification records streamed to {filename}")
+        return count
+    
     def generate_botpress_format(self, training_data: Dict) -> Dict:
         """Convert to Botpress-specific format"""
         botpress_data = {
@@ -304,30 +521,60 @@ class MedicalTrainingDataGenerator:
 
 # Generate training data
 if __name__ == "__main__":
-    generator = MedicalTrainingDataGenerator()
+    parser = argparse.ArgumentParser(description="Generate synthetic medical chatbot training data")
+    parser.add_argument('--samples-per-intent', type=int, default=250)
+    parser.add_argument('--seed', type=int, help='Master seed for reproducible output (--workers defaults it to 0)')
+    parser.add_argument('--jsonl', help='Stream samples with entity spans to this JSON Lines file')
+    parser.add_argument('--workers', type=int, help='Generate --jsonl on this many processes')
+    parser.add_argument('--bio', help='Stream BIO-tagged token sequences to this JSON Lines file')
+    parser.add_argument('--table', help='Stream samples to this .arrow / .parquet file (needs pyarrow)')
+    parser.add_argument('--output', default='medical_training_data.json',
+                        help='In-memory JSON dataset (written when no streaming output is given)')
+    args = parser.parse_args()
+    if args.workers is not None and not args.jsonl:
+        parser.error("--workers needs --jsonl")
     
-    # Generate comprehensive training data
-    print("\n🚀 Starting synthetic data generation...")
-    training_data = generator.generate_training_data(samples_per_intent=250)
-    
-    # Save in multiple formats
-    generator.save_training_data(training_data, 'medical_training_data.json')
-    
-    # Generate Botpress format
-    botpress_data = generator.generate_botpress_format(training_data)
-    generator.save_training_data(botpress_data, 'botpress_training_data.json')
-    
-    # Show summary
-    print(f"\n📊 Training Data Summary:")
-    print(f"Total Intents: {len(training_data['intents'])}")
-    print(f"Total Samples: {training_data['metadata']['total_samples']}")
-    print(f"Specialties Covered: {len(training_data['metadata']['specialties_covered'])}")
-    print(f"Entity Types: {len(training_data['entities'])}")
+    generator = MedicalTrainingDataGenerator()
     
-    # Show sample data
-    print(f"\n🔍 Sample Training Examples:")
-    for intent in training_data['intents'][:2]:
-        print(f"\n{intent['name'].upper()}:")
-        for i, sample in enumerate(intent['samples'][:3]):
-            print(f"  {i+1}. {sample['text']}")
-        print(f"  ... and {len(intent['samples'])-3} more examples")
\ No newline at end of file
+    if args.jsonl or args.bio or args.table:
+        print(f"\n🚀 Streaming {args.samples_per_intent} samples per intent (seed={args.seed})...")
+        if args.jsonl and args.workers is not None:
+            generator.generate_jsonl_parallel(args.jsonl, args.samples_per_intent,
+                                              master_seed=args.seed or 0, workers=args.workers)
+        elif args.jsonl:
+            generator.save_training_samples_jsonl(
+                generator.iter_training_samples(args.samples_per_intent, args.seed), args.jsonl)
+        if args.bio:
+            generator.save_token_classification_jsonl(
+                generator.iter_training_samples(args.samples_per_intent, args.seed), args.bio)
+        if args.table:
+            generator.save_training_table(
+                generator.iter_training_samples(args.samples_per_intent, args.seed), args.table)
+    else:
+        # Generate comprehensive training data
+        if args.seed is not None:
+            random.seed(args.seed)
+        print("\n🚀 Starting synthetic data generation...")
+        training_data = generator.generate_training_data(samples_per_intent=args.samples_per_intent)
+        
+        # Save in multiple formats
+        generator.save_training_data(training_data, args.output)
+        
+        # Generate Botpress format
+        botpress_data = generator.generate_botpress_format(training_data)
+        generator.save_training_data(botpress_data, 'botpress_training_data.json')
+        
+        # Show summary
+        print(f"\n📊 Training Data Summary:")
+        print(f"Total Intents: {len(training_data['intents'])}")
+        print(f"Total Samples: {training_data['metadata']['total_samples']}")
+        print(f"Specialties Covered: {len(training_data['metadata']['specialties_covered'])}")
+        print(f"Entity Types: {len(training_data['entities'])}")
+        
+        # Show sample data
+        print(f"\n🔍 Sample Training Examples:")
+        for intent in training_data['intents'][:2]:
+            print(f"\n{intent['name'].upper()}:")
+            for i, sample in enumerate(intent['samples'][:3]):
+                print(f"  {i+1}. {sample['text']}")
+            print(f"  ... and {len(intent['samples'])-3} more examples")
\ No newline at end of file
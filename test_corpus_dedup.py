@@ -0,0 +1,56 @@
+"""
+Corpus Deduplication Tests
+LSH band collisions alone must not drop a sample; only the similarity estimate does
+
+    python -m pytest test_corpus_dedup.py
+"""
+
+import unittest
+
+from corpus_dedup import CorpusDeduplicator, shingles
+
+
+def _sample(text: str, intent: str = 'cancel_appointment') -> dict:
+    return {'text': text, 'intent': intent, 'entities': []}
+
+
+def _jaccard(first: dict, second: dict) -> float:
+    a, b = set(shingles(first)), set(shingles(second))
+    return len(a & b) / len(a | b)
+
+
+class CorpusDeduplicatorTest(unittest.TestCase):
+    def test_pair_below_threshold_survives(self):
+        first = _sample("What are your hours", 'get_info')
+        second = _sample("What are your phone numbers", 'get_info')
+        self.assertLess(_jaccard(first, second), 0.7)
+
+        deduplicator = CorpusDeduplicator(threshold=0.7)
+        # The two share LSH bands, so only the signature comparison keeps them apart
+        first_keys = set(deduplicator._band_keys(deduplicator.signature(shingles(first))))
+        second_keys = set(deduplicator._band_keys(deduplicator.signature(shingles(second))))
+        self.assertTrue(first_keys & second_keys)
+
+        self.assertIsNone(deduplicator.check(first))
+        self.assertIsNone(deduplicator.check(second))
+
+    def test_near_and_exact_duplicates_are_dropped(self):
+        deduplicator = CorpusDeduplicator(threshold=0.7)
+        self.assertIsNone(deduplicator.check(_sample("I need to cancel my cardiology appointment for tomorrow morning")))
+        self.assertEqual(deduplicator.check(_sample("I need to cancel my cardiology appointment for tomorrow morning please")),
+                         'near')
+        self.assertEqual(deduplicator.check(_sample("i need to CANCEL my cardiology appointment, for tomorrow morning")),
+                         'exact')
+
+    def test_eviction_forgets_the_oldest_sample(self):
+        deduplicator = CorpusDeduplicator(threshold=0.7, max_entries=1)
+        text = "I need to cancel my cardiology appointment for tomorrow morning"
+        self.assertIsNone(deduplicator.check(_sample(text)))
+        self.assertIsNone(deduplicator.check(_sample("What are your hours")))
+        self.assertIsNone(deduplicator.check(_sample(text)))
+        self.assertEqual(sum(len(bucket) for bucket in deduplicator._buckets['cancel_appointment'].values()),
+                         deduplicator.bands)
+
+
+if __name__ == "__main__":
+    unittest.main()
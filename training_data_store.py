@@ -0,0 +1,207 @@
+"""
+Columnar Training Data Store
+Arrow IPC / Parquet export of training samples with a memory-mapped loader
+
+One row per sample: text, a dictionary-encoded intent and a list of entity
+spans. Arrow IPC files (.arrow) load zero-copy through a memory map; Parquet
+files (.parquet) are smaller on disk and decode column by column.
+
+    python training_data_store.py convert medical_training_data.json medical_training_data.arrow
+    python training_data_store.py info medical_training_data.arrow
+
+Needs pyarrow (imported on first use).
+"""
+
+import argparse
+import json
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Rows per record batch / Parquet row group while streaming a write
+WRITE_BATCH_ROWS = 65536
+
+
+def _pyarrow():
+    """Import pyarrow lazily so the rest of the project runs without it"""
+    import pyarrow
+    return pyarrow
+
+
+def training_schema(intents: List[str], entity_labels: List[str]):
+    """Schema with fixed intent/entity-label dictionaries
+
+    The dictionaries are declared up front so every record batch shares
+    them: an IPC file cannot replace a dictionary mid-stream.
+    """
+    pa = _pyarrow()
+    entity_type = pa.struct([
+        ('entity', pa.dictionary(pa.int16(), pa.string())),
+        ('value', pa.string()),
+        ('start', pa.int32()),
+        ('end', pa.int32()),
+        ('text', pa.string()),
+    ])
+    return pa.schema(
+        [
+            ('text', pa.string()),
+            ('intent', pa.dictionary(pa.int16(), pa.string())),
+            ('entities', pa.list_(entity_type)),
+        ],
+        metadata={
+            'intents': json.dumps(intents),
+            'entity_labels': json.dumps(entity_labels),
+        }
+    )
+
+
+def _record_batch(schema, samples: List[Dict]):
+    """Build one record batch, encoding labels against the schema's dictionaries"""
+    pa = _pyarrow()
+    metadata = schema.metadata
+    intents = json.loads(metadata[b'intents'])
+    entity_labels = json.loads(metadata[b'entity_labels'])
+    intent_codes = {name: code for code, name in enumerate(intents)}
+    label_codes = {name: code for code, name in enumerate(entity_labels)}
+
+    texts = []
+    intent_indices = []
+    offsets = [0]
+    label_indices = []
+    values = []
+    starts = []
+    ends = []
+    entity_texts = []
+    for sample in samples:
+        if sample['intent'] not in intent_codes:
+            raise ValueError(f"Intent {sample['intent']!r} is not in the schema's intent dictionary")
+        texts.append(sample['text'])
+        intent_indices.append(intent_codes[sample['intent']])
+        for entity in sample.get('entities', []):
+            if entity['entity'] not in label_codes:
+                raise ValueError(f"Entity label {entity['entity']!r} is not in the schema's label dictionary")
+            label_indices.append(label_codes[entity['entity']])
+            values.append(entity.get('value'))
+            # Older JSON exports carry entities without character offsets; their
+            # surface text is kept as is (with offsets it is a slice of the text)
+            starts.append(entity.get('start'))
+            ends.append(entity.get('end'))
+            entity_texts.append(entity.get('text') if entity.get('start') is None else None)
+        offsets.append(len(label_indices))
+
+    entity_struct = pa.StructArray.from_arrays(
+        [
+            pa.DictionaryArray.from_arrays(pa.array(label_indices, pa.int16()), pa.array(entity_labels, pa.string())),
+            pa.array(values, pa.string()),
+            pa.array(starts, pa.int32()),
+            pa.array(ends, pa.int32()),
+            pa.array(entity_texts, pa.string()),
+        ],
+        names=['entity', 'value', 'start', 'end', 'text']
+    )
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(texts, pa.string()),
+            pa.DictionaryArray.from_arrays(pa.array(intent_indices, pa.int16()), pa.array(intents, pa.string())),
+            pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), entity_struct),
+        ],
+        schema=schema
+    )
+
+
+def write_training_table(samples: Iterable[Dict], path: str, intents: List[str],
+                         entity_labels: List[str], batch_rows: int = WRITE_BATCH_ROWS) -> int:
+    """Stream samples into an Arrow IPC (.arrow) or Parquet (.parquet) file; returns rows written"""
+    pa = _pyarrow()
+    schema = training_schema(intents, entity_labels)
+    samples = iter(samples)
+    rows = 0
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+        write = writer.write_batch
+    else:
+        sink = pa.OSFile(path, 'wb')
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_batch
+
+    try:
+        while True:
+            chunk = list(islice(samples, batch_rows))
+            if not chunk:
+                break
+            write(_record_batch(schema, chunk))
+            rows += len(chunk)
+    finally:
+        writer.close()
+        if not path.endswith('.parquet'):
+            sink.close()
+    return rows
+
+
+def load_training_table(path: str):
+    """Open a training table memory-mapped: Arrow IPC columns reference the mapped file directly"""
+    pa = _pyarrow()
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def texts_and_intents(table) -> Tuple[List[str], List[str]]:
+    """The (texts, intent labels) columns a classifier trains on"""
+    return table.column('text').to_pylist(), table.column('intent').to_pylist()
+
+
+def iter_table_samples(table) -> Iterator[Dict]:
+    """Yield rows back as sample dicts, in the generator's JSON shape"""
+    for batch in table.to_batches():
+        for row in batch.to_pylist():
+            for entity in row['entities']:
+                if entity['start'] is not None:
+                    entity['text'] = row['text'][entity['start']:entity['end']]
+            yield row
+
+
+def iter_json_training_samples(training_data: Dict) -> Iterator[Dict]:
+    """Flatten a generate_training_data() dict into samples"""
+    for intent in training_data['intents']:
+        for sample in intent['samples']:
+            yield sample
+
+
+def convert_json(json_path: str, output_path: str, entity_labels: Optional[List[str]] = None) -> int:
+    """Convert a JSON training file to a columnar file"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        training_data = json.load(f)
+    intents = [intent['name'] for intent in training_data['intents']]
+    if entity_labels is None:
+        entity_labels = sorted({
+            entity['entity']
+            for sample in iter_json_training_samples(training_data)
+            for entity in sample.get('entities', [])
+        })
+    return write_training_table(iter_json_training_samples(training_data), output_path, intents, entity_labels)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert or inspect columnar training data")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='JSON training data -> .arrow / .parquet')
+    convert_parser.add_argument('source')
+    convert_parser.add_argument('output')
+
+    info_parser = subparsers.add_parser('info', help='Summarize a columnar training file')
+    info_parser.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'convert':
+        rows = convert_json(args.source, args.output)
+        print(f"✅ Wrote {rows} samples to {args.output}")
+    else:
+        table = load_training_table(args.path)
+        print(f"📦 {args.path}: {table.num_rows} samples, {table.nbytes / 1024:.1f} KiB in columns")
+        intent_counts = table.column('intent').combine_chunks().dictionary_decode().value_counts()
+        for item in intent_counts.to_pylist():
+            print(f"  {item['values']}: {item['counts']}")
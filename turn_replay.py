@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Conversation Capture & Replay
+Compact append-only binary log of real turns, replayed against a new build with response and latency diffs
+
+    TURN_CAPTURE=turns.mctl python chat_api.py            capture production turns
+    python turn_replay.py record --output turns.mctl      or capture scripted conversations
+    python turn_replay.py info turns.mctl
+    python turn_replay.py replay turns.mctl --speed 10 --workers 8 --max-mismatch-rate 1
+
+File layout: an 8-byte header (magic, format version, record header size),
+then one record per turn: a fixed 31-byte little-endian header (record
+length, unix time, 64-bit session hash, original latency in ms, CRC-32 of
+the response text with appointment ids and patient names masked, input
+length, response type length) followed by the
+UTF-8 input and response type. Every record is a single append, so several
+worker processes can share one file, and readers stream it in large chunks
+without ever holding more than one chunk in memory.
+
+Session ids are stored as hashes. Answers given in personal-data states
+(patient name, phone) are never stored: they are replaced by a synthetic
+name or phone number of the same shape that keeps the keywords the NLP
+routes on, so a replayed booking still walks the same flow; emails and
+phone numbers anywhere else are redacted too.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from benchmark_conversations import CONVERSATION_SCRIPTS, TARGETS, build_target, latency_summary, run_conversation
+from conversation_log import EMAIL_PATTERN, PHONE_PATTERN
+
+MAGIC = b'MCTL'
+FORMAT_VERSION = 2
+RECORD_HEADER = struct.Struct('<IdQfIHB')
+FILE_HEADER = MAGIC + struct.pack('<HH', FORMAT_VERSION, RECORD_HEADER.size)
+MAX_TEXT_BYTES = 0xFFFF
+MAX_TYPE_BYTES = 0xFF
+READ_CHUNK_BYTES = 1 << 20
+
+# Mismatching turns kept as examples in a replay report
+MAX_EXAMPLES = 20
+
+# Salted pseudonyms tried for one answer before settling for one that routes differently
+PSEUDONYM_ATTEMPTS = 16
+
+# Fields masked before a response is checksummed: appointment ids come from
+# the database, and patient names are pseudonyms when replayed
+VARIABLE_FIELDS = (
+    (re.compile(r'#\d+'), '#<id>'),
+    (re.compile(r'(Patient\**:\s*)[^\\\n]*'), r'\1<patient>')
+)
+
+
+def session_hash(session_id: str) -> int:
+    """Stable 64-bit hash of a session id"""
+    return int.from_bytes(hashlib.blake2b(session_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def routing_terms(text: str, nlp) -> List[str]:
+    """Keywords of ``text`` the rule-based NLP routes on: intent patterns and vocabulary terms"""
+    text_lower = text.lower()
+    terms = [pattern for patterns in getattr(nlp, 'INTENT_PATTERNS', {}).values()
+             for pattern in patterns if pattern in text_lower]
+    if hasattr(nlp, 'active_vocabulary'):
+        vocabulary = nlp.active_vocabulary()
+        corrected = vocabulary.spelling.correct_text(text_lower)
+        keywords = [keyword for keywords in vocabulary.medical_specialties.values() for keyword in keywords]
+        terms += [term for term in keywords + list(vocabulary.symptoms) + list(vocabulary.urgency_indicators)
+                  if term in corrected]
+    return list(dict.fromkeys(terms))
+
+
+def _route(nlp, text: str) -> Tuple:
+    """What the NLP hands the router for ``text``"""
+    result = nlp.process_query(text)
+    entities = result['entities']
+    return result['intent'], entities['specialties'], entities['symptoms'], entities['urgency']
+
+
+def pseudonymize(text: str, nlp=None) -> str:
+    """Same-shaped stand-in for a personal-data answer (a phone number stays a valid phone number)
+
+    With ``nlp`` the stand-in carries the original's routing keywords and is
+    re-salted until the NLP routes it like the original, so a name that
+    happens to contain "hi" is still answered as a greeting on replay.
+    """
+    if len(text.strip()) <= 1:
+        return text
+    terms = ' '.join(routing_terms(text, nlp)) if nlp is not None else ''
+    expected = _route(nlp, text) if nlp is not None else None
+    for salt in range(PSEUDONYM_ATTEMPTS):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=4, salt=bytes([salt])).digest()
+        if 7 <= sum(character.isdigit() for character in text) <= 15:
+            stand_in = f"+1-555-01{digest[0] % 100:02d}-{int.from_bytes(digest[1:], 'little') % 10000:04d}"
+        else:
+            letters = ''.join(chr(ord('a') + byte % 26) for byte in digest)
+            stand_in = f"Replay Patient {letters.title()}"
+        stand_in = f"{stand_in} {terms}" if terms else stand_in
+        if expected is None or _route(nlp, stand_in) == expected:
+            break
+    return stand_in
+
+
+def response_crc(response: Dict) -> int:
+    """CRC-32 of a response's text with its per-booking fields masked"""
+    text = str(response.get('response', ''))
+    for pattern, replacement in VARIABLE_FIELDS:
+        text = pattern.sub(replacement, text)
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def redact(text: str) -> str:
+    """Emails and phone numbers out of free text (times and counts stay, flows depend on them)"""
+    return PHONE_PATTERN.sub('+1-555-0100-0000', EMAIL_PATTERN.sub('patient@example.com', text))
+
+
+class TurnCaptureLog:
+    def __init__(self, path: str):
+        """Open (or create) a binary turn log for appending"""
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        try:
+            # Exactly one writer creates the file and its header
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o640)
+            os.write(fd, FILE_HEADER)
+            os.close(fd)
+        except FileExistsError:
+            pass
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+
+    def record(self, session_id: str, text: str, latency: float, response: Dict, private: bool = False,
+               nlp=None) -> None:
+        """Append one turn (``latency`` in seconds; ``private`` for answers to personal-data prompts)
+
+        ``nlp`` is the bot's pipeline; private answers are pseudonymized so it
+        routes them as it routed the original.
+        """
+        stored = pseudonymize(text, nlp) if private else redact(text)
+        text_bytes = stored.encode('utf-8')[:MAX_TEXT_BYTES]
+        type_bytes = str(response.get('type', '')).encode('utf-8')[:MAX_TYPE_BYTES]
+        header = RECORD_HEADER.pack(
+            RECORD_HEADER.size + len(text_bytes) + len(type_bytes), time.time(), session_hash(session_id),
+            latency * 1000, response_crc(response),
+            len(text_bytes), len(type_bytes)
+        )
+        # One write per record in append mode: concurrent writers never interleave
+        with self._lock:
+            os.write(self._fd, header + text_bytes + type_bytes)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def iter_turns(path: str, limit: Optional[int] = None) -> Iterator[Dict]:
+    """Stream the turns of a log in order; a partly written last record is left for next time"""
+    with open(path, 'rb') as f:
+        header = f.read(len(FILE_HEADER))
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a turn capture log")
+        version, header_size = struct.unpack('<HH', header[len(MAGIC):])
+        if version != FORMAT_VERSION or header_size != RECORD_HEADER.size:
+            raise ValueError(f"{path}: unsupported format version {version}")
+
+        emitted = 0
+        offset = len(FILE_HEADER)
+        buffer = b''
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            buffer = buffer + chunk if buffer else chunk
+            position = 0
+            while position + RECORD_HEADER.size <= len(buffer):
+                length, ts, session, latency_ms, crc, text_length, type_length = \
+                    RECORD_HEADER.unpack_from(buffer, position)
+                if length != RECORD_HEADER.size + text_length + type_length:
+                    raise ValueError(f"{path}: corrupt record at byte {offset + position}")
+                if position + length > len(buffer):
+                    break
+                text_start = position + RECORD_HEADER.size
+                type_start = text_start + text_length
+                yield {
+                    'ts': ts,
+                    'session': session,
+                    'text': buffer[text_start:type_start].decode('utf-8', errors='replace'),
+                    'response_type': buffer[type_start:type_start + type_length].decode('utf-8', errors='replace'),
+                    'response_crc': crc,
+                    'latency_ms': latency_ms
+                }
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+                position += length
+            offset += position
+            buffer = buffer[position:]
+
+
+def log_info(path: str) -> Dict:
+    """Turn, session and time-span totals of a log (one streaming pass)"""
+    turns = 0
+    sessions = set()
+    first_ts = last_ts = None
+    types = {}
+    for turn in iter_turns(path):
+        turns += 1
+        sessions.add(turn['session'])
+        first_ts = turn['ts'] if first_ts is None else first_ts
+        last_ts = turn['ts']
+        types[turn['response_type']] = types.get(turn['response_type'], 0) + 1
+    return {
+        'bytes': os.path.getsize(path),
+        'turns': turns,
+        'sessions': len(sessions),
+        'span_s': round(last_ts - first_ts, 3) if turns else 0.0,
+        'response_types': dict(sorted(types.items(), key=lambda item: -item[1]))
+    }
+
+
+class _ReplayStats:
+    """One replay worker's tallies; merged once all workers are done"""
+
+    def __init__(self):
+        self.turns = 0
+        self.type_mismatches = 0
+        self.text_mismatches = 0
+        self.errors = 0
+        self.original = array('d')
+        self.replayed = array('d')
+        self.by_type = {}  # original response type -> (original, replayed) latency arrays
+        self.examples = []
+
+    def merge(self, other: '_ReplayStats') -> None:
+        self.turns += other.turns
+        self.type_mismatches += other.type_mismatches
+        self.text_mismatches += other.text_mismatches
+        self.errors += other.errors
+        self.original.extend(other.original)
+        self.replayed.extend(other.replayed)
+        for response_type, (original, replayed) in other.by_type.items():
+            mine = self.by_type.setdefault(response_type, (array('d'), array('d')))
+            mine[0].extend(original)
+            mine[1].extend(replayed)
+        self.examples.extend(other.examples)
+
+
+def _replay_worker(bot, turns: queue.Queue, stats: _ReplayStats):
+    while True:
+        turn = turns.get()
+        if turn is None:
+            return
+        session_id = f"replay-{turn['session']:016x}"
+        started = time.perf_counter()
+        try:
+            response = bot.process_message(turn['text'], session_id)
+        except Exception as e:
+            response = {'type': f"exception:{type(e).__name__}", 'response': str(e)}
+            stats.errors += 1
+        latency = time.perf_counter() - started
+
+        stats.turns += 1
+        stats.original.append(turn['latency_ms'] / 1000)
+        stats.replayed.append(latency)
+        original, replayed = stats.by_type.setdefault(turn['response_type'], (array('d'), array('d')))
+        original.append(turn['latency_ms'] / 1000)
+        replayed.append(latency)
+
+        type_matches = response.get('type') == turn['response_type']
+        if not type_matches:
+            stats.type_mismatches += 1
+        if response_crc(response) != turn['response_crc']:
+            stats.text_mismatches += 1
+        if not type_matches and len(stats.examples) < MAX_EXAMPLES:
+            stats.examples.append({
+                'session': session_id,
+                'input': turn['text'][:120],
+                'expected_type': turn['response_type'],
+                'actual_type': response.get('type')
+            })
+
+
+def replay_log(path: str, bot, speed: float = 0.0, workers: int = 4, limit: Optional[int] = None) -> Dict:
+    """Feed a log's turns into ``bot`` and diff responses and latencies against the capture
+
+    ``speed`` 1 keeps the original pacing, 10 plays ten times faster, 0 sends
+    turns as fast as the workers take them. Each session is pinned to one
+    worker, so its turns run in their original order; sessions still share
+    one database, so with several workers a confirmation can find a slot
+    taken in another order than at capture time. Use one worker when the
+    response texts must match exactly.
+    """
+    queues = [queue.Queue(maxsize=1024) for _ in range(workers)]
+    worker_stats = [_ReplayStats() for _ in range(workers)]
+    threads = [threading.Thread(target=_replay_worker, args=(bot, queues[i], worker_stats[i]),
+                                name=f"replay-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    first_ts = None
+    max_lag = 0.0
+    for turn in iter_turns(path, limit):
+        if speed > 0:
+            first_ts = turn['ts'] if first_ts is None else first_ts
+            due = started + (turn['ts'] - first_ts) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+        queues[turn['session'] % workers].put(turn)
+    for turns in queues:
+        turns.put(None)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats = _ReplayStats()
+    for other in worker_stats:
+        stats.merge(other)
+    turns = stats.turns
+    return {
+        'log': path,
+        'turns': turns,
+        'workers': workers,
+        'speed': speed,
+        'elapsed_s': round(elapsed, 3),
+        'turns_per_sec': round(turns / elapsed, 1) if elapsed else 0.0,
+        'max_schedule_lag_s': round(max_lag, 3),
+        'errors': stats.errors,
+        'type_mismatch_rate': round(stats.type_mismatches / turns * 100, 3) if turns else 0.0,
+        'text_mismatch_rate': round(stats.text_mismatches / turns * 100, 3) if turns else 0.0,
+        'latency': {'original': latency_summary(stats.original), 'replayed': latency_summary(stats.replayed)},
+        'by_response_type': {
+            response_type: {
+                'turns': len(original),
+                'original_p95_ms': latency_summary(original)['p95_ms'],
+                'replayed_p95_ms': latency_summary(replayed)['p95_ms']
+            }
+            for response_type, (original, replayed) in sorted(stats.by_type.items())
+        },
+        'mismatch_examples': stats.examples[:MAX_EXAMPLES]
+    }
+
+
+def record_scripted(path: str, target: str, conversations: int) -> int:
+    """Capture scripted conversations from this build (a baseline log without production traffic)"""
+    bot = build_target(target)
+    bot.turn_capture = TurnCaptureLog(path)
+    names = sorted(CONVERSATION_SCRIPTS)
+    for i in range(conversations):
+        run_conversation(bot, CONVERSATION_SCRIPTS[names[i % len(names)]], f"scripted-{i}")
+    bot.turn_capture.close()
+    return sum(len(CONVERSATION_SCRIPTS[names[i % len(names)]]) for i in range(conversations))
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Capture conversation turns and replay them against this build")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Capture scripted conversations into a log')
+    record_parser.add_argument('--output', required=True)
+    record_parser.add_argument('--target', choices=TARGETS, default='chatbot')
+    record_parser.add_argument('--conversations', type=int, default=1000)
+
+    info_parser = subparsers.add_parser('info', help='Summarize a log')
+    info_parser.add_argument('log')
+
+    replay_parser = subparsers.add_parser('replay', help='Replay a log and diff against the capture')
+    replay_parser.add_argument('log')
+    replay_parser.add_argument('--target', choices=TARGETS, default='chatbot')
+    replay_parser.add_argument('--speed', type=float, default=0.0,
+                               help='1 = original pacing, 10 = ten times faster, 0 = as fast as possible')
+    replay_parser.add_argument('--workers', type=int, default=4, help='Replay threads (sessions are pinned)')
+    replay_parser.add_argument('--limit', type=int, help='Only the first N turns')
+    replay_parser.add_argument('--output', help='Write the replay report JSON here')
+    replay_parser.add_argument('--max-mismatch-rate', type=float,
+                               help='Fail when more than this percent of response types differ')
+    replay_parser.add_argument('--max-regression', type=float,
+                               help='Fail when replayed p95 latency is this many percent above the capture')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        with contextlib.redirect_stdout(io.StringIO()):
+            recorded = record_scripted(args.output, args.target, args.conversations)
+        print(f"💾 {recorded} turns captured to {args.output}")
+
+    elif args.command == 'info':
+        info = log_info(args.log)
+        print(f"📼 {args.log}: {info['turns']} turns, {info['sessions']} sessions over {info['span_s']}s "
+              f"({info['bytes'] / max(info['turns'], 1):.1f} bytes per turn)")
+        for response_type, count in info['response_types'].items():
+            print(f"  {response_type:<28}{count:>10}")
+
+    else:
+        bot = build_target(args.target)
+        print(f"▶️ Replaying {args.log} against this build's {args.target} "
+              f"(speed {args.speed or 'max'}, {args.workers} workers)...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = replay_log(args.log, bot, args.speed, args.workers, args.limit)
+
+        original, replayed = report['latency']['original'], report['latency']['replayed']
+        print(f"  {report['turns']} turns in {report['elapsed_s']}s ({report['turns_per_sec']} turns/sec), "
+              f"{report['errors']} errors, max schedule lag {report['max_schedule_lag_s']}s")
+        print(f"  Response type mismatches: {report['type_mismatch_rate']}% | "
+              f"text changes: {report['text_mismatch_rate']}%")
+        print(f"  Latency p50 {original['p50_ms']} -> {replayed['p50_ms']} ms | "
+              f"p95 {original['p95_ms']} -> {replayed['p95_ms']} ms | p99 {original['p99_ms']} -> {replayed['p99_ms']} ms")
+        for example in report['mismatch_examples'][:5]:
+            print(f"  ❌ '{example['input']}': {example['expected_type']} -> {example['actual_type']}")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Report saved to {args.output}")
+
+        failures = []
+        if args.max_mismatch_rate is not None and report['type_mismatch_rate'] > args.max_mismatch_rate:
+            failures.append(f"{report['type_mismatch_rate']}% response types changed")
+        if args.max_regression is not None and original['p95_ms']:
+            change = (replayed['p95_ms'] - original['p95_ms']) / original['p95_ms'] * 100
+            if change > args.max_regression:
+                failures.append(f"p95 latency {change:+.1f}%")
+        if failures:
+            print(f"❌ Replay check failed: {', '.join(failures)}")
+            sys.exit(1)
+        print("✅ Replay check passed")